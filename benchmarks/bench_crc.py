@@ -0,0 +1,26 @@
+"""
+Report the throughput of every CRC16 backend, checked against the reference table in tests/test_crc.py.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_crc.py [megabytes]
+"""
+import random
+import sys
+import time
+from pyvnqrpay import utils
+
+
+def bench_crc(megabytes: float = 4):
+    payload = random.Random(1).randbytes(200)
+    rounds = int(megabytes * 1024 * 1024 / len(payload))
+    for name, backend in utils.CRC16_BACKENDS.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            backend(payload)
+        elapsed = time.perf_counter() - start
+        selected = ' (selected)' if name == utils.CRC16_BACKEND else ''
+        print(f'{name}{selected}: {rounds * len(payload) / elapsed / 1024 / 1024:,.2f} MB/s')
+
+
+if __name__ == '__main__':
+    bench_crc(float(sys.argv[1]) if len(sys.argv) > 1 else 4)
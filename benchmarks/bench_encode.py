@@ -0,0 +1,30 @@
+"""
+Compare encoding QR codes with qr.qr_to_str in a loop against qr.qr_to_str_many.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_encode.py [count]
+"""
+import sys
+import time
+import datasets
+from pyvnqrpay import qr
+
+
+def bench_encode(count: int = 100_000):
+    qr_codes = datasets.vietqr_codes(count)
+
+    start = time.perf_counter()
+    expected = [qr.qr_to_str(qr_code) for qr_code in qr_codes]
+    loop_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = list(qr.qr_to_str_many(qr_codes))
+    many_elapsed = time.perf_counter() - start
+
+    assert result == expected
+    print(f'qr_to_str loop: {loop_elapsed:.3f}s ({count / loop_elapsed:,.0f} payloads/s)')
+    print(f'qr_to_str_many: {many_elapsed:.3f}s ({count / many_elapsed:,.0f} payloads/s)')
+
+
+if __name__ == '__main__':
+    bench_encode(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,33 @@
+"""
+Measure the import time of the package modules with ``python -X importtime``. That importing ``pyvnqrpay.banks``
+does not build the bank table is checked in tests/test_imports.py.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_import.py
+"""
+import os
+import subprocess
+import sys
+
+MODULES = ('pyvnqrpay.qr', 'pyvnqrpay.banks')
+
+
+def import_time(module: str) -> int:
+    """
+    Return the cumulative import time of a module in microseconds, in a fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+    )
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise RuntimeError(f'No import time reported for {module}')
+
+
+if __name__ == '__main__':
+    for module in MODULES:
+        print(f'{module}: {import_time(module) / 1000:.2f} ms')
@@ -0,0 +1,32 @@
+"""
+Compare the render throughput of the built-in QR matrix encoder and segno.
+
+The symbols are checked against their own images and against segno in tests/test_matrix.py.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_matrix.py [count]
+"""
+import sys
+import time
+import datasets
+from pyvnqrpay import matrix, qr
+from pyvnqrpay.render import render_bytes
+
+
+def bench_render(payloads, kind: str):
+    for name, render in (('segno', render_bytes), ('matrix', matrix.render_bytes)):
+        start = time.perf_counter()
+        for payload in payloads:
+            render(payload, kind=kind, scale=4)
+        elapsed = time.perf_counter() - start
+        print(f'{kind} {name}: {len(payloads) / elapsed:,.1f} images/s')
+
+
+def main(count: int = 200):
+    payloads = [qr.qr_to_str(qr_code) for qr_code in datasets.vietqr_codes(count)]
+    for kind in ('png', 'svg'):
+        bench_render(payloads, kind)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,29 @@
+"""
+Compare the memory held per decoded QR code by the QRCode dataclasses and their frozen, slotted variants.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_memory.py [count]
+"""
+import sys
+import tracemalloc
+import datasets
+from pyvnqrpay import qr
+
+
+def bytes_per_qr_code(payloads, frozen: bool) -> float:
+    tracemalloc.start()
+    decoded = [qr.str_to_qr(payload, frozen=frozen) for payload in payloads]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(decoded) == len(payloads)
+    return size / len(payloads)
+
+
+def bench_memory(count: int = 50_000):
+    payloads = [qr.qr_to_str(qr_code) for qr_code in datasets.vietqr_codes(count)]
+    print(f'QRCode: {bytes_per_qr_code(payloads, frozen=False):,.0f} bytes per decoded payload')
+    print(f'FrozenQRCode: {bytes_per_qr_code(payloads, frozen=True):,.0f} bytes per decoded payload')
+
+
+if __name__ == '__main__':
+    bench_memory(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,82 @@
+"""
+Check the image decoder on rendered QR codes, and measure its throughput.
+
+Every payload is rendered by segno and by the built-in matrix writer at several scales, also rotated, mirrored and
+on a larger screenshot-like canvas, then decoded back through the whole pipeline: PNG reader, binarization, finder
+patterns, grid sampling, error correction and ``qr.str_to_qr`` with its CRC check. A few codewords of some symbols
+are damaged to exercise the error correction.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_scan.py [count] [workers]
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+import numpy
+import segno
+import datasets
+from pyvnqrpay import matrix, qr, scan
+
+
+def _gray(modules: numpy.ndarray, scale: int, border: int = 4) -> numpy.ndarray:
+    pixels = numpy.kron(numpy.pad(modules, border), numpy.ones((scale, scale), dtype=bool))
+    return numpy.where(pixels, 0, 255).astype(numpy.uint8)
+
+
+def variants(payload: str):
+    for scale in (2, 4, 8):
+        buffer = io.BytesIO()
+        segno.make(payload, micro=False).save(buffer, kind='png', scale=scale)
+        yield f'segno x{scale}', scan.read_png(buffer.getvalue())
+        yield f'matrix x{scale}', scan.read_png(matrix.render_bytes(payload, kind='png', scale=scale))
+    modules = matrix.encode(payload).modules
+    yield 'rotated', numpy.rot90(_gray(modules, 4))
+    yield 'mirrored', _gray(modules, 4)[:, ::-1]
+    canvas = numpy.full((1600, 720), 235, dtype=numpy.uint8)
+    image = _gray(modules, 5)
+    canvas[400:400 + image.shape[0], 100:100 + image.shape[1]] = image
+    yield 'screenshot', canvas
+    damaged = modules.copy()
+    size = damaged.shape[0]
+    damaged[size // 2:size // 2 + 2, size // 3:size // 3 + 4] ^= True
+    yield 'damaged', _gray(damaged, 4)
+
+
+def check_scan(payloads):
+    checked = 0
+    for payload in payloads:
+        for name, image in variants(payload):
+            content = scan.decode_modules(numpy.ascontiguousarray(image)).decode('iso-8859-1')
+            assert content == payload, (name, payload)
+            assert qr.str_to_qr(content).is_valid, (name, payload)
+            checked += 1
+    print(f'{checked} images decoded')
+
+
+def bench_scan(payloads, workers: int):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index, payload in enumerate(payloads):
+            path = os.path.join(directory, f'{index:06d}.png')
+            with open(path, 'wb') as image:
+                image.write(matrix.render_bytes(payload, kind='png', scale=6))
+            paths.append(path)
+        for count in (0, workers):
+            start = time.perf_counter()
+            results = list(scan.decode_images(paths, workers=count))
+            elapsed = time.perf_counter() - start
+            assert [result.content for result in results] == payloads
+            assert all(result.qr_code.is_valid for result in results)
+            print(f'scan workers={count}: {len(paths) / elapsed:,.1f} images/s')
+
+
+def main(count: int = 50, workers: int = os.cpu_count() or 1):
+    payloads = [qr.qr_to_str(qr_code) for qr_code in datasets.vietqr_codes(count) + datasets.vnpay_codes(count)]
+    check_scan(payloads[::5])
+    bench_scan(payloads, workers)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,41 @@
+"""
+Fixed synthetic datasets for the benchmarks, generated from a seed so every run and commit uses the same data.
+"""
+import random
+from typing import List
+from pyvnqrpay import qr
+
+SEED = 20240101
+
+BANK_BINS = ('970415', '970418', '970422', '970423', '970425', '970432', '970436', '970437', '970441', '970448')
+
+PURPOSES = ('thanh toan hoa don', 'chuyen tien', 'invoice', 'tra tien dien', 'hoc phi', '')
+
+
+def vietqr_codes(count: int, seed: int = SEED) -> List[qr.QRCode]:
+    rng = random.Random(seed)
+    return [
+        qr.create_vietqr_data(
+            rng.randrange(1_000, 50_000_000), '',
+            qr.Consumer(bank_bin=rng.choice(BANK_BINS), bank_number=str(rng.randrange(10 ** 7, 10 ** 14))),
+            qr.AdditionalData(purpose=rng.choice(PURPOSES)),
+        )
+        for _ in range(count)
+    ]
+
+
+def vnpay_codes(count: int, seed: int = SEED) -> List[qr.QRCode]:
+    rng = random.Random(seed)
+    return [
+        qr.create_vnpayar_data(
+            rng.randrange(1_000, 50_000_000),
+            qr.Merchant(id=str(rng.randrange(10 ** 9, 10 ** 10)), name=f'MERCHANT {rng.randrange(1000)}'),
+            qr.AdditionalData(purpose=rng.choice(PURPOSES)),
+        )
+        for _ in range(count)
+    ]
+
+
+def crc_payload(length: int, seed: int = SEED) -> bytes:
+    rng = random.Random(seed)
+    return bytes(rng.choice(b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ ') for _ in range(length))
@@ -0,0 +1,82 @@
+"""
+Load test a running ``python -m pyvnqrpay.server`` with keep-alive connections.
+
+Usage:
+    PYTHONPATH=. python benchmarks/load_server.py [--url http://127.0.0.1:8000] [--endpoint encode]
+        [--connections 8] [--requests 2000] [--batch 1]
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from typing import List
+from urllib.parse import urlsplit
+
+ENCODE_REQUEST = {
+    'provider': 'vietqr',
+    'amount': 10000,
+    'consumer': {'bank_bin': '970436', 'bank_number': '0011001234'},
+    'additional_data': {'purpose': 'load test'},
+}
+
+
+def make_body(endpoint: str, batch: int, index: int) -> bytes:
+    requests = []
+    for offset in range(batch):
+        request = dict(ENCODE_REQUEST, amount=10000 + index * batch + offset)
+        if endpoint == 'decode':
+            from pyvnqrpay import server  # pylint: disable=import-outside-toplevel
+            request = server.encode(request)
+        requests.append(request)
+    return json.dumps(requests if batch > 1 else requests[0]).encode()
+
+
+def worker(url, endpoint: str, count: int, batch: int, latencies: List[float], errors: List[int]):
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80)
+    path = f'/{endpoint}?scale=4' if endpoint == 'render' else f'/{endpoint}'
+    for index in range(count):
+        body = make_body(endpoint, batch if endpoint != 'render' else 1, index)
+        started = time.perf_counter()
+        connection.request('POST', path, body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        if response.status != 200:
+            errors.append(response.status)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the pyvnqrpay HTTP service.')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--endpoint', default='encode', choices=('encode', 'decode', 'render'))
+    parser.add_argument('--connections', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000, help='total number of HTTP requests')
+    parser.add_argument('--batch', type=int, default=1, help='number of payloads per encode/decode request')
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    latencies: List[float] = []
+    errors: List[int] = []
+    per_connection = args.requests // args.connections
+    threads = [
+        threading.Thread(target=worker, args=(url, args.endpoint, per_connection, args.batch, latencies, errors))
+        for _ in range(args.connections)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies)
+    print(f'{total} requests in {elapsed:.2f}s: {total / elapsed:,.0f} req/s, errors: {len(errors)}')
+    if total:
+        print(f'latency p50 {latencies[total // 2] * 1000:.2f} ms, p99 {latencies[int(total * 0.99)] * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+"""
+Benchmark suite of the encode, decode, CRC, bank lookup and render hot paths.
+
+Results are written as JSON, named after the current commit, so runs can be compared between commits.
+
+Usage:
+    PYTHONPATH=. python benchmarks/run.py [--quick] [--filter encode] [--output results.json]
+    PYTHONPATH=. python benchmarks/run.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import datasets  # noqa: E402  pylint: disable=wrong-import-position
+from pyvnqrpay import banks, qr, utils  # noqa: E402  pylint: disable=wrong-import-position
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+CRC_LENGTHS = (64, 128, 256, 1024, 4096)
+
+# name -> (setup, unit); setup returns the function to time and the number of items it processes per call
+Benchmark = Callable[[bool], Tuple[Callable[[], object], int]]
+BENCHMARKS: Dict[str, Tuple[Benchmark, str]] = {}
+
+
+def benchmark(name: str, unit: str = 'ops'):
+    def register(setup: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = (setup, unit)
+        return setup
+    return register
+
+
+@benchmark('encode.single.vietqr')
+def encode_single_vietqr(_: bool):
+    qr_code = datasets.vietqr_codes(1)[0]
+    return lambda: qr.qr_to_str(qr_code), 1
+
+
+@benchmark('encode.single.vnpay')
+def encode_single_vnpay(_: bool):
+    qr_code = datasets.vnpay_codes(1)[0]
+    return lambda: qr.qr_to_str(qr_code), 1
+
+
+@benchmark('decode.single.vietqr')
+def decode_single_vietqr(_: bool):
+    content = qr.qr_to_str(datasets.vietqr_codes(1)[0])
+    return lambda: qr.str_to_qr(content), 1
+
+
+@benchmark('decode.single.vnpay')
+def decode_single_vnpay(_: bool):
+    content = qr.qr_to_str(datasets.vnpay_codes(1)[0])
+    return lambda: qr.str_to_qr(content), 1
+
+
+@benchmark('decode.columns.vietqr')
+def decode_columns(quick: bool):
+    from pyvnqrpay.columns import decode_to_columns  # pylint: disable=import-outside-toplevel
+    count = 10_000 if quick else 1_000_000
+    block = [qr.qr_to_str(qr_code) for qr_code in datasets.vietqr_codes(10_000)]
+    payloads = block * (count // len(block))
+    return lambda: decode_to_columns(payloads), count
+
+
+@benchmark('encode.batch.vietqr')
+def encode_batch(quick: bool):
+    count = 10_000 if quick else 1_000_000
+    # the dataset repeats a fixed block, so 1M payloads fit in memory
+    block = datasets.vietqr_codes(10_000)
+    qr_codes = block * (count // len(block))
+    return lambda: sum(1 for _ in qr.qr_to_str_many(qr_codes)), count
+
+
+@benchmark('encode.batch.vietqr.bytes')
+def encode_batch_bytes(quick: bool):
+    count = 10_000 if quick else 1_000_000
+    block = datasets.vietqr_codes(10_000)
+    qr_codes = block * (count // len(block))
+    return lambda: sum(1 for _ in qr.qr_to_bytes_many(qr_codes)), count
+
+
+@benchmark('validate.batch.vietqr')
+def validate_batch(quick: bool):
+    from pyvnqrpay.validate import Validator  # pylint: disable=import-outside-toplevel
+    count = 10_000 if quick else 1_000_000
+    block = datasets.vietqr_codes(10_000)
+    qr_codes = block * (count // len(block))
+    validator = Validator()
+    return lambda: validator.validate_many(qr_codes), count
+
+
+@benchmark('encode.template.vietqr')
+def encode_template(_: bool):
+    template = qr.QRTemplate.from_qrcode(datasets.vietqr_codes(1)[0])
+    return lambda: template.render(amount=123456, bill_number='INV0001'), 1
+
+
+@benchmark('encode.columns.vietqr')
+def encode_columns(quick: bool):
+    import numpy  # pylint: disable=import-outside-toplevel
+    from pyvnqrpay.columns import encode_columns as encode  # pylint: disable=import-outside-toplevel
+    count = 10_000 if quick else 1_000_000
+    template = qr.QRTemplate.from_qrcode(datasets.vietqr_codes(1)[0])
+    amounts = numpy.arange(count, dtype=numpy.int64) * 1000 + 10_000
+    bill_numbers = numpy.char.add('INV', numpy.arange(count).astype(str))
+    return lambda: encode(template, amounts=amounts, bill_numbers=bill_numbers), count
+
+
+def _crc_benchmark(length: int, backend: str) -> Benchmark:
+    def setup(_: bool):
+        data = datasets.crc_payload(length)
+        function = utils.CRC16_BACKENDS[backend]
+        return lambda: function(data), length
+    return setup
+
+
+for _length in CRC_LENGTHS:
+    for _backend in utils.CRC16_BACKENDS:
+        BENCHMARKS[f'crc.{_backend}.{_length}'] = (_crc_benchmark(_length, _backend), 'bytes')
+
+
+@benchmark('crc.verify.batch')
+def crc_verify_batch(quick: bool):
+    count = 10_000 if quick else 100_000
+    block = [qr.qr_to_str(qr_code) for qr_code in datasets.vietqr_codes(10_000)]
+    payloads = block * (count // len(block))
+    return lambda: utils.verify_crc16_batch(payloads), count
+
+
+@benchmark('crc.verify.loop')
+def crc_verify_loop(quick: bool):
+    count = 10_000 if quick else 100_000
+    block = [qr.qr_to_str(qr_code) for qr_code in datasets.vietqr_codes(10_000)]
+    payloads = block * (count // len(block))
+    return lambda: [utils.verify_crc16(payload) for payload in payloads], count
+
+
+@benchmark('bank.lookup.bin')
+def bank_lookup_bin(_: bool):
+    registry = banks.get_registry()
+    return lambda: registry.get_by_bin('970436'), 1
+
+
+@benchmark('bank.lookup.search')
+def bank_lookup_search(_: bool):
+    registry = banks.get_registry()
+    return lambda: registry.search('viet'), 1
+
+
+def _render_benchmark(kind: str) -> Benchmark:
+    def setup(_: bool):
+        from pyvnqrpay.render import render_bytes  # pylint: disable=import-outside-toplevel
+        content = qr.qr_to_str(datasets.vietqr_codes(1)[0])
+        return lambda: render_bytes(content, kind=kind, scale=4), 1
+    return setup
+
+
+BENCHMARKS['render.png'] = (_render_benchmark('png'), 'ops')
+BENCHMARKS['render.svg'] = (_render_benchmark('svg'), 'ops')
+
+
+def _matrix_benchmark(kind: str) -> Benchmark:
+    def setup(_: bool):
+        from pyvnqrpay import matrix  # pylint: disable=import-outside-toplevel
+        content = qr.qr_to_str(datasets.vietqr_codes(1)[0])
+        return lambda: matrix.render_bytes(content, kind=kind, scale=4), 1
+    return setup
+
+
+BENCHMARKS['render.png.matrix'] = (_matrix_benchmark('png'), 'ops')
+BENCHMARKS['render.svg.matrix'] = (_matrix_benchmark('svg'), 'ops')
+
+
+@benchmark('scan.png')
+def scan_png(_: bool):
+    from pyvnqrpay import matrix, scan  # pylint: disable=import-outside-toplevel
+    image = matrix.render_bytes(qr.qr_to_str(datasets.vietqr_codes(1)[0]), kind='png', scale=4)
+    return lambda: scan.decode_image(image), 1
+
+
+def measure(function: Callable[[], object], min_time: float, repeat: int) -> Tuple[int, List[float]]:
+    """
+    Time a function: calibrate a number of calls lasting at least ``min_time``, then time ``repeat`` rounds.
+    """
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - started >= min_time / 10 or number >= 1 << 20:
+            break
+        number *= 10
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - started) / number)
+    return number, timings
+
+
+def run(names: List[str], quick: bool) -> Dict[str, Dict[str, object]]:
+    results = {}
+    for name in names:
+        setup, unit = BENCHMARKS[name]
+        try:
+            function, items = setup(quick)
+        except ImportError as exc:
+            print(f'{name}: skipped, {exc}')
+            continue
+        number, timings = measure(function, min_time=0.2 if quick else 1.0, repeat=3 if quick else 5)
+        best = min(timings)
+        results[name] = {
+            'unit': unit,
+            'items_per_call': items,
+            'calls': number,
+            'seconds_per_call': timings,
+            'best_seconds_per_call': best,
+            'throughput': items / best,
+        }
+        rate = items / best / 1024 / 1024 if unit == 'bytes' else items / best
+        print(f'{name}: {best * 1e6:,.2f} us/call, {rate:,.2f} {"MB" if unit == "bytes" else unit}/s')
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path, encoding='utf-8') as before_file, open(after_path, encoding='utf-8') as after_file:
+        before, after = json.load(before_file)['results'], json.load(after_file)['results']
+    for name in sorted(before.keys() & after.keys()):
+        ratio = before[name]['best_seconds_per_call'] / after[name]['best_seconds_per_call']
+        print(f'{name}: {ratio:.2f}x {"faster" if ratio >= 1 else "slower"}')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Run the pyvnqrpay benchmarks.')
+    parser.add_argument('--quick', action='store_true', help='smaller datasets and shorter timings')
+    parser.add_argument('--filter', default='', help='only run the benchmarks whose name contains this text')
+    parser.add_argument('--output', help=f'JSON results path, defaults to {RESULTS_DIR}/<commit>.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two JSON results')
+    args = parser.parse_args(argv)
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    revision = git_revision()
+    results = run([name for name in BENCHMARKS if args.filter in name], args.quick)
+    output = args.output or os.path.join(RESULTS_DIR, f'{revision}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as output_file:
+        json.dump({
+            'revision': revision,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'crc16_backend': utils.CRC16_BACKEND,
+            'quick': args.quick,
+            'results': results,
+        }, output_file, indent=2)
+    print(f'Results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Asyncio friendly QR code generation
+"""
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from pyvnqrpay.data_class import QRCode
+from pyvnqrpay.qr import PayloadEncoder
+from pyvnqrpay.render import RenderOptions, render_bytes
+
+
+class GeneratedQRCode(NamedTuple):
+    """
+    A generated QR code string and its image, if rendered.
+    """
+    content: str
+    image: Optional[bytes] = None
+
+
+class _InFlight:
+    """
+    A render running in the executor and the number of callers waiting for it.
+    """
+
+    def __init__(self, task: 'asyncio.Future[bytes]'):
+        self.task = task
+        self.waiters = 0
+
+
+class _LoopState:
+    """
+    The renders of a service running in an event loop, as tasks and semaphores are bound to the loop they run in.
+    """
+
+    def __init__(self, max_pending: int):
+        self.semaphore = asyncio.Semaphore(max_pending)
+        self.in_flight: Dict[Tuple[str, RenderOptions], _InFlight] = {}
+
+
+class QRService:
+    """
+    Generate QR code strings and images without blocking the event loop.
+
+    Encoding the QR code string takes microseconds and runs inline, rendering the image runs in an executor. At most
+    ``max_pending`` renders per event loop are submitted at once, further callers wait for a slot. Concurrent
+    requests of an event loop for the same QR code string and options share a single render, and a render is
+    cancelled once all its callers are. A service may be shared by several event loops, e.g. across threads or
+    ``asyncio.run`` calls.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_workers: Optional[int] = None, max_pending: int = 64):
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._loops: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]' = weakref.WeakKeyDictionary()
+        self._loops_lock = threading.Lock()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._executor
+
+    async def generate(self, qr_code: Union[QRCode, str], render: Optional[RenderOptions] = None) -> GeneratedQRCode:
+        """
+        Generate the QR code string of a QRCode object, and its image when ``render`` is given.
+
+        Args:
+            qr_code (Union[QRCode, str]): The QRCode object, or an already encoded QR code string.
+            render (Optional[RenderOptions]): The render options, no image is rendered when None.
+
+        Returns:
+            GeneratedQRCode: The QR code string and the image content.
+        """
+        content = qr_code if isinstance(qr_code, str) else PayloadEncoder().encode(qr_code)
+        if render is None:
+            return GeneratedQRCode(content)
+        return GeneratedQRCode(content, await self._render(content, render))
+
+    async def generate_many(self, qr_codes: Iterable[Union[QRCode, str]],
+                            render: Optional[RenderOptions] = None) -> List[GeneratedQRCode]:
+        """
+        Generate many QR codes concurrently, see ``generate``. The results are in the input order.
+        """
+        encoder = PayloadEncoder()
+        contents = [qr_code if isinstance(qr_code, str) else encoder.encode(qr_code) for qr_code in qr_codes]
+        if render is None:
+            return [GeneratedQRCode(content) for content in contents]
+        images = await asyncio.gather(*(self._render(content, render) for content in contents))
+        return [GeneratedQRCode(content, image) for content, image in zip(contents, images)]
+
+    def _loop_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        with self._loops_lock:
+            state = self._loops.get(loop)
+            if state is None:
+                state = self._loops[loop] = _LoopState(self._max_pending)
+        return state
+
+    async def _render(self, content: str, options: RenderOptions) -> bytes:
+        state = self._loop_state()
+        key = (content, options)
+        in_flight = state.in_flight.get(key)
+        if in_flight is None:
+            in_flight = state.in_flight[key] = _InFlight(asyncio.ensure_future(self._run(state, content, options)))
+            in_flight.task.add_done_callback(functools.partial(self._forget, state, key, in_flight))
+        in_flight.waiters += 1
+        try:
+            # shielded, so that a cancelled caller does not cancel the render of the others
+            return await asyncio.shield(in_flight.task)
+        finally:
+            in_flight.waiters -= 1
+            if in_flight.waiters == 0 and not in_flight.task.done():
+                # forgotten first, so that a caller arriving before the task is done starts a new render
+                self._forget(state, key, in_flight)
+                in_flight.task.cancel()
+
+    @staticmethod
+    def _forget(state: _LoopState, key: Tuple[str, RenderOptions], in_flight: _InFlight, *_: asyncio.Future) -> None:
+        if state.in_flight.get(key) is in_flight:
+            del state.in_flight[key]
+
+    async def _run(self, state: _LoopState, content: str, options: RenderOptions) -> bytes:
+        loop = asyncio.get_running_loop()
+        async with state.semaphore:
+            return await loop.run_in_executor(self.executor, functools.partial(
+                render_bytes, content, kind=options.kind, scale=options.scale, border=options.border,
+                dark=options.dark, light=options.light,
+            ))
+
+    def close(self) -> None:
+        """
+        Shut the executor down, if the service created it.
+        """
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+_service: Optional[QRService] = None
+
+
+def get_service() -> QRService:
+    """
+    Get the service used by the module level ``generate`` and ``generate_many``, created on first use.
+    """
+    global _service  # pylint: disable=global-statement
+    if _service is None:
+        _service = QRService()
+    return _service
+
+
+async def generate(qr_code: Union[QRCode, str], render: Optional[RenderOptions] = None) -> GeneratedQRCode:
+    """
+    Generate a QR code with the default service, see ``QRService.generate``.
+    """
+    return await get_service().generate(qr_code, render)
+
+
+async def generate_many(qr_codes: Iterable[Union[QRCode, str]],
+                        render: Optional[RenderOptions] = None) -> List[GeneratedQRCode]:
+    """
+    Generate many QR codes with the default service, see ``QRService.generate_many``.
+    """
+    return await get_service().generate_many(qr_codes, render)
@@ -1,6 +1,10 @@
+import unicodedata
+from bisect import bisect_left
 from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 from .providers import VietQRStatus
 
 
@@ -15,7 +19,7 @@ class Bank:
     number: Optional[str] = None
 
 
-class BankCode(Enum, str):
+class BankCode(str, Enum):
     ABBank = 'ABB'
     ACB = 'ACB'
     Agribank = 'AGRIBANK'
@@ -573,4 +577,103 @@ def get_banks() -> Dict[str, Bank]:
     }
 
 
-BANK_MAP = get_banks()
+@lru_cache(maxsize=None)
+def get_bank_map() -> Dict[str, Bank]:
+    """
+    Get the banks from ``get_banks()``, built on first access and shared afterwards.
+    """
+    return get_banks()
+
+
+def __getattr__(name: str):
+    # BANK_MAP is built lazily so that importing this module stays cheap
+    if name == 'BANK_MAP':
+        return get_bank_map()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def fold_accents(text: str) -> str:
+    """
+    Lowercase a text and strip its Vietnamese diacritics, so that 'Ngân hàng Đông Á' matches 'ngan hang dong a'.
+    """
+    text = unicodedata.normalize('NFD', text.replace('Đ', 'D').replace('đ', 'd'))
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+class BankRegistry:
+    """
+    Read-only indexes over banks, built once, for dict lookups by code, BIN, SWIFT code, short name and name.
+
+    Short names and names are looked up accent-folded and case-insensitively.
+    """
+
+    def __init__(self, banks: Iterable[Bank]):
+        banks = tuple(banks)
+        self.by_code: Mapping[str, Bank] = MappingProxyType({bank.code: bank for bank in banks})
+        self.by_bin: Mapping[str, Bank] = MappingProxyType({bank.bin: bank for bank in banks if bank.bin})
+        self.by_swift: Mapping[str, Bank] = MappingProxyType(
+            {bank.swift.upper(): bank for bank in banks if bank.swift})
+        self.by_short_name: Mapping[str, Bank] = MappingProxyType(
+            {fold_accents(bank.short_name): bank for bank in banks if bank.short_name})
+        self.by_name: Mapping[str, Bank] = MappingProxyType({fold_accents(bank.name): bank for bank in banks})
+        # sorted (folded key, bank) pairs of short names and names for prefix search
+        entries = sorted({**self.by_name, **self.by_short_name}.items(), key=lambda entry: entry[0])
+        self._search_keys: Tuple[str, ...] = tuple(key for key, _ in entries)
+        self._search_banks: Tuple[Bank, ...] = tuple(bank for _, bank in entries)
+
+    def __len__(self) -> int:
+        return len(self.by_code)
+
+    def get_by_bin(self, bin_: str) -> Optional[Bank]:
+        """
+        Get a bank by its BIN, e.g. '970425'.
+        """
+        return self.by_bin.get(bin_)
+
+    def get_by_swift(self, swift: str) -> Optional[Bank]:
+        """
+        Get a bank by its SWIFT code, case-insensitively.
+        """
+        return self.by_swift.get(swift.upper())
+
+    def get_by_short_name(self, short_name: str) -> Optional[Bank]:
+        """
+        Get a bank by its short name, e.g. 'vietcombank'.
+        """
+        return self.by_short_name.get(fold_accents(short_name))
+
+    def get_by_name(self, name: str) -> Optional[Bank]:
+        """
+        Get a bank by its full name, with or without diacritics.
+        """
+        return self.by_name.get(fold_accents(name))
+
+    def search(self, prefix: str, limit: int = 10) -> List[Bank]:
+        """
+        Find the banks whose short name or name starts with the given prefix, for autocomplete.
+
+        Args:
+            prefix (str): The typed prefix, with or without diacritics.
+            limit (int): The maximum number of banks to return.
+
+        Returns:
+            List[Bank]: The matching banks, ordered by their matching key.
+        """
+        prefix = fold_accents(prefix)
+        result: List[Bank] = []
+        index = bisect_left(self._search_keys, prefix)
+        while index < len(self._search_keys) and len(result) < limit \
+                and self._search_keys[index].startswith(prefix):
+            bank = self._search_banks[index]
+            if bank not in result:
+                result.append(bank)
+            index += 1
+        return result
+
+
+@lru_cache(maxsize=None)
+def get_registry() -> BankRegistry:
+    """
+    Get the registry of the banks from ``get_banks()``, built on first use.
+    """
+    return BankRegistry(get_bank_map().values())
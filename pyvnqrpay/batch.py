@@ -0,0 +1,329 @@
+"""
+Convert CSV or Parquet tables of merchants and invoices into QR code payloads
+
+Each row is mapped onto a VietQR (consumer bank account) or VNPay (merchant) QR code by its column names, and the
+payloads are written one per line, optionally along with their images. Rows are read and encoded by chunks across
+a pool of processes, so memory stays bounded by the chunks in flight.
+
+Rows failing ``validate.Validator``, e.g. without a bank BIN or merchant ID, or with an unknown provider, are
+rejected: their line of the output is left empty, so line numbers still match row numbers, and the row number and
+failing fields are written to the errors file.
+
+Usage:
+    python -m pyvnqrpay.batch invoices.csv payloads.txt --images images/ --errors rejected.tsv
+    python -m pyvnqrpay.batch invoices.parquet payloads.txt --start-row 200000
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import IO, Any, Callable, Deque, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+from pyvnqrpay.data_class import AdditionalData, Consumer, Merchant, QRCode
+from pyvnqrpay.qr import PayloadEncoder, create_vietqr_data, create_vnpayar_data
+from pyvnqrpay.render import RENDER_KINDS, render_bytes
+from pyvnqrpay.validate import Validator, format_errors
+
+PROVIDERS = ('vietqr', 'vnpay')
+
+ADDITIONAL_DATA_COLUMNS = (
+    'store', 'terminal', 'bill_number', 'mobile_number', 'loyalty_number', 'reference', 'customer_label', 'purpose',
+    'data_request',
+)
+
+# the fields read from a row, by default from the column of the same name
+COLUMNS = (
+    'provider', 'amount', 'service', 'bank_bin', 'bank_number', 'merchant_id', 'merchant_name',
+    *ADDITIONAL_DATA_COLUMNS,
+)
+
+Row = Dict[str, Any]
+
+# (row number, reason) of a rejected row
+Rejection = Tuple[int, str]
+
+
+class ConvertSummary(NamedTuple):
+    """
+    The outcome of ``convert``.
+
+    Attributes:
+        rows (int): The number of rows read, not counting the skipped ones, so the output has as many lines.
+        rejected (int): The number of those rows rejected, with an empty line.
+    """
+    rows: int
+    rejected: int
+
+
+def _value(row: Mapping[str, Any], columns: Mapping[str, str], field: str) -> str:
+    value = row.get(columns.get(field, field))
+    return '' if value is None else str(value)
+
+
+def row_to_qr(row: Mapping[str, Any], columns: Optional[Mapping[str, str]] = None, provider: str = 'vietqr') -> QRCode:
+    """
+    Map a row onto a QRCode object.
+
+    Args:
+        row (Mapping[str, Any]): The row, keyed by column name. Missing and None values are empty.
+        columns (Optional[Mapping[str, str]]): The column of each field of ``COLUMNS`` named differently.
+        provider (str): The provider of rows without a ``provider`` value, 'vietqr' or 'vnpay'.
+
+    Returns:
+        QRCode: A VietQR code to the ``bank_bin``/``bank_number`` account, or a VNPay code of the ``merchant_id``
+        merchant.
+
+    Raises:
+        ValueError: If the provider of the row is unknown.
+    """
+    columns = columns or {}
+    provider = _value(row, columns, 'provider').lower() or provider
+    additional_data = AdditionalData(**{field: _value(row, columns, field) for field in ADDITIONAL_DATA_COLUMNS})
+    amount = _value(row, columns, 'amount')
+    merchant_name = _value(row, columns, 'merchant_name')
+    if provider == 'vietqr':
+        consumer = Consumer(bank_bin=_value(row, columns, 'bank_bin'), bank_number=_value(row, columns, 'bank_number'))
+        qr_code = create_vietqr_data(amount, _value(row, columns, 'service'), consumer, additional_data)
+        if merchant_name:
+            qr_code.merchant = Merchant(id='', name=merchant_name)
+    elif provider == 'vnpay':
+        merchant = Merchant(id=_value(row, columns, 'merchant_id'), name=merchant_name)
+        qr_code = create_vnpayar_data(amount, merchant, additional_data)
+    else:
+        raise ValueError(f'Invalid provider {provider!r}, expected one of {PROVIDERS}')
+    # create_*_data only keep the purpose
+    qr_code.additional_data = additional_data
+    return qr_code
+
+
+def read_rows(path: str, start_row: int = 0, chunk_size: int = 1000) -> Iterator[List[Row]]:
+    """
+    Read the rows of a CSV or Parquet file by chunks.
+
+    Args:
+        path (str): The path of the file, read as Parquet when it ends with ``.parquet``, as CSV with a header
+            otherwise.
+        start_row (int): The number of rows to skip. Parquet row groups before it are not read at all.
+        chunk_size (int): The maximum number of rows of a chunk.
+
+    Yields:
+        List[Row]: The rows of each chunk, keyed by column name.
+
+    Raises:
+        ImportError: If the file is Parquet and pyarrow is not installed.
+    """
+    if path.endswith('.parquet'):
+        yield from _read_parquet(path, start_row, chunk_size)
+        return
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        rows = islice(csv.DictReader(file), start_row, None)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def _read_parquet(path: str, start_row: int, chunk_size: int) -> Iterator[List[Row]]:
+    try:
+        import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:  # pragma: no cover
+        raise ImportError('Reading Parquet requires pyarrow, install it with `pip install pyarrow`') from exc
+
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    row_groups = []
+    for index in range(parquet_file.num_row_groups):
+        num_rows = parquet_file.metadata.row_group(index).num_rows
+        if start_row >= num_rows and not row_groups:
+            start_row -= num_rows
+        else:
+            row_groups.append(index)
+    if not row_groups:
+        return
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, row_groups=row_groups):
+        if start_row >= batch.num_rows:
+            start_row -= batch.num_rows
+            continue
+        if start_row:
+            batch, start_row = batch.slice(start_row), 0
+        yield batch.to_pylist()
+
+
+def _convert_chunk(start: int, rows: List[Row], columns: Mapping[str, str], provider: str, image_dir: Optional[str],
+                   kind: str, scale: int) -> Tuple[List[str], List[Rejection]]:
+    """
+    Encode a chunk of rows, and render their images into ``image_dir`` named by row number. Runs in a worker process.
+
+    Returns the payloads, empty for the rejected rows, and the rejected rows.
+    """
+    encoder = PayloadEncoder()
+    validator = Validator(encoder)
+    payloads: List[str] = []
+    rejections: List[Rejection] = []
+    for index, row in enumerate(rows, start=start):
+        try:
+            qr_code = row_to_qr(row, columns, provider)
+        except ValueError as exc:
+            rejections.append((index, str(exc)))
+            payloads.append('')
+            continue
+        errors = validator.validate(qr_code)
+        if errors:
+            rejections.append((index, f'Invalid fields: {format_errors(errors)}'))
+            payloads.append('')
+            continue
+        content = encoder.encode(qr_code)
+        if image_dir is not None:
+            with open(os.path.join(image_dir, f'{index:06d}.{kind}'), 'wb') as image:
+                image.write(render_bytes(content.encode(), kind=kind, scale=scale))
+        payloads.append(content)
+    return payloads, rejections
+
+
+def convert(source: str, output: IO[str], columns: Optional[Mapping[str, str]] = None, provider: str = 'vietqr',
+            image_dir: Optional[str] = None, kind: str = 'png', scale: int = 10, workers: Optional[int] = None,
+            start_row: int = 0, chunk_size: int = 1000, on_progress: Optional[Callable[[int, float], None]] = None,
+            errors: Optional[IO[str]] = None) -> ConvertSummary:
+    """
+    Convert the rows of a CSV or Parquet file into QR code payloads, written one per line in the row order.
+
+    Chunks are encoded across a pool of processes, with a bounded number of chunks in flight, and the output is
+    flushed after each chunk. Rejected rows get an empty line, so the number of lines written so far is always the
+    row to resume from with ``start_row``.
+
+    Args:
+        source (str): The path of the CSV or Parquet file.
+        output (IO[str]): The text file to write the payloads to.
+        columns (Optional[Mapping[str, str]]): The column of each field of ``COLUMNS`` named differently.
+        provider (str): The provider of rows without a ``provider`` value, 'vietqr' or 'vnpay'.
+        image_dir (Optional[str]): The directory to also render the images to, named by row number, e.g.
+            ``000042.png``.
+        kind (str): The image format, 'png' or 'svg'.
+        scale (int): The size of a module in pixels.
+        workers (Optional[int]): The number of worker processes, defaults to the number of CPUs. Use 0 to encode in
+            the current process.
+        start_row (int): The number of rows to skip, e.g. the rows converted by an interrupted run.
+        chunk_size (int): The number of rows sent to a worker at once.
+        on_progress (Optional[Callable[[int, float], None]]): Called after each chunk with the number of rows
+            read and the elapsed seconds.
+        errors (Optional[IO[str]]): The text file to write the rejected rows to, as ``row number<TAB>reason``
+            lines, with the row number counted from 0 and not counting the header of a CSV file.
+
+    Returns:
+        ConvertSummary: The number of rows read and rejected, not counting the skipped ones.
+    """
+    if provider not in PROVIDERS:
+        raise ValueError(f'Invalid provider {provider!r}, expected one of {PROVIDERS}')
+    if kind not in RENDER_KINDS:
+        raise ValueError(f'Invalid image kind {kind!r}, expected one of {RENDER_KINDS}')
+    if image_dir is not None:
+        os.makedirs(image_dir, exist_ok=True)
+    columns = dict(columns or {})
+    started = time.perf_counter()
+    done = rejected = 0
+
+    def write(result: Tuple[List[str], List[Rejection]]) -> None:
+        nonlocal done, rejected
+        payloads, rejections = result
+        output.write(''.join(f'{payload}\n' for payload in payloads))
+        output.flush()
+        if errors is not None and rejections:
+            errors.write(''.join(f'{row}\t{reason}\n' for row, reason in rejections))
+            errors.flush()
+        done += len(payloads)
+        rejected += len(rejections)
+        if on_progress is not None:
+            on_progress(done, time.perf_counter() - started)
+
+    chunks = _numbered(read_rows(source, start_row, chunk_size), start_row)
+    if workers == 0:
+        for start, rows in chunks:
+            write(_convert_chunk(start, rows, columns, provider, image_dir, kind, scale))
+        return ConvertSummary(done, rejected)
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future] = deque()
+        # keep every worker busy without reading the whole table ahead
+        max_pending = 2 * workers
+        for start, rows in chunks:
+            pending.append(executor.submit(_convert_chunk, start, rows, columns, provider, image_dir, kind, scale))
+            if len(pending) >= max_pending:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    return ConvertSummary(done, rejected)
+
+
+def _numbered(chunks: Iterator[List[Row]], start: int) -> Iterator[Tuple[int, List[Row]]]:
+    for rows in chunks:
+        yield start, rows
+        start += len(rows)
+
+
+def _column(value: str) -> Tuple[str, str]:
+    field, separator, column = value.partition('=')
+    if not separator or field not in COLUMNS:
+        raise argparse.ArgumentTypeError(f'expected FIELD=COLUMN with FIELD one of {", ".join(COLUMNS)}')
+    return field, column
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m pyvnqrpay.batch', description=__doc__.splitlines()[1])
+    parser.add_argument('source', help='CSV file with a header row, or Parquet file (requires pyarrow)')
+    parser.add_argument('output', help='file to write the payloads to, one per line, or - for stdout')
+    parser.add_argument('--column', action='append', type=_column, default=[], metavar='FIELD=COLUMN',
+                        help='read a field from a differently named column, can be repeated')
+    parser.add_argument('--provider', choices=PROVIDERS, default='vietqr',
+                        help='provider of the rows without a provider column value')
+    parser.add_argument('--images', metavar='DIR', help='also render the images into DIR, named by row number')
+    parser.add_argument('--kind', choices=RENDER_KINDS, default='png')
+    parser.add_argument('--scale', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes, defaults to the number of CPUs, 0 to run inline')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--start-row', type=int, default=0,
+                        help='skip this many rows and append to the output, e.g. the line count of an interrupted run')
+    parser.add_argument('--errors', metavar='FILE',
+                        help='write the rejected rows to FILE, as row number and reason separated by a tab')
+    parser.add_argument('--quiet', action='store_true', help='do not report the progress')
+    args = parser.parse_args(argv)
+
+    converted = 0
+
+    def report(done: int, elapsed: float) -> None:
+        nonlocal converted
+        converted = done
+        if not args.quiet:
+            print(f'\r{args.start_row + done:,} rows, {done / elapsed:,.0f} rows/s', end='', file=sys.stderr)
+
+    mode = 'a' if args.start_row else 'w'
+    # pylint: disable-next=consider-using-with
+    output = sys.stdout if args.output == '-' else open(args.output, mode, encoding='utf-8')
+    # pylint: disable-next=consider-using-with
+    errors = open(args.errors, mode, encoding='utf-8') if args.errors else None
+    started = time.perf_counter()
+    try:
+        summary = convert(args.source, output, dict(args.column), args.provider, args.images, args.kind, args.scale,
+                          args.workers, args.start_row, args.chunk_size, on_progress=report, errors=errors)
+    except KeyboardInterrupt:
+        print(f'\nInterrupted, resume with --start-row {args.start_row + converted}', file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if errors is not None:
+            errors.close()
+    elapsed = time.perf_counter() - started
+    if not args.quiet:
+        print(file=sys.stderr)
+    rate = summary.rows / elapsed if elapsed else 0
+    print(f'Converted {summary.rows:,} rows in {elapsed:.1f}s, {rate:,.0f} rows/s, {summary.rejected:,} rejected',
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Cache of rendered QR code images
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+from pyvnqrpay.render import render_bytes
+
+# (content, kind, scale, border, dark, light)
+RenderKey = Tuple[str, str, int, Optional[int], str, str]
+
+
+class RenderCache:
+    """
+    A size-bounded LRU cache of rendered images, keyed by the QR code string and the render options.
+
+    With ``disk_dir``, images are also stored in a content-addressed directory, so they survive restarts and are
+    shared between processes. Lookups go memory, then disk, then render.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk_dir: Union[str, os.PathLike, None] = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = os.fspath(disk_dir) if disk_dir is not None else None
+        if self.disk_dir is not None:
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[RenderKey, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, content: str, kind: str = 'png', scale: int = 10, border: Optional[int] = None,
+            dark: str = '#000', light: str = '#fff') -> bytes:
+        """
+        Get the image of a QR code string, rendering it on a miss. The arguments are the ones of ``render_bytes``.
+        """
+        key = (content, kind, scale, border, dark, light)
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        image = self._read_disk(key)
+        if image is None:
+            image = render_bytes(content, kind=kind, scale=scale, border=border, dark=dark, light=light)
+            self._write_disk(key, image)
+        else:
+            with self._lock:
+                self.disk_hits += 1
+        self._put(key, image)
+        return image
+
+    def _put(self, key: RenderKey, image: bytes) -> None:
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = image
+            self.size += len(image)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def path(self, key: RenderKey) -> Optional[str]:
+        """
+        Get the content-addressed path of an image in the disk tier, if any.
+        """
+        if self.disk_dir is None:
+            return None
+        digest = hashlib.sha256('\0'.join(map(str, key)).encode()).hexdigest()
+        return os.path.join(self.disk_dir, digest[:2], f'{digest}.{key[1]}')
+
+    def _read_disk(self, key: RenderKey) -> Optional[bytes]:
+        path = self.path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as image:
+                return image.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: RenderKey, image: bytes) -> None:
+        path = self.path(key)
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename, so that concurrent readers never see a partial image
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as temp:
+            temp.write(image)
+        os.replace(temp_path, path)
+
+    def clear(self) -> None:
+        """
+        Empty the memory tier and reset the counters. The disk tier is kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the counters of the cache.
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
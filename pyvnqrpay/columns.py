@@ -0,0 +1,449 @@
+"""
+Decode many QR code strings into columns, for analytics, and encode columns into QR code strings
+
+Rather than a QRCode object per payload, the fields of a whole chunk of payloads are located at once: the payloads
+are packed into a padded character matrix, every TLV header of the chunk is read by NumPy at each step, and the
+value offsets are written into one start and end array per field of the layouts. Values are then gathered column by
+column: strings into NumPy string arrays, the amount into int64, and fields with few distinct values like the bank
+BIN into dictionary codes. ``encode_columns`` goes the other way, rendering a ``QRTemplate`` over columns of
+amounts, bill numbers and purposes. Requires NumPy, and pyarrow for ``decode_to_table``.
+"""
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy
+from pyvnqrpay import providers
+from pyvnqrpay.qr import CRC_HEADER, DECODE_FIELDS, PROVIDER_FIELD_IDS, PROVIDER_LAYOUTS, VIETQR_PROVIDER_LAYOUT, \
+    VNPAY_PROVIDER_LAYOUT, QRTemplate, qrcode_layout
+from pyvnqrpay.schema import CONST, FIELD, OPEN, FieldSpec
+from pyvnqrpay.utils import crc16_rows, verify_crc16_batch
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pyarrow
+
+CHUNK_SIZE = 1 << 16
+
+# the largest power of ten whose multiples up to 9 still add up within int64
+MAX_AMOUNT_EXPONENT = 17
+
+ZERO = ord('0')
+
+HEX_DIGITS = numpy.frombuffer(b'0123456789ABCDEF', dtype=numpy.uint8)
+
+# the two digit length headers, by length
+LENGTH_HEADERS = numpy.array([f'{length:02}' for length in range(100)])
+
+
+def _leaf_sources(specs: Sequence[FieldSpec]) -> List[str]:
+    sources: List[str] = []
+    for spec in specs:
+        if spec.children:
+            sources.extend(_leaf_sources(spec.children))
+        elif spec.source is not None:
+            sources.append(spec.source)
+    return sources
+
+
+# the string columns, in the order of the fields of the layouts
+STRING_COLUMNS = tuple(dict.fromkeys([
+    'provider.field_id',
+    *_leaf_sources(qrcode_layout(VIETQR_PROVIDER_LAYOUT)),
+    *_leaf_sources(qrcode_layout(VNPAY_PROVIDER_LAYOUT)),
+    'crc',
+]))
+
+# the columns with few distinct values, stored as int32 codes into a dictionary, -1 when the field is missing
+DICTIONARY_COLUMNS = (
+    'version', 'init_method', 'provider.field_id', 'provider.guid', 'provider.service', 'consumer.bank_bin', 'category',
+    'currency', 'nation',
+)
+
+# (rows, value starts, value ends) of the fields of a tag
+FieldRanges = Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+
+
+def _char_matrix(payloads: Sequence[str]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Pack payloads into a zero padded matrix with a character per cell: bytes when they are all ASCII, UTF-32 code
+    points otherwise, as field lengths count characters.
+    """
+    try:
+        array, dtype = numpy.array(payloads, dtype='S'), numpy.uint8
+    except UnicodeEncodeError:
+        array, dtype = numpy.array(payloads, dtype='U'), numpy.uint32
+    if array.dtype.itemsize == 0:
+        array = array.astype(f'{array.dtype.kind}1')
+    lengths = numpy.char.str_len(array).astype(numpy.int64)
+    return array.view(dtype).reshape(len(payloads), -1), lengths
+
+
+def _parse_fields(chars: numpy.ndarray, rows: numpy.ndarray, start: numpy.ndarray, end: numpy.ndarray,
+                  malformed: numpy.ndarray) -> Dict[str, FieldRanges]:
+    """
+    Walk the fields of ``chars[rows, start:end]`` of every row at once, one field of each row per step.
+
+    Rows with a truncated header, a non numeric length or a value overflowing ``end`` are flagged in ``malformed``.
+    When a tag repeats, its last field wins, like ``qr.index_field_data``.
+    """
+    width = chars.shape[1]
+    header = numpy.arange(4)
+    found: List[Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]] = []
+    position = start.copy()
+    active = numpy.flatnonzero(position < end)
+    while active.size:
+        row, offset, limit = rows[active], position[active], end[active]
+        digits = chars[row[:, None], numpy.minimum(offset[:, None] + header, width - 1)].astype(numpy.int64) - ZERO
+        numeric = (digits >= 0) & (digits <= 9)
+        value_end = offset + 4 + digits[:, 2] * 10 + digits[:, 3]
+        valid = (offset + 4 <= limit) & numeric[:, 2] & numeric[:, 3] & (value_end <= limit)
+        malformed[row[~valid]] = True
+        tag = numpy.where(numeric[:, 0] & numeric[:, 1], digits[:, 0] * 10 + digits[:, 1], -1)
+        found.append((tag[valid], row[valid], offset[valid] + 4, value_end[valid]))
+        active, value_end = active[valid], value_end[valid]
+        position[active] = value_end
+        active = active[value_end < end[active]]
+    if not found:
+        return {}
+    tags, field_rows, starts, ends = (numpy.concatenate(parts) for parts in zip(*found))
+    fields = {}
+    for tag in numpy.unique(tags[tags >= 0]).tolist():
+        selected = tags == tag
+        fields[f'{tag:02d}'] = field_rows[selected], starts[selected], ends[selected]
+    return fields
+
+
+def _collect(chars: numpy.ndarray, children: Mapping[str, FieldSpec], fields: Dict[str, FieldRanges],
+             ranges: Dict[str, Tuple[numpy.ndarray, numpy.ndarray]], malformed: numpy.ndarray) -> None:
+    """
+    Record the value offsets of the fields of a template by source, and of their children in nested templates.
+    """
+    for tag, (rows, starts, ends) in fields.items():
+        spec = children.get(tag)
+        if spec is None:
+            continue
+        if spec.children:
+            nested = _parse_fields(chars, rows, starts, ends, malformed)
+            _collect(chars, spec.children_by_tag, nested, ranges, malformed)
+        elif spec.source is not None:
+            column_start, column_end = ranges[spec.source]
+            column_start[rows] = starts
+            column_end[rows] = ends
+
+
+def _strings(chars: numpy.ndarray, start: numpy.ndarray, end: numpy.ndarray) -> numpy.ndarray:
+    """
+    Gather the values of a column into a NumPy string array, empty where the field is missing.
+    """
+    widths = end - start
+    size = max(int(widths.max(initial=0)), 1)
+    positions = numpy.arange(size)
+    cells = chars[numpy.arange(len(start))[:, None], numpy.minimum(start[:, None] + positions, chars.shape[1] - 1)]
+    cells[positions >= widths[:, None]] = 0
+    # widening ASCII bytes to UTF-32 code points is a numeric cast, much faster than decoding each string
+    return numpy.ascontiguousarray(cells, dtype=numpy.uint32).view(f'U{size}').ravel()
+
+
+def parse_amounts(values: numpy.ndarray, scale: int = 0) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Parse decimal amounts into integers of ``10 ** -scale`` units, all at once.
+
+    Args:
+        values (numpy.ndarray): The amounts, as a NumPy string array.
+        scale (int): The number of fraction digits kept, e.g. 2 to count cents.
+
+    Returns:
+        Tuple[numpy.ndarray, numpy.ndarray]: The int64 amounts, and a mask of the missing or unparsable ones, e.g.
+        with more nonzero fraction digits than ``scale``.
+    """
+    size = max(values.dtype.itemsize // 4, 1)
+    chars = numpy.ascontiguousarray(values.astype(f'U{size}')).view(numpy.uint32).reshape(len(values), size)
+    chars = chars.astype(numpy.int64)
+    widths = numpy.char.str_len(values)
+    positions = numpy.arange(size)
+    inside = positions < widths[:, None]
+    is_dot = (chars == ord('.')) & inside
+    is_digit = (chars >= ZERO) & (chars <= ZERO + 9) & inside
+    dot = numpy.where(is_dot.any(axis=1), is_dot.argmax(axis=1), widths)[:, None]
+    exponent = numpy.where(positions < dot, dot - 1 - positions, dot - positions) + scale
+    digits = numpy.where(is_digit, chars - ZERO, 0)
+    valid = (widths > 0) & (is_dot.sum(axis=1) <= 1) & ((is_digit | is_dot) == inside).all(axis=1) & \
+        is_digit.any(axis=1) & ~((digits > 0) & ((exponent < 0) | (exponent > MAX_AMOUNT_EXPONENT))).any(axis=1)
+    powers = 10 ** numpy.clip(exponent, 0, MAX_AMOUNT_EXPONENT)
+    amounts = numpy.where(exponent >= 0, digits * powers, 0).sum(axis=1)
+    return numpy.where(valid, amounts, 0), ~valid
+
+
+def _decode_chunk(payloads: Sequence[str]) -> Dict[str, numpy.ndarray]:
+    chars, lengths = _char_matrix(payloads)
+    count = len(payloads)
+    malformed = numpy.zeros(count, dtype=bool)
+    ranges = {name: (numpy.zeros(count, dtype=numpy.int64), numpy.zeros(count, dtype=numpy.int64))
+              for name in STRING_COLUMNS if name != 'provider.field_id'}
+    fields = _parse_fields(chars, numpy.arange(count), numpy.zeros(count, dtype=numpy.int64), lengths, malformed)
+    _collect(chars, DECODE_FIELDS, fields, ranges, malformed)
+
+    # the first provider template found wins, and its fields are laid out by its GUID, VNPay by default
+    provider_field_ids = numpy.full(count, '', dtype='U2')
+    assigned = numpy.zeros(count, dtype=bool)
+    for field_id in PROVIDER_FIELD_IDS:
+        if field_id not in fields:
+            continue
+        rows, starts, ends = fields[field_id]
+        selected = ~assigned[rows]
+        rows, starts, ends = rows[selected], starts[selected], ends[selected]
+        assigned[rows] = True
+        provider_field_ids[rows] = field_id
+        provider_fields = _parse_fields(chars, rows, starts, ends, malformed)
+        guid_start, guid_end = numpy.zeros(count, dtype=numpy.int64), numpy.zeros(count, dtype=numpy.int64)
+        if providers.Field.GUID.value in provider_fields:
+            guid_rows, guid_start[guid_rows], guid_end[guid_rows] = provider_fields[providers.Field.GUID.value]
+        guids = _strings(chars, guid_start, guid_end)
+        known = {guid: guids == guid for guid in PROVIDER_LAYOUTS}
+        unknown = ~numpy.any(list(known.values()), axis=0)
+        for guid, layout in PROVIDER_LAYOUTS.items():
+            in_layout = known[guid] | unknown if layout is VNPAY_PROVIDER_LAYOUT else known[guid]
+            layout_fields = {}
+            for tag, (tag_rows, tag_starts, tag_ends) in provider_fields.items():
+                selected = in_layout[tag_rows]
+                layout_fields[tag] = tag_rows[selected], tag_starts[selected], tag_ends[selected]
+            _collect(chars, layout.children_by_tag, layout_fields, ranges, malformed)
+
+    mask, _ = verify_crc16_batch(payloads)
+    crc_start, crc_end = ranges['crc']
+    columns: Dict[str, numpy.ndarray] = {
+        'is_valid': mask & ~malformed & (crc_end == lengths) & (crc_end - crc_start == 4),
+    }
+    for name in STRING_COLUMNS:
+        if name == 'provider.field_id':
+            columns[name] = numpy.where(malformed, '', provider_field_ids)
+            continue
+        start, end = ranges[name]
+        # a malformed payload has no field, like str_to_qr raising
+        columns[name] = _strings(chars, start, numpy.where(malformed, start, end))
+    return columns
+
+
+def _dictionary_encode(values: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    dictionary, codes = numpy.unique(values, return_inverse=True)
+    codes = codes.astype(numpy.int32).ravel()
+    if len(dictionary) and dictionary[0] == '':
+        # the empty string sorts first, the missing fields get -1
+        dictionary, codes = dictionary[1:], codes - 1
+    return codes, dictionary
+
+
+def decode_to_columns(payloads: Sequence[str], amount_scale: int = 0,
+                      chunk_size: int = CHUNK_SIZE) -> Dict[str, numpy.ndarray]:
+    """
+    Decode QR code strings into a column per field, without building any object per payload.
+
+    Payloads are decoded by chunks, whose columns are then concatenated, so memory stays bounded by the longest
+    payload of a chunk.
+
+    Args:
+        payloads (Sequence[str]): The QR code strings.
+        amount_scale (int): The number of fraction digits of the amount kept, see ``parse_amounts``.
+        chunk_size (int): The number of payloads decoded at once.
+
+    Returns:
+        Dict[str, numpy.ndarray]: The columns, keyed by the source of their field, e.g. ``consumer.bank_bin``:
+
+        - ``is_valid``: bool, whether the payload is well-formed and its CRC field is last and matches.
+        - ``amount``: int64 amounts in ``10 ** -amount_scale`` units, with ``amount.mask`` True where it is missing
+          or unparsable, e.g. for ``pandas.arrays.IntegerArray``.
+        - ``DICTIONARY_COLUMNS``: int32 codes into the string array ``<name>.dictionary``, -1 where the field is
+          missing, e.g. for ``pandas.Categorical.from_codes``.
+        - every other field of ``STRING_COLUMNS``: string arrays, empty where the field is missing.
+
+        Every field of a malformed payload is missing.
+    """
+    chunks = [_decode_chunk(payloads[start:start + chunk_size]) for start in range(0, len(payloads), chunk_size)]
+    if not chunks:
+        chunks = [{'is_valid': numpy.zeros(0, dtype=bool), **{name: numpy.zeros(0, dtype='U1')
+                                                             for name in STRING_COLUMNS}}]
+    columns: Dict[str, numpy.ndarray] = {}
+    for name in chunks[0]:
+        values = numpy.concatenate([chunk[name] for chunk in chunks])
+        if name == 'amount':
+            columns[name], columns['amount.mask'] = parse_amounts(values, amount_scale)
+        elif name in DICTIONARY_COLUMNS:
+            columns[name], columns[f'{name}.dictionary'] = _dictionary_encode(values)
+        else:
+            columns[name] = values
+    return columns
+
+
+def decode_to_table(payloads: Sequence[str], amount_scale: int = 0, chunk_size: int = CHUNK_SIZE,
+                    columns: Optional[Dict[str, numpy.ndarray]] = None) -> 'pyarrow.Table':
+    """
+    Decode QR code strings into a pyarrow Table, see ``decode_to_columns``.
+
+    The amount is an int64 column, or a decimal128 one with ``amount_scale`` fraction digits, and missing amounts
+    and dictionary values are nulls.
+
+    Args:
+        payloads (Sequence[str]): The QR code strings.
+        amount_scale (int): The number of fraction digits of the amount kept, see ``parse_amounts``.
+        chunk_size (int): The number of payloads decoded at once.
+        columns (Optional[Dict[str, numpy.ndarray]]): The columns from ``decode_to_columns``, to convert them
+            rather than decode the payloads.
+
+    Returns:
+        pyarrow.Table: The table, with a column per field.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel,redefined-outer-name
+    except ImportError as exc:  # pragma: no cover
+        raise ImportError('decode_to_table requires pyarrow, install it with `pip install pyarrow`') from exc
+
+    if columns is None:
+        columns = decode_to_columns(payloads, amount_scale, chunk_size)
+    arrays = {}
+    for name, values in columns.items():
+        if name.endswith(('.mask', '.dictionary')):
+            continue
+        if name in DICTIONARY_COLUMNS:
+            arrays[name] = pyarrow.DictionaryArray.from_arrays(
+                pyarrow.array(values, mask=values < 0), pyarrow.array(columns[f'{name}.dictionary'], pyarrow.string()),
+            )
+        elif name == 'amount' and amount_scale:
+            # decimal128 values are 16 bytes little-endian integers, the int64 amounts sign extended
+            data = numpy.empty((len(values), 2), dtype='<i8')
+            data[:, 0], data[:, 1] = values, values >> 63
+            validity = numpy.packbits(~columns['amount.mask'], bitorder='little')
+            arrays[name] = pyarrow.Array.from_buffers(
+                pyarrow.decimal128(MAX_AMOUNT_EXPONENT + 1, amount_scale), len(values),
+                [pyarrow.py_buffer(validity), pyarrow.py_buffer(data)],
+            )
+        elif name == 'amount':
+            arrays[name] = pyarrow.array(values, mask=columns['amount.mask'])
+        else:
+            arrays[name] = pyarrow.array(values)
+    return pyarrow.table(arrays)
+
+
+def _variable_strings(values: Any, count: int, default: Any) -> numpy.ndarray:
+    """
+    Convert a column of variable values into a NumPy string array, the default of the template where a value is
+    missing: None, a null or NaN, like ``QRTemplate.render`` taking None.
+    """
+    default = '' if default is None else str(default)
+    if values is None:
+        return numpy.full(count, default)
+    if hasattr(values, 'null_count'):
+        # a pyarrow Array or ChunkedArray, cast so nulls become None rather than NaN and decimals keep their digits
+        values = values.cast('string').to_numpy(zero_copy_only=False)
+    # plain sequences stay objects, NumPy would turn a NaN among strings into 'nan'
+    values = numpy.asarray(values) if hasattr(values, '__array__') else numpy.array(values, dtype=object)
+    if values.ndim != 1 or len(values) != count:
+        raise ValueError(f'Expected a column of {count} values, got shape {values.shape}')
+    if values.dtype.kind == 'O':
+        # pandas object columns mark missing values with NaN as often as None
+        missing = numpy.fromiter((value is None or (isinstance(value, float) and value != value) for value in values),
+                                 dtype=bool, count=count)
+    elif values.dtype.kind == 'f':
+        missing = numpy.isnan(values)
+    else:
+        missing = None
+    if values.dtype.kind == 'S':
+        values = numpy.char.decode(values)
+    strings = values.astype(str)
+    return strings if missing is None or not missing.any() else numpy.where(missing, default, strings)
+
+
+def _encode_tail(template: QRTemplate, variables: Mapping[str, numpy.ndarray], count: int) -> numpy.ndarray:
+    """
+    Run the tail steps of a template over columns, like ``schema.run_layout`` over a row.
+    """
+    parts: List[Any] = []
+    starts: List[int] = []
+    for kind, text, getter, default in template.tail_steps:
+        if kind == FIELD:
+            values = getter(variables)
+            if default:
+                values = numpy.where(values == '', default, values)
+            widths = numpy.char.str_len(values)
+            parts.append(_header(text, widths))
+            parts.append(values)
+        elif kind == CONST:
+            parts.append(text)
+        elif kind == OPEN:
+            starts.append(len(parts))
+        else:
+            start = starts.pop()
+            inner = _join(parts[start:], count)
+            del parts[start:]
+            widths = numpy.char.str_len(inner)
+            parts.append(_header(text, widths))
+            parts.append(inner)
+    return _join(parts + [CRC_HEADER], count)
+
+
+def _header(tag: str, widths: numpy.ndarray) -> numpy.ndarray:
+    # values over 99 characters get a longer header, as with run_layout, and fail validation
+    headers = LENGTH_HEADERS[widths] if widths.max(initial=0) < 100 else numpy.char.zfill(widths.astype(str), 2)
+    return numpy.where(widths > 0, numpy.char.add(tag, headers), '')
+
+
+def _join(parts: Sequence[Any], count: int) -> numpy.ndarray:
+    joined = numpy.full(count, '')
+    for part in parts:
+        joined = numpy.char.add(joined, part)
+    return joined
+
+
+def _encode_chunk(template: QRTemplate, variables: Mapping[str, numpy.ndarray]) -> numpy.ndarray:
+    count = len(next(iter(variables.values())))
+    tail = _encode_tail(template, variables, count)
+    widths = numpy.char.str_len(tail)
+    size = max(tail.dtype.itemsize // 4, 1)
+    chars = numpy.ascontiguousarray(tail).view(numpy.uint32).reshape(count, size)
+    # the CRC runs over UTF-8 bytes, so the rows with non ASCII characters are left to Crc16State
+    ascii_rows = (chars < 0x80).all(axis=1)
+    checksums = crc16_rows(chars.astype(numpy.uint8), numpy.where(ascii_rows, widths, 0), template.head_crc.value)
+    for row in numpy.flatnonzero(~ascii_rows).tolist():
+        checksums[row] = template.head_crc.copy().update(str(tail[row]).encode()).value
+    digits = HEX_DIGITS[(checksums[:, None] >> numpy.array([12, 8, 4, 0], dtype=numpy.uint16)) & 0xF]
+    checksum_strings = numpy.ascontiguousarray(digits, dtype=numpy.uint32).view('U4').ravel()
+    return numpy.char.add(numpy.char.add(template.head, tail), checksum_strings)
+
+
+def encode_columns(template: QRTemplate, amounts: Any = None, bill_numbers: Any = None, purposes: Any = None,
+                   chunk_size: int = CHUNK_SIZE) -> numpy.ndarray:
+    """
+    Render a template over columns of variable fields, without building any object per payload.
+
+    The head of the template, up to the amount, and its CRC state are shared by every payload. The tail fields of
+    a whole chunk are joined by NumPy, their length headers computed from the string lengths at once, and the CRCs
+    advanced over the tails of the chunk together from the CRC state of the head. The output matches
+    ``template.render(amount, bill_number, purpose)`` on each row.
+
+    Args:
+        template (QRTemplate): The template, e.g. from ``QRTemplate.from_qrcode`` or ``store.ConsumerStore``.
+        amounts (Any): The amounts, as a sequence, NumPy array or pyarrow array, of integers, decimals or strings.
+            None, nulls and NaN take the amount of the template, and None for the whole column takes it everywhere.
+        bill_numbers (Any): The bill numbers, like ``amounts``.
+        purposes (Any): The purposes of transaction, like ``amounts``.
+        chunk_size (int): The number of payloads encoded at once.
+
+    Returns:
+        numpy.ndarray: The complete QR code strings, as a NumPy string array.
+
+    Raises:
+        ValueError: If the columns have different lengths, or are all None.
+    """
+    columns = {'amount': amounts, 'additional_data.bill_number': bill_numbers, 'additional_data.purpose': purposes}
+    counts = {len(values) for values in columns.values() if values is not None}
+    if len(counts) != 1:
+        raise ValueError('Expected at least one column, all of the same length')
+    count = counts.pop()
+    chunks = []
+    for start in range(0, count, chunk_size):
+        end = min(start + chunk_size, count)
+        chunks.append(_encode_chunk(template, {
+            source: _variable_strings(None if values is None else values[start:end], end - start,
+                                      template.defaults[source])
+            for source, values in columns.items()
+        }))
+    return numpy.concatenate(chunks) if chunks else numpy.zeros(0, dtype='U1')
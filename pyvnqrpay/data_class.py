@@ -1,6 +1,6 @@
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import NamedTuple, Optional, Type
 
 
 @dataclass
@@ -55,3 +55,101 @@ class QRCode:
     zip_code: Optional[str] = ''
     additional_data: Optional[AdditionalData] = None
     crc: Optional[str] = ''
+
+
+# Slotted, immutable and hashable variants with the same fields, for keeping many decoded QR codes in memory.
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenProvider:
+    guid: str
+    field_id: Optional[str] = ''
+    name: Optional[str] = ''
+    service: Optional[str] = ''
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenMerchant:
+    id: str
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenConsumer:
+    bank_bin: str
+    bank_number: str
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenAdditionalData:
+    store: Optional[str] = ''
+    terminal: Optional[str] = ''
+    bill_number: Optional[str] = ''
+    mobile_number: Optional[str] = ''
+    loyalty_number: Optional[str] = ''
+    reference: Optional[str] = ''
+    customer_label: Optional[str] = ''
+    purpose: Optional[str] = ''
+    data_request: Optional[str] = ''
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenQRCode:
+    is_valid: Optional[bool] = False
+    version: Optional[str] = ''
+    init_method: Optional[str] = ''
+    provider: Optional[FrozenProvider] = None
+    merchant: Optional[FrozenMerchant] = None
+    consumer: Optional[FrozenConsumer] = None
+    category: Optional[str] = ''
+    currency: Optional[str] = ''
+    amount: Optional[str] = ''
+    tip_and_fee_type: Optional[str] = ''
+    tip_and_fee_amount: Optional[str] = ''
+    tip_and_fee_percent: Optional[str] = ''
+    nation: Optional[str] = ''
+    city: Optional[str] = ''
+    zip_code: Optional[str] = ''
+    additional_data: Optional[FrozenAdditionalData] = None
+    crc: Optional[str] = ''
+
+
+class DataClasses(NamedTuple):
+    """
+    A family of classes to build QR codes with.
+    """
+    qr_code: Type
+    provider: Type
+    merchant: Type
+    consumer: Type
+    additional_data: Type
+
+
+DATA_CLASSES = DataClasses(QRCode, Provider, Merchant, Consumer, AdditionalData)
+
+FROZEN_DATA_CLASSES = DataClasses(FrozenQRCode, FrozenProvider, FrozenMerchant, FrozenConsumer, FrozenAdditionalData)
+
+
+def freeze(qr_code: QRCode) -> FrozenQRCode:
+    """
+    Convert a QRCode object and its nested objects into their frozen variants.
+    """
+    return FrozenQRCode(
+        is_valid=qr_code.is_valid,
+        version=qr_code.version,
+        init_method=qr_code.init_method,
+        provider=FrozenProvider(**vars(qr_code.provider)) if qr_code.provider else None,
+        merchant=FrozenMerchant(**vars(qr_code.merchant)) if qr_code.merchant else None,
+        consumer=FrozenConsumer(**vars(qr_code.consumer)) if qr_code.consumer else None,
+        category=qr_code.category,
+        currency=qr_code.currency,
+        amount=qr_code.amount,
+        tip_and_fee_type=qr_code.tip_and_fee_type,
+        tip_and_fee_amount=qr_code.tip_and_fee_amount,
+        tip_and_fee_percent=qr_code.tip_and_fee_percent,
+        nation=qr_code.nation,
+        city=qr_code.city,
+        zip_code=qr_code.zip_code,
+        additional_data=FrozenAdditionalData(**vars(qr_code.additional_data)) if qr_code.additional_data else None,
+        crc=qr_code.crc,
+    )
@@ -0,0 +1,766 @@
+"""
+QR code matrix encoder specialized for payment payloads, with direct 1-bit PNG and SVG writers
+
+Payloads from ``qr_to_str`` are a single alphanumeric or byte segment of a few hundred characters, so unlike a
+general purpose encoder this one only handles those two modes, in one segment, with every table computed once:
+Reed-Solomon generators as multiplication tables, the smallest version by payload length, and per version the
+function patterns, the data module order and the 8 data masks. Requires NumPy.
+"""
+import struct
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+import numpy
+
+ERROR_LEVELS = ('L', 'M', 'Q', 'H')
+
+# the error correction level indicator of the format information
+ERROR_LEVEL_BITS = {'L': 0b01, 'M': 0b00, 'Q': 0b11, 'H': 0b10}
+
+# ISO/IEC 18004 Table 9, by error level then version 1 to 40
+ECC_CODEWORDS_PER_BLOCK = {
+    'L': (7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24, 28, 30, 28, 28, 28, 28, 30, 30, 26, 28, 30, 30,
+          30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    'M': (10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24, 28, 28, 26, 26, 26, 26, 28, 28, 28, 28, 28, 28,
+          28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28),
+    'Q': (13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30, 24, 28, 28, 26, 30, 28, 30, 30, 30, 30, 28, 30,
+          30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    'H': (17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24, 30, 28, 28, 26, 28, 30, 24, 30, 30, 30, 30, 30,
+          30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+}
+
+NUM_BLOCKS = {
+    'L': (1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8, 8, 9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18,
+          19, 19, 20, 21, 22, 24, 25),
+    'M': (1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14, 16, 17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31,
+          33, 35, 37, 38, 40, 43, 45, 47, 49),
+    'Q': (1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18, 21, 20, 23, 23, 25, 27, 29, 34, 34, 35, 38, 40,
+          43, 45, 48, 51, 53, 56, 59, 62, 65, 68),
+    'H': (1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21, 25, 25, 25, 34, 30, 32, 35, 37, 40, 42, 45, 48,
+          51, 54, 57, 60, 63, 66, 70, 74, 77, 81),
+}
+
+MODE_ALPHANUMERIC = 'alphanumeric'
+MODE_BYTE = 'byte'
+MODE_INDICATORS = {MODE_ALPHANUMERIC: 0b0010, MODE_BYTE: 0b0100}
+ALPHANUMERIC_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+ALPHANUMERIC_VALUES = {char: value for value, char in enumerate(ALPHANUMERIC_CHARS)}
+_ALPHANUMERIC_DELETE = str.maketrans('', '', ALPHANUMERIC_CHARS)
+
+# GF(256) with the QR code polynomial x^8 + x^4 + x^3 + x^2 + 1
+GF_EXP = [0] * 512
+GF_LOG = [0] * 256
+_value = 1
+for _exponent in range(255):
+    GF_EXP[_exponent] = _value
+    GF_LOG[_value] = _exponent
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11D
+for _exponent in range(255, 512):
+    GF_EXP[_exponent] = GF_EXP[_exponent - 255]
+del _value, _exponent
+
+
+def _gf_multiply(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return GF_EXP[GF_LOG[a] + GF_LOG[b]]
+
+
+@lru_cache(maxsize=None)
+def rs_generator_table(degree: int) -> Tuple[int, ...]:
+    """
+    Get the Reed-Solomon generator polynomial of a degree multiplied by each byte, packed as big-endian integers.
+
+    Feeding a byte into the remainder register is then a lookup, a shift and a XOR.
+    """
+    generator = [1]
+    for exponent in range(degree):
+        root = GF_EXP[exponent]
+        # multiply by (x - root)
+        shifted = generator + [0]
+        generator = [shifted[0]] + [
+            shifted[index] ^ _gf_multiply(generator[index - 1], root) for index in range(1, len(shifted))
+        ]
+    coefficients = generator[1:]
+    return tuple(
+        int.from_bytes(bytes(_gf_multiply(coefficient, factor) for coefficient in coefficients), 'big')
+        for factor in range(256)
+    )
+
+
+def rs_remainder(data: bytes, degree: int) -> bytes:
+    """
+    Compute the Reed-Solomon error correction codewords of a block.
+    """
+    table = rs_generator_table(degree)
+    shift = 8 * (degree - 1)
+    mask = (1 << 8 * degree) - 1
+    remainder = 0
+    for byte in data:
+        remainder = ((remainder << 8) & mask) ^ table[(remainder >> shift) ^ byte]
+    return remainder.to_bytes(degree, 'big')
+
+
+def _gf_evaluate(polynomial: List[int], point: int) -> int:
+    # the coefficients are lowest degree first
+    value = 0
+    for coefficient in reversed(polynomial):
+        value = _gf_multiply(value, point) ^ coefficient
+    return value
+
+
+def rs_correct(block: bytes, degree: int) -> bytes:
+    """
+    Correct the errors of a Reed-Solomon block, its data codewords followed by its ``degree`` error correction
+    codewords, up to ``degree // 2`` wrong codewords.
+
+    Berlekamp-Massey finds the error locator from the syndromes, a Chien search its roots and Forney's formula the
+    error values.
+
+    Args:
+        block (bytes): The data and error correction codewords.
+        degree (int): The number of error correction codewords.
+
+    Returns:
+        bytes: The corrected data codewords.
+
+    Raises:
+        ValueError: If the block has more errors than can be corrected.
+    """
+    length = len(block)
+    # the codeword is a polynomial with the first codeword as highest degree, the generator roots are a^0..a^(d-1)
+    syndromes = [0] * degree
+    for index in range(degree):
+        value = 0
+        root = GF_EXP[index]
+        for codeword in block:
+            value = _gf_multiply(value, root) ^ codeword
+        syndromes[index] = value
+    if not any(syndromes):
+        return bytes(block[:length - degree])
+
+    locator, previous = [1], [1]
+    errors, shift, previous_discrepancy = 0, 1, 1
+    for step in range(degree):
+        discrepancy = syndromes[step]
+        for index in range(1, errors + 1):
+            discrepancy ^= _gf_multiply(locator[index], syndromes[step - index])
+        if discrepancy == 0:
+            shift += 1
+            continue
+        factor = GF_EXP[GF_LOG[discrepancy] + 255 - GF_LOG[previous_discrepancy]]
+        updated = locator + [0] * max(0, len(previous) + shift - len(locator))
+        for index, coefficient in enumerate(previous):
+            updated[index + shift] ^= _gf_multiply(coefficient, factor)
+        if 2 * errors <= step:
+            previous, previous_discrepancy, errors, shift = locator, discrepancy, step + 1 - errors, 1
+        else:
+            shift += 1
+        locator = updated
+    if 2 * errors > degree:
+        raise ValueError('Too many errors to correct')
+
+    # Omega(x) = S(x) Lambda(x) mod x^degree, and Lambda' keeps the odd terms in characteristic 2
+    evaluator = [0] * degree
+    for i, syndrome in enumerate(syndromes):
+        for j, coefficient in enumerate(locator[:degree - i]):
+            evaluator[i + j] ^= _gf_multiply(syndrome, coefficient)
+    derivative = [coefficient if index % 2 else 0 for index, coefficient in enumerate(locator)][1:]
+
+    corrected = bytearray(block)
+    found = 0
+    for position in range(length):
+        # the codeword at position is the coefficient of x^(length - 1 - position)
+        exponent = length - 1 - position
+        inverse = GF_EXP[(255 - exponent) % 255]
+        if _gf_evaluate(locator, inverse):
+            continue
+        denominator = _gf_evaluate(derivative, inverse)
+        if denominator == 0:
+            raise ValueError('Too many errors to correct')
+        value = _gf_multiply(GF_EXP[exponent % 255], _gf_evaluate(evaluator, inverse))
+        corrected[position] ^= GF_EXP[GF_LOG[value] + 255 - GF_LOG[denominator]] if value else 0
+        found += 1
+    if found != errors or rs_remainder(corrected[:length - degree], degree) != corrected[length - degree:]:
+        raise ValueError('Too many errors to correct')
+    return bytes(corrected[:length - degree])
+
+
+def symbol_size(version: int) -> int:
+    """
+    Get the number of modules of a side of a symbol.
+    """
+    return 17 + 4 * version
+
+
+def raw_codewords(version: int) -> int:
+    """
+    Get the number of codewords of a symbol, data and error correction, without the remainder bits.
+    """
+    modules = (16 * version + 128) * version + 64
+    if version >= 2:
+        alignments = version // 7 + 2
+        modules -= (25 * alignments - 10) * alignments - 55
+        if version >= 7:
+            modules -= 36
+    return modules // 8
+
+
+def data_codewords(version: int, error: str) -> int:
+    """
+    Get the number of data codewords of a symbol.
+    """
+    index = version - 1
+    return raw_codewords(version) - ECC_CODEWORDS_PER_BLOCK[error][index] * NUM_BLOCKS[error][index]
+
+
+def char_count_bits(mode: str, version: int) -> int:
+    """
+    Get the length of the character count indicator of a mode.
+    """
+    if mode == MODE_BYTE:
+        return 8 if version < 10 else 16
+    return 9 if version < 10 else 11 if version < 27 else 13
+
+
+def capacity(mode: str, version: int, error: str) -> int:
+    """
+    Get the maximum number of characters (bytes in byte mode) of a single segment symbol.
+    """
+    bits = data_codewords(version, error) * 8 - 4 - char_count_bits(mode, version)
+    if mode == MODE_BYTE:
+        return bits // 8
+    return 2 * (bits // 11) + (1 if bits % 11 >= 6 else 0)
+
+
+@lru_cache(maxsize=None)
+def version_table(mode: str, error: str) -> Tuple[int, ...]:
+    """
+    Get the smallest version able to hold each payload length, indexed by length up to the capacity of version 40.
+    """
+    table: List[int] = []
+    for version in range(1, 41):
+        table.extend([version] * (capacity(mode, version, error) + 1 - len(table)))
+    return tuple(table)
+
+
+def alignment_positions(version: int) -> List[int]:
+    """
+    Get the row and column coordinates of the centers of the alignment patterns.
+    """
+    if version == 1:
+        return []
+    count = version // 7 + 2
+    size = symbol_size(version)
+    step = 26 if version == 32 else (version * 4 + count * 2 + 1) // (count * 2 - 2) * 2
+    return [6] + sorted(size - 7 - index * step for index in range(count - 1))
+
+
+def _bch_format(error: str, mask: int) -> int:
+    data = ERROR_LEVEL_BITS[error] << 3 | mask
+    remainder = data
+    for _ in range(10):
+        remainder = (remainder << 1) ^ ((remainder >> 9) * 0x537)
+    return (data << 10 | remainder) ^ 0x5412
+
+
+def _bch_version(version: int) -> int:
+    remainder = version
+    for _ in range(12):
+        remainder = (remainder << 1) ^ ((remainder >> 11) * 0x1F25)
+    return version << 12 | remainder
+
+
+@dataclass(frozen=True)
+class SymbolTemplate:
+    """
+    The modules of a version that do not depend on the data, computed once per version.
+
+    Attributes:
+        size (int): The number of modules of a side.
+        base (numpy.ndarray): The function patterns and version information, with the format information light.
+        data_index (numpy.ndarray): The flat indices of the data modules, in placement order.
+        format_index (Tuple[numpy.ndarray, numpy.ndarray]): The flat indices of the two copies of the 15 format
+            information bits, from the least significant bit.
+        masks (numpy.ndarray): The 8 data masks, restricted to the data modules.
+    """
+    size: int
+    base: numpy.ndarray
+    data_index: numpy.ndarray
+    format_index: Tuple[numpy.ndarray, numpy.ndarray]
+    masks: numpy.ndarray
+
+
+@lru_cache(maxsize=None)
+def symbol_template(version: int) -> SymbolTemplate:
+    """
+    Build the template of a version.
+    """
+    size = symbol_size(version)
+    base = numpy.zeros((size, size), dtype=bool)
+    function = numpy.zeros((size, size), dtype=bool)
+
+    def draw(x: int, y: int, dark: bool) -> None:
+        base[y, x] = dark
+        function[y, x] = True
+
+    for index in range(size):
+        draw(6, index, index % 2 == 0)
+        draw(index, 6, index % 2 == 0)
+    for center_x, center_y in ((3, 3), (size - 4, 3), (3, size - 4)):
+        for dy in range(-4, 5):
+            for dx in range(-4, 5):
+                x, y = center_x + dx, center_y + dy
+                if 0 <= x < size and 0 <= y < size:
+                    draw(x, y, max(abs(dx), abs(dy)) not in (2, 4))
+    positions = alignment_positions(version)
+    last = len(positions) - 1
+    for i, center_x in enumerate(positions):
+        for j, center_y in enumerate(positions):
+            if (i, j) in ((0, 0), (0, last), (last, 0)):
+                continue
+            for dy in range(-2, 3):
+                for dx in range(-2, 3):
+                    draw(center_x + dx, center_y + dy, max(abs(dx), abs(dy)) != 1)
+
+    first_format = [(8, index) for index in range(6)] + [(8, 7), (8, 8), (7, 8)] + \
+        [(14 - index, 8) for index in range(9, 15)]
+    second_format = [(size - 1 - index, 8) for index in range(8)] + [(8, size - 15 + index) for index in range(8, 15)]
+    for x, y in first_format + second_format:
+        draw(x, y, False)
+    # the dark module
+    draw(8, size - 8, True)
+    if version >= 7:
+        bits = _bch_version(version)
+        for index in range(18):
+            dark = bool(bits >> index & 1)
+            draw(size - 11 + index % 3, index // 3, dark)
+            draw(index // 3, size - 11 + index % 3, dark)
+
+    data_index = []
+    right = size - 1
+    while right >= 1:
+        if right == 6:
+            right = 5
+        upward = (right + 1) & 2 == 0
+        for vertical in range(size):
+            y = size - 1 - vertical if upward else vertical
+            for x in (right, right - 1):
+                if not function[y, x]:
+                    data_index.append(y * size + x)
+        right -= 2
+
+    i, j = numpy.indices((size, size))
+    patterns = numpy.stack([
+        (i + j) % 2 == 0,
+        i % 2 == 0,
+        j % 3 == 0,
+        (i + j) % 3 == 0,
+        (i // 2 + j // 3) % 2 == 0,
+        (i * j) % 2 + (i * j) % 3 == 0,
+        ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+        ((i + j) % 2 + (i * j) % 3) % 2 == 0,
+    ]) & ~function
+
+    def flat(coordinates: List[Tuple[int, int]]) -> numpy.ndarray:
+        return numpy.array([y * size + x for x, y in coordinates], dtype=numpy.intp)
+
+    return SymbolTemplate(size, base, numpy.array(data_index, dtype=numpy.intp),
+                          (flat(first_format), flat(second_format)), patterns)
+
+
+@dataclass(frozen=True)
+class QRMatrix:
+    """
+    An encoded QR code symbol.
+
+    Attributes:
+        modules (numpy.ndarray): The square boolean matrix of the modules, True for dark, without quiet zone.
+        version (int): The version, 1 to 40.
+        error (str): The error correction level, 'L', 'M', 'Q' or 'H'.
+        mask (int): The data mask pattern, 0 to 7.
+        mode (str): The mode of the segment, 'alphanumeric' or 'byte'.
+    """
+    modules: numpy.ndarray
+    version: int
+    error: str
+    mask: int
+    mode: str
+
+
+def _data_codewords(data: Union[str, bytes], mode: str, version: int, error: str) -> bytes:
+    count_bits = char_count_bits(mode, version)
+    if mode == MODE_BYTE:
+        bits = (MODE_INDICATORS[mode] << count_bits | len(data)) << 8 * len(data) | int.from_bytes(data, 'big')
+        length = 4 + count_bits + 8 * len(data)
+    else:
+        bits = MODE_INDICATORS[mode] << count_bits | len(data)
+        length = 4 + count_bits
+        values = [ALPHANUMERIC_VALUES[char] for char in data]
+        for index in range(0, len(values) - 1, 2):
+            bits = bits << 11 | values[index] * 45 + values[index + 1]
+        length += 11 * (len(values) // 2)
+        if len(values) % 2:
+            bits = bits << 6 | values[-1]
+            length += 6
+    total = data_codewords(version, error)
+    # terminator, then pad to a codeword boundary
+    terminator = min(4, total * 8 - length)
+    length += terminator
+    padding = -length % 8
+    bits <<= terminator + padding
+    length += padding
+    codewords = bits.to_bytes(length // 8, 'big')
+    return codewords + (b'\xec\x11' * total)[:total - len(codewords)]
+
+
+def _interleave(data: bytes, version: int, error: str) -> bytes:
+    index = version - 1
+    num_blocks = NUM_BLOCKS[error][index]
+    degree = ECC_CODEWORDS_PER_BLOCK[error][index]
+    short_length = len(data) // num_blocks
+    num_short = num_blocks - len(data) % num_blocks
+    blocks = []
+    start = 0
+    for block in range(num_blocks):
+        length = short_length + (block >= num_short)
+        blocks.append(data[start:start + length])
+        start += length
+    out = bytearray()
+    for column in range(short_length + 1):
+        for block in blocks:
+            if column < len(block):
+                out.append(block[column])
+    remainders = [rs_remainder(block, degree) for block in blocks]
+    for column in range(degree):
+        for remainder in remainders:
+            out.append(remainder[column])
+    return bytes(out)
+
+
+def penalty_scores(symbols: numpy.ndarray) -> numpy.ndarray:
+    """
+    Compute the ISO/IEC 18004 mask penalty of stacked symbols at once.
+
+    Args:
+        symbols (numpy.ndarray): Boolean symbols of shape (count, size, size).
+
+    Returns:
+        numpy.ndarray: The penalty N1 + N2 + N3 + N4 of each symbol.
+    """
+    count, size, _ = symbols.shape
+    modules = symbols.astype(numpy.int8)
+    lines = numpy.concatenate([modules, modules.transpose(0, 2, 1)], axis=1)  # rows then columns
+
+    # N1: runs of 5 + i modules of the same color in a line score 3 + i
+    separated = numpy.concatenate([lines, numpy.full((count, 2 * size, 1), 2, dtype=numpy.int8)], axis=2)
+    flat = separated.reshape(count, -1)
+    changes = numpy.ones(flat.shape, dtype=bool)
+    changes[:, 1:] = flat[:, 1:] != flat[:, :-1]
+    symbol_index, position = numpy.nonzero(changes)
+    ends = numpy.append(position[1:], 0)
+    run_lengths = numpy.where(numpy.append(symbol_index[1:], count) == symbol_index, ends, flat.shape[1]) - position
+    long_runs = run_lengths >= 5
+    n1 = numpy.bincount(symbol_index[long_runs], weights=run_lengths[long_runs] - 2, minlength=count)
+
+    # N2: 2x2 blocks of the same color score 3
+    top_left = modules[:, :-1, :-1]
+    same = (top_left == modules[:, 1:, :-1]) & (top_left == modules[:, :-1, 1:]) & (top_left == modules[:, 1:, 1:])
+    n2 = 3 * same.sum(axis=(1, 2))
+
+    # N3: 1:1:3:1:1 finder-like patterns with 4 light modules before or after score 40, outside counts as light
+    padded = numpy.pad(lines, ((0, 0), (0, 0), (4, 4))).astype(numpy.int16)
+    # the 15 modules from each position as the bits of an integer, first module as the most significant bit
+    windows = numpy.zeros(padded.shape[:2] + (size - 6,), dtype=numpy.int16)
+    for offset in range(15):
+        windows = (windows << 1) | padded[:, :, offset:offset + size - 6]
+    core = (windows >> 4) & 0x7F == 0b1011101
+    light_around = (windows >> 11 == 0) | (windows & 0xF == 0)
+    found = core & light_around
+    # the pattern overlaps itself 4 or 6 modules apart, the second one of an overlapping pair is not counted
+    for position in range(4, size - 6):
+        found[:, :, position] &= ~found[:, :, position - 4]
+        if position >= 6:
+            found[:, :, position] &= ~found[:, :, position - 6]
+    n3 = 40 * numpy.count_nonzero(found, axis=(1, 2))
+
+    # N4: 10 per 5% of dark modules away from 50%
+    dark = modules.sum(axis=(1, 2))
+    n4 = 10 * (numpy.abs(dark * 100 / (size * size) - 50) // 5)
+    return (n1 + n2 + n3 + n4).astype(numpy.int64)
+
+
+def encode(content: Union[str, bytes], error: str = 'L', boost_error: bool = True, version: Optional[int] = None,
+           mask: Optional[int] = None) -> QRMatrix:
+    """
+    Encode a payload into a QR code symbol, in a single segment.
+
+    Payloads of alphanumeric mode characters (digits, uppercase letters and `` $%*+-./:``) are encoded in that mode,
+    others in byte mode, strings as ISO-8859-1 when possible and UTF-8 otherwise, like segno without ECI.
+
+    Args:
+        content (Union[str, bytes]): The payload, as a string or UTF-8 encoded.
+        error (str): The minimum error correction level.
+        boost_error (bool): Raise the error correction level as long as the payload fits in the same version.
+        version (Optional[int]): The version, defaults to the smallest one the payload fits in.
+        mask (Optional[int]): The data mask pattern, defaults to the one with the lowest penalty.
+
+    Returns:
+        QRMatrix: The symbol.
+
+    Raises:
+        ValueError: If the payload does not fit, or an argument is invalid.
+    """
+    if error not in ERROR_LEVELS:
+        raise ValueError(f'Invalid error level {error!r}, expected one of {ERROR_LEVELS}')
+    if not isinstance(content, str):
+        content = bytes(content).decode()
+    data: Union[str, bytes]
+    if not content.translate(_ALPHANUMERIC_DELETE):
+        mode, data = MODE_ALPHANUMERIC, content
+    else:
+        mode = MODE_BYTE
+        try:
+            data = content.encode('iso-8859-1')
+        except UnicodeEncodeError:
+            data = content.encode()
+
+    if version is None:
+        table = version_table(mode, error)
+        if len(data) >= len(table):
+            raise ValueError(f'Payload of {len(data)} characters too long for error level {error}')
+        version = table[len(data)]
+    elif not 1 <= version <= 40 or len(data) > capacity(mode, version, error):
+        raise ValueError(f'Payload of {len(data)} characters does not fit version {version}, error level {error}')
+    if boost_error:
+        for level in ERROR_LEVELS[:ERROR_LEVELS.index(error):-1]:
+            if len(data) <= capacity(mode, version, level):
+                error = level
+                break
+
+    template = symbol_template(version)
+    codewords = _interleave(_data_codewords(data, mode, version, error), version, error)
+    bits = numpy.unpackbits(numpy.frombuffer(codewords, dtype=numpy.uint8)).astype(bool)
+    unmasked = template.base.copy()
+    # the remainder bits after the last codeword stay light
+    unmasked.flat[template.data_index[:len(bits)]] = bits
+
+    masks = range(8) if mask is None else (mask,)
+    candidates = unmasked[numpy.newaxis] ^ template.masks[list(masks)]
+    for candidate, mask_number in zip(candidates, masks):
+        format_bits = _bch_format(error, mask_number)
+        values = numpy.array([format_bits >> index & 1 for index in range(15)], dtype=bool)
+        candidate.flat[template.format_index[0]] = values
+        candidate.flat[template.format_index[1]] = values
+    best = int(numpy.argmin(penalty_scores(candidates))) if mask is None else 0
+    return QRMatrix(candidates[best], version, error, masks[best], mode)
+
+
+def _deinterleave(codewords: bytes, version: int, error: str) -> List[Tuple[bytes, bytes]]:
+    index = version - 1
+    num_blocks = NUM_BLOCKS[error][index]
+    degree = ECC_CODEWORDS_PER_BLOCK[error][index]
+    total = data_codewords(version, error)
+    short_length = total // num_blocks
+    num_short = num_blocks - total % num_blocks
+    lengths = [short_length + (block >= num_short) for block in range(num_blocks)]
+    data = [bytearray() for _ in range(num_blocks)]
+    position = 0
+    for column in range(short_length + 1):
+        for block, length in enumerate(lengths):
+            if column < length:
+                data[block].append(codewords[position])
+                position += 1
+    ecc = [bytearray() for _ in range(num_blocks)]
+    for _ in range(degree):
+        for block in ecc:
+            block.append(codewords[position])
+            position += 1
+    return [(bytes(block), bytes(remainder)) for block, remainder in zip(data, ecc)]
+
+
+def read_format(modules: numpy.ndarray) -> Tuple[str, int]:
+    """
+    Read the error correction level and the mask of a symbol from the closest valid format information.
+
+    Raises:
+        ValueError: If both copies of the format information have more than 3 wrong bits.
+    """
+    template = symbol_template((modules.shape[0] - 17) // 4)
+    best = None
+    for copy in template.format_index:
+        bits = sum(int(bit) << index for index, bit in enumerate(modules.flat[copy]))
+        for error in ERROR_LEVELS:
+            for mask in range(8):
+                distance = bin(bits ^ _bch_format(error, mask)).count('1')
+                if best is None or distance < best[0]:
+                    best = (distance, error, mask)
+    distance, error, mask = best
+    if distance > 3:
+        raise ValueError('Invalid format information')
+    return error, mask
+
+
+def _parse_segments(data: bytes, version: int) -> bytes:
+    # the data codewords passed the error correction, but may still hold values no encoder writes
+    bits = int.from_bytes(data, 'big')
+    remaining = 8 * len(data)
+    out = bytearray()
+
+    def read(length: int, limit: int = 0) -> int:
+        nonlocal remaining
+        remaining -= length
+        if remaining < 0:
+            raise ValueError('Segment overflows the data codewords')
+        value = bits >> remaining & ((1 << length) - 1)
+        if limit and value >= limit:
+            raise ValueError(f'Invalid segment value {value}')
+        return value
+
+    while remaining >= 4:
+        indicator = read(4)
+        if indicator == 0:
+            break
+        if indicator == MODE_INDICATORS[MODE_BYTE]:
+            count = read(char_count_bits(MODE_BYTE, version))
+            out.extend(read(8) for _ in range(count))
+        elif indicator == MODE_INDICATORS[MODE_ALPHANUMERIC]:
+            count = read(char_count_bits(MODE_ALPHANUMERIC, version))
+            for _ in range(count // 2):
+                pair = read(11, 45 * 45)
+                out.extend((ALPHANUMERIC_CHARS[pair // 45] + ALPHANUMERIC_CHARS[pair % 45]).encode())
+            if count % 2:
+                out.extend(ALPHANUMERIC_CHARS[read(6, 45)].encode())
+        elif indicator == 0b0001:
+            count = read(10 if version < 10 else 12 if version < 27 else 14)
+            for _ in range(count // 3):
+                out.extend(f'{read(10, 1000):03}'.encode())
+            if count % 3:
+                digits = count % 3
+                out.extend(f'{read(3 * digits + 1, 10 ** digits):0{digits}}'.encode())
+        elif indicator == 0b0111:
+            # ECI designator, the payload bytes are returned as is
+            read(8)
+        else:
+            raise ValueError(f'Unsupported mode indicator {indicator:04b}')
+    return bytes(out)
+
+
+def decode(modules: numpy.ndarray) -> bytes:
+    """
+    Read the payload of a symbol, the inverse of ``encode``.
+
+    Args:
+        modules (numpy.ndarray): The square boolean matrix of the modules, True for dark, without quiet zone.
+
+    Returns:
+        bytes: The payload, UTF-8 or ISO-8859-1 encoded for byte mode.
+
+    Raises:
+        ValueError: If the matrix is not a symbol, or a block has more errors than can be corrected.
+    """
+    size = modules.shape[0]
+    if modules.shape != (size, size) or size < 21 or (size - 17) % 4:
+        raise ValueError(f'Invalid symbol size {modules.shape}')
+    version = (size - 17) // 4
+    template = symbol_template(version)
+    error, mask = read_format(modules)
+    unmasked = modules ^ template.masks[mask]
+    bits = unmasked.flat[template.data_index[:8 * raw_codewords(version)]]
+    data = bytearray()
+    for block, remainder in _deinterleave(numpy.packbits(bits).tobytes(), version, error):
+        if rs_remainder(block, len(remainder)) == remainder:
+            data.extend(block)
+        else:
+            data.extend(rs_correct(block + remainder, len(remainder)))
+    return _parse_segments(bytes(data), version)
+
+
+def _color(color: str) -> bytes:
+    value = color.lstrip('#')
+    if len(value) == 3:
+        value = ''.join(digit * 2 for digit in value)
+    if len(value) != 6:
+        raise ValueError(f'Invalid color {color!r}, expected #rgb or #rrggbb')
+    return bytes.fromhex(value)
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def to_png(symbol: QRMatrix, scale: int = 10, border: int = 4, dark: str = '#000', light: str = '#fff') -> bytes:
+    """
+    Write a symbol as a 1-bit palette PNG image.
+
+    Args:
+        symbol (QRMatrix): The symbol.
+        scale (int): The size of a module in pixels.
+        border (int): The quiet zone in modules.
+        dark (str): The color of the dark modules, as #rgb or #rrggbb.
+        light (str): The color of the light modules.
+
+    Returns:
+        bytes: The PNG image.
+    """
+    modules = numpy.pad(symbol.modules, border)
+    pixels = numpy.repeat(numpy.repeat(modules, scale, axis=0), scale, axis=1)
+    height, width = pixels.shape
+    # palette index 1 is dark, each row starts with the filter type 0
+    rows = numpy.packbits(pixels, axis=1)
+    scanlines = numpy.concatenate([numpy.zeros((height, 1), dtype=numpy.uint8), rows], axis=1)
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 1, 3, 0, 0, 0)),
+        _png_chunk(b'PLTE', _color(light) + _color(dark)),
+        _png_chunk(b'IDAT', zlib.compress(scanlines.tobytes(), 9)),
+        _png_chunk(b'IEND', b''),
+    ))
+
+
+def to_svg(symbol: QRMatrix, scale: int = 10, border: int = 4, dark: str = '#000', light: str = '#fff') -> bytes:
+    """
+    Write a symbol as an SVG image, drawing each horizontal run of dark modules as a single path segment.
+
+    Args:
+        symbol (QRMatrix): The symbol.
+        scale (int): The size of a module in pixels.
+        border (int): The quiet zone in modules.
+        dark (str): The color of the dark modules.
+        light (str): The color of the light modules.
+
+    Returns:
+        bytes: The UTF-8 encoded SVG image.
+    """
+    modules = symbol.modules.astype(numpy.int8)
+    size = modules.shape[0] + 2 * border
+    edges = numpy.diff(numpy.pad(modules, ((0, 0), (1, 1))), axis=1)
+    commands = []
+    for y, row in enumerate(edges):
+        starts = numpy.flatnonzero(row == 1)
+        ends = numpy.flatnonzero(row == -1)
+        commands.extend(f'M{x + border} {y + border}.5h{end - x}' for x, end in zip(starts.tolist(), ends.tolist()))
+    pixels = size * scale
+    return (
+        f'<?xml version="1.0" encoding="utf-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" viewBox="0 0 {size} {size}">'
+        f'<rect width="{size}" height="{size}" fill="{light}"/>'
+        f'<path stroke="{dark}" shape-rendering="crispEdges" d="{"".join(commands)}"/></svg>\n'
+    ).encode()
+
+
+def render_bytes(content: Union[str, bytes], kind: str = 'png', scale: int = 10, border: Optional[int] = None,
+                 dark: str = '#000', light: str = '#fff') -> bytes:
+    """
+    Encode and write a payload as an image, with the arguments of ``render.render_bytes``.
+    """
+    symbol = encode(content)
+    border = 4 if border is None else border
+    if kind == 'png':
+        return to_png(symbol, scale, border, dark, light)
+    if kind == 'svg':
+        return to_svg(symbol, scale, border, dark, light)
+    raise ValueError(f"Invalid image kind {kind!r}, expected one of ('png', 'svg')")
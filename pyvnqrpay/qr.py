@@ -1,11 +1,17 @@
 # pylint: disable=missing-module-docstring
+import dataclasses
 import os
 from decimal import Decimal
 from enum import Enum
-from typing import Tuple, Union
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from pyvnqrpay import providers
-from pyvnqrpay.data_class import Merchant, Provider, QRCode, AdditionalData, Consumer
-from pyvnqrpay.utils import make_crc16
+from pyvnqrpay.data_class import DATA_CLASSES, FROZEN_DATA_CLASSES, FrozenQRCode, Merchant, Provider, QRCode, \
+    AdditionalData, Consumer
+from pyvnqrpay.schema import CONST, ByteStep, FieldSpec, Step, attribute_getter, compile_byte_layout, compile_layout, \
+    run_byte_layout, run_layout
+from pyvnqrpay.tracing import traced
+from pyvnqrpay.utils import Crc16State, make_crc16, verify_crc16
 
 
 class FieldID(str, Enum):  # pylint: disable=missing-class-docstring
@@ -72,6 +78,274 @@ def slide_field_data(content: str) -> Tuple[str, str, str]:
     return field_id, value, content[4 + length:]
 
 
+class DecodeError(ValueError):
+    """
+    Raised when a QR code string is not a well-formed sequence of EMVCo fields.
+    """
+
+
+CRC_HEADER = f'{FieldID.CRC.value}04'
+CRC_HEADER_BYTES = CRC_HEADER.encode()
+
+VIETQR_PROVIDER_LAYOUT = FieldSpec(providers.VietQRProvider.FIELD_ID.value, 'provider', children=(
+    FieldSpec(providers.Field.GUID.value, 'provider.guid', const=providers.VietQRProvider.GUID.value),
+    FieldSpec(providers.Field.DATA.value, 'consumer', children=(
+        FieldSpec(providers.VietQRConsumerID.BANK_BIN.value, 'consumer.bank_bin'),
+        FieldSpec(providers.VietQRConsumerID.BANK_NUMBER.value, 'consumer.bank_number'),
+    )),
+    FieldSpec(providers.Field.SERVICE.value, 'provider.service'),
+))
+
+VNPAY_PROVIDER_LAYOUT = FieldSpec(providers.VNPayProvider.FIELD_ID.value, 'provider', children=(
+    FieldSpec(providers.Field.GUID.value, 'provider.guid', const=providers.VNPayProvider.GUID.value),
+    FieldSpec(providers.Field.DATA.value, 'merchant.id'),
+    FieldSpec(providers.Field.SERVICE.value, 'provider.service'),
+))
+
+# provider templates by GUID, to encode
+PROVIDER_LAYOUTS: Dict[str, FieldSpec] = {
+    providers.VietQRProvider.GUID.value: VIETQR_PROVIDER_LAYOUT,
+    providers.VNPayProvider.GUID.value: VNPAY_PROVIDER_LAYOUT,
+}
+
+# provider template field IDs, to decode, the first one found in this order wins
+PROVIDER_FIELD_IDS = (VNPAY_PROVIDER_LAYOUT.tag, VIETQR_PROVIDER_LAYOUT.tag)
+
+ADDITIONAL_DATA_LAYOUT = FieldSpec(FieldID.ADDITIONAL_DATA.value, 'additional_data', children=(
+    FieldSpec(AdditionalDataID.BILL_NUMBER.value, 'additional_data.bill_number'),
+    FieldSpec(AdditionalDataID.MOBILE_NUMBER.value, 'additional_data.mobile_number'),
+    FieldSpec(AdditionalDataID.STORE_LABEL.value, 'additional_data.store'),
+    FieldSpec(AdditionalDataID.LOYALTY_NUMBER.value, 'additional_data.loyalty_number'),
+    FieldSpec(AdditionalDataID.REFERENCE_LABEL.value, 'additional_data.reference'),
+    FieldSpec(AdditionalDataID.CUSTOMER_LABEL.value, 'additional_data.customer_label'),
+    FieldSpec(AdditionalDataID.TERMINAL_LABEL.value, 'additional_data.terminal'),
+    FieldSpec(AdditionalDataID.PURPOSE_OF_TRANSACTION.value, 'additional_data.purpose'),
+    FieldSpec(AdditionalDataID.ADDITIONAL_CONSUMER_DATA_REQUEST.value, 'additional_data.data_request'),
+))
+
+
+def qrcode_layout(provider: Optional[FieldSpec]) -> Tuple[FieldSpec, ...]:
+    """
+    Get the layout of the fields of a QR code, in order, without the CRC field.
+
+    Args:
+        provider (Optional[FieldSpec]): The provider template, omitted when None.
+
+    Returns:
+        Tuple[FieldSpec, ...]: The layout. ``version`` and ``currency`` default to the configuration values of the
+        same names.
+    """
+    return (
+        FieldSpec(FieldID.VERSION.value, 'version', default_from='version'),
+        FieldSpec(FieldID.INIT_METHOD.value, 'init_method'),
+        *((provider,) if provider is not None else ()),
+        FieldSpec(FieldID.CATEGORY.value, 'category'),
+        FieldSpec(FieldID.CURRENCY.value, 'currency', default_from='currency'),
+        FieldSpec(FieldID.AMOUNT.value, 'amount'),
+        FieldSpec(FieldID.TIP_AND_FEE_TYPE.value, 'tip_and_fee_type'),
+        FieldSpec(FieldID.TIP_AND_FEE_AMOUNT.value, 'tip_and_fee_amount'),
+        FieldSpec(FieldID.TIP_AND_FEE_PERCENT.value, 'tip_and_fee_percent'),
+        FieldSpec(FieldID.NATION.value, 'nation', default='VN'),
+        FieldSpec(FieldID.MERCHANT_NAME.value, 'merchant.name'),
+        FieldSpec(FieldID.CITY.value, 'city'),
+        FieldSpec(FieldID.ZIP_CODE.value, 'zip_code'),
+        ADDITIONAL_DATA_LAYOUT,
+    )
+
+
+def provider_layout(guid: str, field_id: str) -> Optional[FieldSpec]:
+    """
+    Get the provider template of a provider GUID, in the field of the given ID.
+
+    Unknown providers only get their GUID and service encoded, and an invalid field ID omits the template.
+    """
+    if len(field_id) != 2:
+        return None
+    layout = PROVIDER_LAYOUTS.get(guid)
+    if layout is None:
+        return FieldSpec(field_id, 'provider', children=(
+            FieldSpec(providers.Field.GUID.value, 'provider.guid', const=guid),
+            FieldSpec(providers.Field.SERVICE.value, 'provider.service'),
+        ))
+    return layout if layout.tag == field_id else dataclasses.replace(layout, tag=field_id)
+
+
+# top-level fields by field ID, to decode, provider templates aside
+DECODE_FIELDS: Dict[str, FieldSpec] = {
+    **{spec.tag: spec for spec in qrcode_layout(None)},
+    FieldID.CRC.value: FieldSpec(FieldID.CRC.value, 'crc'),
+}
+
+PROVIDER_NAMES: Dict[str, str] = {
+    providers.VietQRProvider.GUID.value: providers.VietQRProvider.NAME.value,
+    providers.VNPayProvider.GUID.value: providers.VNPayProvider.NAME.value,
+}
+
+
+def iter_field_data(content: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[str, int, int]]:
+    """
+    Walk the fields of ``content[start:end]`` by index, without copying the remaining content.
+
+    Args:
+        content (str): The QR code string.
+        start (int): The offset of the first field header.
+        end (Optional[int]): The offset right after the last field, defaults to the end of the content.
+
+    Yields:
+        Tuple[str, int, int]: The field ID, the offset of its value and the offset right after its value.
+
+    Raises:
+        DecodeError: If a field header is truncated, its length is not numeric or its value overflows ``end``.
+    """
+    if end is None:
+        end = len(content)
+    pos = start
+    while pos < end:
+        value_start = pos + 4
+        if value_start > end:
+            raise DecodeError(f'Truncated field header at offset {pos}')
+        length = content[pos + 2:value_start]
+        if not (length.isascii() and length.isdigit()):
+            raise DecodeError(f'Invalid field length {length!r} at offset {pos}')
+        value_end = value_start + int(length)
+        if value_end > end:
+            raise DecodeError(f'Field {content[pos:pos + 2]!r} at offset {pos} overflows its container')
+        yield content[pos:pos + 2], value_start, value_end
+        pos = value_end
+
+
+def index_field_data(content: str, start: int = 0, end: Optional[int] = None) -> Dict[str, Tuple[int, int]]:
+    """
+    Index the fields of ``content[start:end]`` by field ID.
+
+    Args:
+        content (str): The QR code string.
+        start (int): The offset of the first field header.
+        end (Optional[int]): The offset right after the last field, defaults to the end of the content.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: The value offsets of each field, keyed by field ID.
+    """
+    return {field_id: (value_start, value_end)
+            for field_id, value_start, value_end in iter_field_data(content, start, end)}
+
+
+def _decode_field(content: str, spec: FieldSpec, start: int, end: int, values: Dict[str, str],
+                  objects: List[str]) -> None:
+    """
+    Collect the value of the field at ``content[start:end]``, or of its children, by their source path.
+
+    Templates add the object they fill to ``objects``, fields missing from the layout are ignored.
+    """
+    if not spec.children:
+        if spec.source is not None:
+            values[spec.source] = content[start:end]
+        return
+    if spec.source is not None:
+        objects.append(spec.source)
+    children = spec.children_by_tag
+    for field_id, value_start, value_end in iter_field_data(content, start, end):
+        child = children.get(field_id)
+        if child is not None:
+            _decode_field(content, child, value_start, value_end, values, objects)
+
+
+def _decode_provider(content: str, field_id: str, start: int, end: int, values: Dict[str, str],
+                     objects: List[str]) -> None:
+    """
+    Collect the values of the provider template at ``content[start:end]``, laid out by its GUID.
+
+    The data of providers other than VietQR is read as the merchant ID, like VNPay.
+    """
+    provider_fields = index_field_data(content, start, end)
+    guid = content[slice(*provider_fields.get(providers.Field.GUID.value, (0, 0)))]
+    children = PROVIDER_LAYOUTS.get(guid, VNPAY_PROVIDER_LAYOUT).children_by_tag
+    objects.append('provider')
+    values['provider.field_id'] = field_id
+    values['provider.name'] = PROVIDER_NAMES.get(guid, '')
+    for child_id, (value_start, value_end) in provider_fields.items():
+        child = children.get(child_id)
+        if child is not None:
+            _decode_field(content, child, value_start, value_end, values, objects)
+
+
+@lru_cache(maxsize=None)
+def _required_fields(cls: type) -> Dict[str, str]:
+    """
+    Get empty values for the fields of a dataclass without default.
+    """
+    return {item.name: '' for item in dataclasses.fields(cls) if item.default is dataclasses.MISSING}
+
+
+@traced('decode')
+def str_to_qr(content: str, frozen: bool = False) -> Union[QRCode, FrozenQRCode]:
+    """
+    Decode a QR code string into a QRCode object.
+
+    Nested templates (provider tags 26/38 and additional data tag 62) are decoded by offsets into the same
+    string, so only leaf values are ever copied.
+
+    Args:
+        content (str): The QR code string, including the CRC field.
+        frozen (bool): Build the slotted, immutable variants (FrozenQRCode and friends) instead.
+
+    Returns:
+        Union[QRCode, FrozenQRCode]: The decoded QR code, with ``is_valid`` set when the CRC field is the last field
+        and matches.
+
+    Raises:
+        DecodeError: If the content is not a well-formed sequence of fields.
+    """
+    return fields_to_qr(content, index_field_data(content), frozen)
+
+
+def fields_to_qr(content: str, fields: Dict[str, Tuple[int, int]], frozen: bool = False) -> Union[QRCode, FrozenQRCode]:
+    """
+    Build a QRCode object from a QR code string and its fields indexed by ``index_field_data``.
+
+    The fields are mapped onto the QRCode attributes by the same layout used to encode them.
+
+    Args:
+        content (str): The QR code string, including the CRC field.
+        fields (Dict[str, Tuple[int, int]]): The value offsets of the top-level fields, keyed by field ID.
+        frozen (bool): Build the slotted, immutable variants (FrozenQRCode and friends) instead.
+
+    Returns:
+        Union[QRCode, FrozenQRCode]: The decoded QR code.
+
+    Raises:
+        DecodeError: If a nested template is not a well-formed sequence of fields.
+    """
+    classes = FROZEN_DATA_CLASSES if frozen else DATA_CLASSES
+    values: Dict[str, str] = {}
+    objects: List[str] = []
+    for field_id, (start, end) in fields.items():
+        spec = DECODE_FIELDS.get(field_id)
+        if spec is not None:
+            _decode_field(content, spec, start, end, values, objects)
+    for field_id in PROVIDER_FIELD_IDS:
+        if field_id in fields:
+            _decode_provider(content, field_id, *fields[field_id], values, objects)
+            break
+
+    attributes: Dict[str, Any] = {}
+    nested: Dict[str, Dict[str, str]] = {name: {} for name in objects}
+    for path, value in values.items():
+        name, _, attribute = path.partition('.')
+        if attribute:
+            nested.setdefault(name, {})[attribute] = value
+        else:
+            attributes[name] = value
+    for name, object_values in nested.items():
+        cls = getattr(classes, name)
+        attributes[name] = cls(**{**_required_fields(cls), **object_values})
+
+    crc = fields.get(FieldID.CRC.value)
+    attributes['is_valid'] = crc is not None and crc[1] == len(content) and crc[1] - crc[0] == 4 and \
+        verify_crc16(content)
+    return classes.qr_code(**attributes)
+
+
 def create_vietqr_data(amount: Union[int, float, Decimal], service: str, consumer: Consumer, addtional_data: AdditionalData) -> QRCode:
     """
     Create a VietQR code based on the provided amount, service, consumer, and additional data.
@@ -135,6 +409,168 @@ def create_vnpayar_data(amount: Union[int, float, Decimal], merchant: Merchant,
     )
 
 
+@lru_cache(maxsize=None)
+def compile_qrcode_layout(guid: str, field_id: str, version: str, currency: str) -> Tuple[Step, ...]:
+    """
+    Compile the layout of the QR codes of a provider, once per provider and configuration.
+    """
+    return compile_layout(qrcode_layout(provider_layout(guid, field_id)), {'version': version, 'currency': currency})
+
+
+@lru_cache(maxsize=None)
+def compile_qrcode_byte_layout(guid: str, field_id: str, version: str, currency: str) -> Tuple[ByteStep, ...]:
+    """
+    Compile the layout of the QR codes of a provider for the bytes path, once per provider and configuration.
+    """
+    return compile_byte_layout(compile_qrcode_layout(guid, field_id, version, currency))
+
+
+class PayloadEncoder:
+    """
+    Encode QRCode objects into QR code strings.
+
+    The configuration is resolved once, and each provider layout is compiled once into steps where the constant
+    fields (version, provider GUID, default currency) are already encoded, so each payload only encodes its own
+    values and is built with a single join.
+    """
+
+    def __init__(self, version: Optional[str] = None, currency: Optional[str] = None):
+        self.version = version or os.getenv('QRCODE_VERSION', '01')
+        # 704 is VND
+        self.currency = currency or os.getenv('DEFAULT_CURRENCY', '704')
+        # reused by encode_bytes, an encoder is not meant to be shared between threads
+        self.buffer = bytearray()
+
+    @property
+    def config(self) -> Dict[str, str]:
+        """
+        The configuration values of the layouts.
+        """
+        return {'version': self.version, 'currency': self.currency}
+
+    def layout(self, provider: Optional[Provider]) -> Tuple[FieldSpec, ...]:
+        """
+        Get the layout of the QR codes of a provider.
+        """
+        return qrcode_layout(provider_layout(provider.guid, provider.field_id) if provider else None)
+
+    def steps(self, provider: Optional[Provider]) -> Tuple[Step, ...]:
+        """
+        Get the compiled layout of the QR codes of a provider.
+        """
+        guid, field_id = (provider.guid, provider.field_id) if provider else ('', '')
+        return compile_qrcode_layout(guid, field_id, self.version, self.currency)
+
+    @traced('encode')
+    def encode(self, qr_code: QRCode) -> str:
+        """
+        Build the QR code string of a QRCode object.
+
+        Args:
+            qr_code (QRCode): The QRCode object containing the data for building the QR code.
+
+        Returns:
+            str: The complete QR code string including the CRC checksum.
+        """
+        content = run_layout(self.steps(qr_code.provider), qr_code) + CRC_HEADER
+        return content + make_crc16(content)
+
+    def encode_into(self, qr_code: QRCode, buffer: bytearray) -> bytearray:
+        """
+        Write the UTF-8 encoded QR code string of a QRCode object into a buffer, replacing its content.
+
+        The fields are written straight into the buffer and the CRC is computed from it, so no intermediate string
+        is built.
+
+        Args:
+            qr_code (QRCode): The QRCode object containing the data for building the QR code.
+            buffer (bytearray): The buffer to write to, its allocation is reused across payloads.
+
+        Returns:
+            bytearray: The buffer, holding ``self.encode(qr_code).encode()``.
+        """
+        provider = qr_code.provider
+        guid, field_id = (provider.guid, provider.field_id) if provider else ('', '')
+        del buffer[:]
+        run_byte_layout(compile_qrcode_byte_layout(guid, field_id, self.version, self.currency), qr_code, buffer)
+        buffer += CRC_HEADER_BYTES
+        buffer += b'%04X' % Crc16State().update(buffer).value
+        return buffer
+
+    @traced('encode')
+    def encode_bytes(self, qr_code: QRCode) -> bytes:
+        """
+        Build the UTF-8 encoded QR code string of a QRCode object, through the reused buffer of the encoder.
+
+        Args:
+            qr_code (QRCode): The QRCode object containing the data for building the QR code.
+
+        Returns:
+            bytes: The complete QR code string including the CRC checksum, ready for ``render.render_bytes``.
+        """
+        return bytes(self.encode_into(qr_code, self.buffer))
+
+
+TEMPLATE_VARIABLES = ('amount', 'additional_data.bill_number', 'additional_data.purpose')
+
+
+class QRTemplate:
+    """
+    A QR code compiled for repeated rendering where only the amount, bill number and purpose change.
+
+    Every other field is encoded once, when the template is created, and the CRC is checkpointed after the fields
+    before the amount so each render only walks the variable tail.
+    """
+
+    def __init__(self, steps: Tuple[Step, ...], defaults: Dict[str, Any], head_crc: Optional[Crc16State] = None):
+        if steps and steps[0][0] == CONST:
+            self.head, self.tail_steps = steps[0][1], steps[1:]
+        else:
+            self.head, self.tail_steps = '', steps
+        # the CRC state after the head, given when it was precomputed, e.g. by store.ConsumerStore
+        self.head_crc = head_crc if head_crc is not None else Crc16State().update(self.head.encode())
+        self.defaults = defaults
+
+    @classmethod
+    def from_qrcode(cls, base: QRCode, encoder: Optional[PayloadEncoder] = None) -> 'QRTemplate':
+        """
+        Compile a template from a QRCode object.
+
+        Args:
+            base (QRCode): The QRCode object holding the invariant fields and the default variable fields.
+            encoder (Optional[PayloadEncoder]): The encoder to resolve the configuration with.
+
+        Returns:
+            QRTemplate: The compiled template.
+        """
+        encoder = encoder or PayloadEncoder()
+        steps = compile_layout(encoder.layout(base.provider), encoder.config, base, TEMPLATE_VARIABLES)
+        return cls(steps, {source: attribute_getter(source)(base) for source in TEMPLATE_VARIABLES})
+
+    @traced('encode')
+    def render(self, amount: Union[int, float, Decimal, str, None] = None, bill_number: Optional[str] = None,
+               purpose: Optional[str] = None) -> str:
+        """
+        Build the QR code string with the given variable fields.
+
+        Args:
+            amount (Union[int, float, Decimal, str, None]): The amount, defaults to the amount of the base QR code.
+            bill_number (Optional[str]): The bill number, defaults to the bill number of the base QR code.
+            purpose (Optional[str]): The purpose of transaction, defaults to the purpose of the base QR code.
+
+        Returns:
+            str: The complete QR code string including the CRC checksum.
+        """
+        defaults = self.defaults
+        tail = run_layout(self.tail_steps, {
+            'amount': defaults['amount'] if amount is None else amount,
+            'additional_data.bill_number': defaults['additional_data.bill_number'] if bill_number is None
+            else bill_number,
+            'additional_data.purpose': defaults['additional_data.purpose'] if purpose is None else purpose,
+        }) + CRC_HEADER
+        return self.head + tail + self.head_crc.copy().update(tail.encode()).hexdigest()
+
+
 def qr_to_str(qr_code: QRCode) -> str:
     """
     Build a QR code string based on the provided QRCode object and its associated data fields.
@@ -145,51 +581,43 @@ def qr_to_str(qr_code: QRCode) -> str:
     Returns:
         str: The complete QR code string including the CRC checksum.
     """
-    version = combine_field_data(FieldID.VERSION.value, os.getenv('QRCODE_VERSION', '01'))
-    init_method = combine_field_data(FieldID.INIT_METHOD.value, qr_code.init_method)
-    guid = combine_field_data(FieldID.PROVIDER_FIELD_GUID.value, qr_code.provider.guid)
-
-    if qr_code.provider.guid == providers.VietQRProvider.GUID.value:
-        bank_bin = combine_field_data(providers.VietQRConsumerID.BANK_BIN.value, qr_code.consumer.bank_bin)
-        bank_number = combine_field_data(providers.VietQRConsumerID.BANK_NUMBER.value, qr_code.consumer.bank_number)
-        provider_content_data = bank_bin + bank_number
-    elif qr_code.provider.guid == providers.VNPayProvider.GUID.value:
-        # this may raise error, we can catch it outside
-        provider_content_data = qr_code.merchant.id
-    else:
-        provider_content_data = ''
-    provider = combine_field_data(providers.Field.DATA.value, provider_content_data)
-    service = combine_field_data(providers.Field.SERVICE.value, qr_code.provider.service)
-    provider_data = combine_field_data(qr_code.provider.field_id, guid + provider + service)
-
-    category = combine_field_data(FieldID.CATEGORY.value, qr_code.category)
-    # 704 is VND
-    currency = combine_field_data(FieldID.CURRENCY.value, qr_code.currency or os.getenv('DEFAULT_CURRENCY', '704'))
-    amount = combine_field_data(FieldID.AMOUNT.value, str(qr_code.amount))
-    tip_and_fee_type = combine_field_data(FieldID.TIP_AND_FEE_TYPE.value, qr_code.tip_and_fee_type)
-    tip_and_fee_amount = combine_field_data(FieldID.TIP_AND_FEE_AMOUNT.value, qr_code.tip_and_fee_amount)
-    tip_and_fee_percent = combine_field_data(FieldID.TIP_AND_FEE_PERCENT.value, qr_code.tip_and_fee_percent)
-    nation = combine_field_data(FieldID.NATION.value, qr_code.nation or 'VN')
-    merchant_name = combine_field_data(FieldID.MERCHANT_NAME.value, qr_code.merchant.name)
-    city = combine_field_data(FieldID.CITY.value, qr_code.city)
-    zip_code = combine_field_data(FieldID.ZIP_CODE.value, qr_code.zip_code)
-
-    bill_number = combine_field_data(AdditionalDataID.BILL_NUMBER, qr_code.additional_data.bill_number)
-    mobile_number = combine_field_data(AdditionalDataID.MOBILE_NUMBER, qr_code.additional_data.mobile_number)
-    store_label = combine_field_data(AdditionalDataID.STORE_LABEL, qr_code.additional_data.store)
-    loyalty_number = combine_field_data(AdditionalDataID.LOYALTY_NUMBER, qr_code.additional_data.loyalty_number)
-    reference = combine_field_data(AdditionalDataID.REFERENCE_LABEL, qr_code.additional_data.reference)
-    customer_label = combine_field_data(AdditionalDataID.CUSTOMER_LABEL, qr_code.additional_data.customer_label)
-    termial = combine_field_data(AdditionalDataID.TERMINAL_LABEL, qr_code.additional_data.terminal)
-    purpose = combine_field_data(AdditionalDataID.PURPOSE_OF_TRANSACTION, qr_code.additional_data.purpose)
-    data_request = combine_field_data(AdditionalDataID.ADDITIONAL_CONSUMER_DATA_REQUEST,
-                                      qr_code.additional_data.data_request)
-
-    additional_data_content = bill_number + mobile_number + store_label + \
-        loyalty_number + reference + customer_label + termial + purpose + data_request
-    additional_data = combine_field_data(FieldID.ADDITIONAL_DATA.value, additional_data_content)
-
-    content = version + init_method + provider_data + category + currency + amount + tip_and_fee_type + tip_and_fee_amount + \
-        tip_and_fee_percent + nation + merchant_name + city + zip_code + additional_data + FieldID.CRC.value + '04'
-    crc = make_crc16(content)
-    return content + crc
+    return PayloadEncoder().encode(qr_code)
+
+
+def qr_to_str_many(qr_codes: Iterable[QRCode]) -> Iterator[str]:
+    """
+    Build the QR code strings of many QRCode objects, resolving the configuration only once.
+
+    Args:
+        qr_codes (Iterable[QRCode]): The QRCode objects containing the data for building the QR codes.
+
+    Yields:
+        str: The complete QR code string of each QRCode object, in order.
+    """
+    return map(PayloadEncoder().encode, qr_codes)
+
+
+def qr_to_bytes(qr_code: QRCode) -> bytes:
+    """
+    Build the UTF-8 encoded QR code string of a QRCode object, without building the string.
+
+    Args:
+        qr_code (QRCode): The QRCode object containing the data for building the QR code.
+
+    Returns:
+        bytes: The complete QR code string including the CRC checksum, equal to ``qr_to_str(qr_code).encode()``.
+    """
+    return PayloadEncoder().encode_bytes(qr_code)
+
+
+def qr_to_bytes_many(qr_codes: Iterable[QRCode]) -> Iterator[bytes]:
+    """
+    Build the UTF-8 encoded QR code strings of many QRCode objects, reusing a single buffer.
+
+    Args:
+        qr_codes (Iterable[QRCode]): The QRCode objects containing the data for building the QR codes.
+
+    Yields:
+        bytes: The complete QR code string of each QRCode object, in order.
+    """
+    return map(PayloadEncoder().encode_bytes, qr_codes)
@@ -0,0 +1,149 @@
+"""
+Render QR codes into images with segno
+"""
+import io
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Tuple, Union
+import segno
+from pyvnqrpay.data_class import QRCode
+from pyvnqrpay.qr import PayloadEncoder
+from pyvnqrpay.tracing import traced
+
+RENDER_KINDS = ('png', 'svg')
+
+# 'segno', or 'matrix' for the built-in encoder and 1-bit writers of pyvnqrpay.matrix, which require NumPy
+RENDERER = os.getenv('PYVNQRPAY_RENDERER', 'segno')
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    """
+    The options of ``render_bytes``, hashable so they can be part of cache keys.
+    """
+    kind: str = 'png'
+    scale: int = 10
+    border: Optional[int] = None
+    dark: str = '#000'
+    light: str = '#fff'
+
+
+@traced('render')
+def render_bytes(content: Union[str, bytes], kind: str = 'png', scale: int = 10, border: Optional[int] = None,
+                 dark: str = '#000', light: str = '#fff') -> bytes:
+    """
+    Render a QR code string into an image.
+
+    Args:
+        content (Union[str, bytes]): The QR code string, or its UTF-8 encoding from ``qr.qr_to_bytes``, which
+            renders the same image without encoding the string again when it is ASCII.
+        kind (str): The image format, 'png' or 'svg'.
+        scale (int): The size of a module in pixels.
+        border (Optional[int]): The quiet zone in modules, defaults to the QR code standard.
+        dark (str): The color of the dark modules.
+        light (str): The color of the light modules.
+
+    Returns:
+        bytes: The image content.
+    """
+    if kind not in RENDER_KINDS:
+        raise ValueError(f'Invalid image kind {kind!r}, expected one of {RENDER_KINDS}')
+    if isinstance(content, bytes) and not content.isascii():
+        # segno encodes strings as ISO-8859-1 when possible, keep the symbols of both paths the same
+        content = content.decode()
+    if RENDERER == 'matrix':
+        from pyvnqrpay import matrix  # pylint: disable=import-outside-toplevel
+        return matrix.render_bytes(content, kind=kind, scale=scale, border=border, dark=dark, light=light)
+    buffer = io.BytesIO()
+    segno.make(content, micro=False).save(buffer, kind=kind, scale=scale, border=border, dark=dark, light=light)
+    return buffer.getvalue()
+
+
+def _render_chunk(start: int, items: List[Union[QRCode, str]], out_dir: str, kind: str, scale: int,
+                  border: Optional[int]) -> List[str]:
+    """
+    Encode and render a chunk of QR codes into ``out_dir``, named by their index. Runs in a worker process.
+    """
+    encoder = PayloadEncoder()
+    paths = []
+    for index, item in enumerate(items, start=start):
+        content = item if isinstance(item, str) else encoder.encode_bytes(item)
+        path = os.path.join(out_dir, f'{index:06d}.{kind}')
+        with open(path, 'wb') as image:
+            image.write(render_bytes(content, kind=kind, scale=scale, border=border))
+        paths.append(path)
+    return paths
+
+
+def render_many(qr_codes: Iterable[Union[QRCode, str]], out_dir: Union[str, os.PathLike], kind: str = 'png',
+                scale: int = 10, border: Optional[int] = None, workers: Optional[int] = None, chunk_size: int = 256,
+                on_progress: Optional[Callable[[int, float], None]] = None) -> Iterator[Path]:
+    """
+    Encode and render many QR codes into image files across a pool of processes.
+
+    The QR codes are sent to the workers by chunks, with a bounded number of chunks in flight, and the paths are
+    yielded back in the input order. Files are named by the index of their QR code, e.g. ``000042.png``.
+
+    Args:
+        qr_codes (Iterable[Union[QRCode, str]]): The QRCode objects, or already encoded QR code strings.
+        out_dir (Union[str, os.PathLike]): The directory to write the images to, created if missing.
+        kind (str): The image format, 'png' or 'svg'.
+        scale (int): The size of a module in pixels.
+        border (Optional[int]): The quiet zone in modules, defaults to the QR code standard.
+        workers (Optional[int]): The number of worker processes, defaults to the number of CPUs. Use 0 to render in
+            the current process.
+        chunk_size (int): The number of QR codes sent to a worker at once.
+        on_progress (Optional[Callable[[int, float], None]]): Called after each chunk with the number of rendered
+            images and the elapsed seconds, e.g. to report the throughput.
+
+    Yields:
+        Path: The path of each rendered image, in order.
+    """
+    if kind not in RENDER_KINDS:
+        raise ValueError(f'Invalid image kind {kind!r}, expected one of {RENDER_KINDS}')
+    out_dir = os.fspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.perf_counter()
+    done = 0
+
+    def report(paths: List[str]) -> Iterator[Path]:
+        nonlocal done
+        done += len(paths)
+        if on_progress is not None:
+            on_progress(done, time.perf_counter() - started)
+        return map(Path, paths)
+
+    chunks = _chunked(iter(qr_codes), chunk_size)
+    if workers == 0:
+        for start, chunk in chunks:
+            yield from report(_render_chunk(start, chunk, out_dir, kind, scale, border))
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future] = deque()
+        # keep every worker busy without reading the whole input ahead
+        max_pending = 2 * workers
+        for start, chunk in chunks:
+            pending.append(executor.submit(_render_chunk, start, chunk, out_dir, kind, scale, border))
+            if len(pending) >= max_pending:
+                yield from report(pending.popleft().result())
+        while pending:
+            yield from report(pending.popleft().result())
+
+
+def _chunked(items: Iterator, size: int) -> Iterator[Tuple[int, List]]:
+    """
+    Split an iterator into lists of ``size`` items, along with the index of their first item.
+    """
+    start = 0
+    chunk = list(islice(items, size))
+    while chunk:
+        yield start, chunk
+        start += len(chunk)
+        chunk = list(islice(items, size))
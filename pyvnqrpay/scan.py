@@ -0,0 +1,653 @@
+"""
+Decode QR code images, e.g. screenshots or scans of payment codes, back into QRCode objects
+
+The pipeline is the one of camera scanners, written with NumPy and without any native decoder: the image is
+binarized against the mean of its neighborhood, the three finder patterns are found by their 1:1:3:1:1 runs across
+rows and columns, the module grid is sampled through the transform they define (refined by the bottom right
+alignment pattern when there is one), and the modules are read by ``matrix.decode`` with Reed-Solomon error
+correction. The payload is then decoded by ``qr.str_to_qr``, which also checks its CRC.
+
+PNG images are read by a built-in reader, other formats like JPEG require Pillow. Requires NumPy.
+
+Usage:
+    python -m pyvnqrpay.scan images/*.png
+"""
+import argparse
+import io
+import os
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import numpy
+from numpy.lib.stride_tricks import sliding_window_view
+from pyvnqrpay import matrix
+from pyvnqrpay.data_class import FrozenQRCode, QRCode
+from pyvnqrpay.qr import DecodeError, str_to_qr
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# the number of samples per pixel of each PNG color type: gray, RGB, palette, gray and alpha, RGBA
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+# the bit depths allowed with each PNG color type
+PNG_BIT_DEPTHS = {0: (1, 2, 4, 8, 16), 2: (8, 16), 3: (1, 2, 4, 8), 4: (8, 16), 6: (8, 16)}
+
+# the module widths of a finder pattern across its center: dark, light, dark, light, dark
+FINDER_RATIOS = (1, 1, 3, 1, 1)
+
+# the alignment pattern, 5x5 modules around its center
+ALIGNMENT_PATTERN = numpy.array([
+    [1, 1, 1, 1, 1],
+    [1, 0, 0, 0, 1],
+    [1, 0, 1, 0, 1],
+    [1, 0, 0, 0, 1],
+    [1, 1, 1, 1, 1],
+], dtype=bool)
+
+ImageSource = Union[str, os.PathLike, bytes]
+
+# (x, y, module size, number of rows crossing it)
+FinderPattern = Tuple[float, float, float, int]
+
+
+class ScanResult(NamedTuple):
+    """
+    The QR code decoded from an image, or why it could not be.
+    """
+    path: str
+    content: Optional[str] = None
+    qr_code: Union[QRCode, FrozenQRCode, None] = None
+    error: Optional[str] = None
+
+
+def _paeth(left: int, up: int, up_left: int) -> int:
+    estimate = left + up - up_left
+    distance_left, distance_up, distance_up_left = abs(estimate - left), abs(estimate - up), abs(estimate - up_left)
+    if distance_left <= distance_up and distance_left <= distance_up_left:
+        return left
+    return up if distance_up <= distance_up_left else up_left
+
+
+def _unfilter(rows: numpy.ndarray, bpp: int) -> numpy.ndarray:
+    """
+    Reverse the PNG filter of each row. Sub and Up are vectorized, Average and Paeth depend on the pixel on the left
+    and are reversed byte by byte.
+    """
+    height, stride = rows.shape[0], rows.shape[1] - 1
+    pixels = numpy.zeros((height + 1, stride), dtype=numpy.uint8)
+    for index in range(height):
+        kind, line, prior = rows[index, 0], rows[index, 1:], pixels[index]
+        if kind == 0:
+            pixels[index + 1] = line
+        elif kind == 1:
+            # Raw(x) = Sub(x) + Raw(x - bpp) is a running sum of every bpp-th byte, modulo 256
+            padded = numpy.zeros(-(-stride // bpp) * bpp, dtype=numpy.uint8)
+            padded[:stride] = line
+            pixels[index + 1] = numpy.cumsum(padded.reshape(-1, bpp), axis=0, dtype=numpy.uint8).ravel()[:stride]
+        elif kind == 2:
+            pixels[index + 1] = line + prior
+        elif kind in (3, 4):
+            raw = bytearray(line.tobytes())
+            up = prior.tobytes()
+            for position in range(stride):
+                left = raw[position - bpp] if position >= bpp else 0
+                if kind == 3:
+                    raw[position] = (raw[position] + ((left + up[position]) >> 1)) & 0xFF
+                else:
+                    up_left = up[position - bpp] if position >= bpp else 0
+                    raw[position] = (raw[position] + _paeth(left, up[position], up_left)) & 0xFF
+            pixels[index + 1] = numpy.frombuffer(bytes(raw), dtype=numpy.uint8)
+        else:
+            raise ValueError(f'Invalid PNG filter type {kind}')
+    return pixels[1:]
+
+
+def read_png(data: bytes) -> numpy.ndarray:
+    """
+    Read a non-interlaced PNG image into grayscale.
+
+    Every color type and bit depth is supported. Transparent pixels are composed onto white, like the background of
+    most viewers.
+
+    Args:
+        data (bytes): The content of the PNG file.
+
+    Returns:
+        numpy.ndarray: The luma of the pixels, as a ``(height, width)`` array of uint8.
+
+    Raises:
+        ValueError: If the data is not a PNG image, it is truncated or corrupt, or it is interlaced.
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError('Not a PNG image')
+    position, header, palette, idat = len(PNG_SIGNATURE), b'', b'', []
+    while position + 8 <= len(data):
+        length, kind = struct.unpack('>I4s', data[position:position + 8])
+        chunk = data[position + 8:position + 8 + length]
+        if kind == b'IHDR':
+            header = chunk
+        elif kind == b'PLTE':
+            palette = chunk
+        elif kind == b'IDAT':
+            idat.append(chunk)
+        elif kind == b'IEND':
+            break
+        position += 12 + length
+    if len(header) != 13:
+        raise ValueError('Invalid PNG image, missing IHDR chunk')
+    width, height, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', header)
+    if interlace:
+        raise ValueError('Interlaced PNG images are not supported')
+    if bit_depth not in PNG_BIT_DEPTHS.get(color_type, ()):
+        raise ValueError(f'Invalid PNG image, unsupported color type {color_type} with bit depth {bit_depth}')
+    channels = PNG_CHANNELS[color_type]
+    bits_per_pixel = channels * bit_depth
+    stride = (width * bits_per_pixel + 7) // 8
+    try:
+        decompressed = zlib.decompress(b''.join(idat))
+    except zlib.error as exc:
+        raise ValueError(f'Invalid PNG image, {exc}') from exc
+    if len(decompressed) < height * (stride + 1):
+        raise ValueError('Invalid PNG image, truncated image data')
+    raw = numpy.frombuffer(decompressed, dtype=numpy.uint8)[:height * (stride + 1)]
+    pixels = _unfilter(raw.reshape(height, stride + 1), max(1, bits_per_pixel // 8))
+
+    if bit_depth == 1:
+        samples = numpy.unpackbits(pixels, axis=1)[:, :width, None]
+    elif bit_depth < 8:
+        bits = numpy.unpackbits(pixels, axis=1).reshape(height, -1, bit_depth)
+        samples = bits.dot(1 << numpy.arange(bit_depth - 1, -1, -1)).astype(numpy.uint8)[:, :width, None]
+    elif bit_depth == 16:
+        samples = (pixels.view('>u2') >> 8).reshape(height, width, channels)
+    else:
+        samples = pixels.reshape(height, width, channels)
+
+    if color_type == 3:
+        colors = numpy.frombuffer(palette.ljust(768, b'\0'), dtype=numpy.uint8).reshape(256, 3)
+        samples = colors[samples[:, :, 0]]
+    elif bit_depth < 8:
+        samples = samples * (255 // ((1 << bit_depth) - 1))
+    samples = samples.astype(numpy.float32)
+    if samples.shape[2] in (3, 4):
+        gray = samples[:, :, 0] * 0.299 + samples[:, :, 1] * 0.587 + samples[:, :, 2] * 0.114
+    else:
+        gray = samples[:, :, 0]
+    if samples.shape[2] in (2, 4):
+        alpha = samples[:, :, -1] / 255
+        gray = gray * alpha + 255 * (1 - alpha)
+    return numpy.rint(gray).astype(numpy.uint8)
+
+
+def read_image(source: ImageSource) -> numpy.ndarray:
+    """
+    Read an image into grayscale, non-interlaced PNG with the built-in reader and any other format with Pillow.
+
+    Args:
+        source (ImageSource): The path of the image, or its content.
+
+    Returns:
+        numpy.ndarray: The luma of the pixels, as a ``(height, width)`` array of uint8.
+
+    Raises:
+        ImportError: If the image is not a PNG image and Pillow is not installed.
+    """
+    if isinstance(source, bytes):
+        data = source
+    else:
+        with open(source, 'rb') as file:
+            data = file.read()
+    if data.startswith(PNG_SIGNATURE) and data[28:29] == b'\0':
+        return read_png(data)
+    try:
+        from PIL import Image  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:  # pragma: no cover
+        raise ImportError('Reading interlaced PNG, JPEG and other images requires Pillow, '
+                          'install it with `pip install pillow`') from exc
+    with Image.open(io.BytesIO(data)) as image:
+        if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+            background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+            image = Image.alpha_composite(background, image.convert('RGBA'))
+        return numpy.asarray(image.convert('L'), dtype=numpy.uint8)
+
+
+def otsu_threshold(gray: numpy.ndarray) -> int:
+    """
+    Get the threshold separating the dark and light pixels of an image with the largest between-class variance.
+    """
+    histogram = numpy.bincount(gray.ravel(), minlength=256).astype(numpy.float64)
+    levels = numpy.arange(256)
+    weight = numpy.cumsum(histogram)
+    total = weight[-1]
+    mean = numpy.cumsum(histogram * levels)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        variance = (mean[-1] * weight - mean * total) ** 2 / (weight * (total - weight))
+    return int(numpy.nanargmax(variance[:-1])) + 1
+
+
+def binarize(gray: numpy.ndarray, block: Optional[int] = None, min_contrast: float = 24.0) -> numpy.ndarray:
+    """
+    Split the pixels of an image into dark and light.
+
+    The image is split into blocks, by default a fortieth of its smaller side, and a pixel is dark when it is below
+    the mean of the 5x5 blocks around its own, which follows uneven lighting. Where the means of these blocks are
+    all close, e.g. in a blank area or inside a large dark one, the global Otsu threshold is used instead. Comparing
+    block means rather than pixels keeps sensor noise from passing for contrast.
+
+    Args:
+        gray (numpy.ndarray): The grayscale image.
+        block (Optional[int]): The size of a block in pixels.
+        min_contrast (float): The difference between the block means under which a neighborhood is flat.
+
+    Returns:
+        numpy.ndarray: The boolean matrix of the pixels, True for dark.
+    """
+    height, width = gray.shape
+    size = block or max(8, min(height, width) // 40)
+    rows, columns = -(-height // size), -(-width // size)
+    padded = numpy.pad(gray, ((0, rows * size - height), (0, columns * size - width)), mode='edge')
+    means = padded.reshape(rows, size, columns, size).mean(axis=(1, 3), dtype=numpy.float32)
+    neighborhoods = sliding_window_view(numpy.pad(means, 2, mode='edge'), (5, 5))
+    threshold = neighborhoods.mean(axis=(2, 3))
+    flat = neighborhoods.max(axis=(2, 3)) - neighborhoods.min(axis=(2, 3)) < min_contrast
+    if flat.any():
+        threshold[flat] = otsu_threshold(gray)
+    return gray < numpy.repeat(numpy.repeat(threshold, size, axis=0), size, axis=1)[:height, :width]
+
+
+def _runs(lines: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Run-length encode each row of a boolean matrix, into the row, start, length and value of every run.
+    """
+    width = lines.shape[1]
+    change = numpy.ones(lines.shape, dtype=bool)
+    change[:, 1:] = lines[:, 1:] != lines[:, :-1]
+    line, start = numpy.nonzero(change)
+    end = numpy.empty_like(start)
+    end[:-1] = start[1:]
+    end[-1] = width
+    end[numpy.append(line[1:] != line[:-1], True)] = width
+    return line, start, end - start, lines[line, start]
+
+
+def _finder_windows(lengths: numpy.ndarray) -> numpy.ndarray:
+    # lengths is (n, 5), a window matches when each run is within half a module of its ratio
+    module = lengths.sum(axis=1) / 7
+    expected = module[:, None] * numpy.array(FINDER_RATIOS)
+    tolerance = module[:, None] / 2 * numpy.array(FINDER_RATIOS)
+    return (module >= 1) & (numpy.abs(lengths - expected) < tolerance).all(axis=1)
+
+
+def _cross_check(line: numpy.ndarray, center: float, module: float) -> Optional[Tuple[float, float]]:
+    """
+    Check the runs of a line around a position for a finder pattern, returning its center and width.
+    """
+    low = max(0, int(center - 7 * module))
+    segment = line[low:int(center + 7 * module) + 1]
+    starts = numpy.concatenate(([0], numpy.flatnonzero(segment[1:] != segment[:-1]) + 1, [len(segment)]))
+    index = int(numpy.searchsorted(starts, center - low, side='right')) - 1
+    if index < 2 or index + 3 >= len(starts) or not segment[starts[index]]:
+        return None
+    lengths = numpy.diff(starts[index - 2:index + 4])
+    size = int(lengths.sum()) / 7
+    for length, ratio in zip(lengths.tolist(), FINDER_RATIOS):
+        if abs(length - ratio * size) >= ratio * size / 2:
+            return None
+    return low + starts[index] + lengths[2] / 2, float(7 * size)
+
+
+def find_finder_patterns(binary: numpy.ndarray) -> List[FinderPattern]:
+    """
+    Find the finder patterns of an image.
+
+    Rows are scanned for dark, light, dark, light, dark runs in a 1:1:3:1:1 ratio, all at once, then each match is
+    checked across its column and again across its row to locate its center. Matches within a finder pattern found
+    already are counted instead.
+
+    Args:
+        binary (numpy.ndarray): The binarized image.
+
+    Returns:
+        List[FinderPattern]: The finder patterns, with the most crossed rows first.
+    """
+    height = binary.shape[0]
+    step = max(1, height // 400)
+    rows = numpy.arange(0, height, step)
+    line, start, length, dark = _runs(binary[rows])
+    if len(line) < 5:
+        return []
+    first = numpy.arange(len(line) - 4)
+    first = first[(line[first] == line[first + 4]) & dark[first]]
+    windows = numpy.stack([length[first + offset] for offset in range(5)], axis=1).astype(numpy.float64)
+    first = first[_finder_windows(windows)]
+
+    patterns: List[List[float]] = []
+    for index in first:
+        y = float(rows[line[index]]) + 0.5
+        x = start[index + 2] + length[index + 2] / 2
+        module = float(length[index:index + 5].sum()) / 7
+        known = next((pattern for pattern in patterns if abs(pattern[0] - x) < 2 * pattern[2]
+                      and abs(pattern[1] - y) < 3.5 * pattern[2] and abs(pattern[2] - module) < pattern[2] / 2), None)
+        if known is not None:
+            known[3] += 1
+            continue
+        vertical = _cross_check(binary[:, int(x)], y, module)
+        if vertical is None or abs(vertical[1] - 7 * module) > 3.5 * module:
+            continue
+        y = vertical[0]
+        horizontal = _cross_check(binary[int(y)], x, module)
+        if horizontal is None:
+            continue
+        x = horizontal[0]
+        patterns.append([x, y, (vertical[1] + horizontal[1]) / 14, 1])
+    patterns.sort(key=lambda pattern: -pattern[3])
+    return [(x, y, module, count) for x, y, module, count in patterns]
+
+
+def _distance(first: FinderPattern, second: FinderPattern) -> float:
+    return float(numpy.hypot(first[0] - second[0], first[1] - second[1]))
+
+
+def select_finder_patterns(patterns: List[FinderPattern],
+                           candidates: int = 8) -> Optional[Tuple[FinderPattern, FinderPattern, FinderPattern]]:
+    """
+    Pick the three finder patterns of a symbol: about the same size, with the top left one at the right angle of an
+    isosceles triangle.
+
+    Args:
+        patterns (List[FinderPattern]): The finder patterns, most likely first.
+        candidates (int): The number of most likely patterns to combine.
+
+    Returns:
+        Optional[Tuple[FinderPattern, FinderPattern, FinderPattern]]: The top left, top right and bottom left
+        patterns, in the orientation of the symbol, or None if no combination fits.
+    """
+    best, best_score = None, 0.25
+    patterns = patterns[:candidates]
+    for i, first in enumerate(patterns):
+        for j in range(i + 1, len(patterns)):
+            for k in range(j + 1, len(patterns)):
+                triple = (first, patterns[j], patterns[k])
+                modules = [pattern[2] for pattern in triple]
+                if max(modules) > 1.5 * min(modules):
+                    continue
+                # the top left pattern is opposite the longest side
+                sides = [_distance(triple[(corner + 1) % 3], triple[(corner + 2) % 3]) for corner in range(3)]
+                corner = int(numpy.argmax(sides))
+                top_left, second, third = triple[corner], triple[(corner + 1) % 3], triple[(corner + 2) % 3]
+                legs = _distance(top_left, second), _distance(top_left, third)
+                if min(legs) < 12 * max(modules):
+                    continue
+                score = abs(legs[0] - legs[1]) / max(legs) + abs(sides[corner] - numpy.hypot(*legs)) / sides[corner]
+                if score < best_score:
+                    # in image coordinates, y down, the top right pattern is clockwise from the bottom left one
+                    cross = (second[0] - top_left[0]) * (third[1] - top_left[1]) \
+                        - (second[1] - top_left[1]) * (third[0] - top_left[0])
+                    best = (top_left, second, third) if cross > 0 else (top_left, third, second)
+                    best_score = score
+    return best
+
+
+def _dimensions(top_left: FinderPattern, top_right: FinderPattern, bottom_left: FinderPattern) -> List[int]:
+    """
+    Estimate the number of modules of a side from the distance between the finder patterns, the closest valid
+    dimension first.
+    """
+    module = (top_left[2] + top_right[2] + bottom_left[2]) / 3
+    modules = (_distance(top_left, top_right) + _distance(top_left, bottom_left)) / 2 / module + 7
+    estimate = 4 * round((modules - 17) / 4) + 17
+    return [size for size in (estimate, estimate - 4, estimate + 4, estimate - 8, estimate + 8) if 21 <= size <= 177]
+
+
+def _homography(source: numpy.ndarray, target: numpy.ndarray) -> numpy.ndarray:
+    # the 3x3 projective transform mapping 4 source points onto 4 target points
+    equations, values = [], []
+    for (u, v), (x, y) in zip(source, target):
+        equations.append([u, v, 1, 0, 0, 0, -u * x, -v * x])
+        equations.append([0, 0, 0, u, v, 1, -u * y, -v * y])
+        values.extend((x, y))
+    return numpy.append(numpy.linalg.solve(numpy.array(equations), numpy.array(values)), 1).reshape(3, 3)
+
+
+def _project(transform: numpy.ndarray, u: numpy.ndarray, v: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    w = transform[2, 0] * u + transform[2, 1] * v + transform[2, 2]
+    return (transform[0, 0] * u + transform[0, 1] * v + transform[0, 2]) / w, \
+        (transform[1, 0] * u + transform[1, 1] * v + transform[1, 2]) / w
+
+
+def _sample(binary: numpy.ndarray, x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+    height, width = binary.shape
+    return binary[numpy.clip(y.astype(numpy.intp), 0, height - 1), numpy.clip(x.astype(numpy.intp), 0, width - 1)]
+
+
+def _find_alignment(binary: numpy.ndarray, transform: numpy.ndarray, size: int) -> Optional[Tuple[float, float]]:
+    """
+    Search the bottom right alignment pattern around where the finder patterns put it, a quarter module at a time.
+    """
+    center = size - 6.5
+    offsets = numpy.arange(-16, 17) / 4
+    du, dv = numpy.meshgrid(offsets, offsets)
+    du, dv = du.ravel()[:, None], dv.ravel()[:, None]
+    grid_v, grid_u = numpy.mgrid[-2:3, -2:3]
+    u = center + du + grid_u.ravel()[None, :]
+    v = center + dv + grid_v.ravel()[None, :]
+    x, y = _project(transform, u, v)
+    matches = (_sample(binary, x, y) == ALIGNMENT_PATTERN.ravel()).sum(axis=1)
+    if matches.max() < 24:
+        return None
+    # the middle of the best offsets, as the pattern matches over about a module
+    best = numpy.flatnonzero(matches == matches.max())
+    return _project(transform, center + float(du[best].mean()), center + float(dv[best].mean()))
+
+
+def sample_grid(binary: numpy.ndarray, top_left: FinderPattern, top_right: FinderPattern,
+                bottom_left: FinderPattern, size: int) -> Iterator[numpy.ndarray]:
+    """
+    Sample the modules of a symbol at the center of each module.
+
+    The three finder pattern centers define an affine transform of the grid. For symbols with alignment patterns,
+    the bottom right one is located with it and then a projective transform is sampled first, which also follows a
+    tilted camera.
+
+    Args:
+        binary (numpy.ndarray): The binarized image.
+        top_left (FinderPattern): The top left finder pattern.
+        top_right (FinderPattern): The top right finder pattern.
+        bottom_left (FinderPattern): The bottom left finder pattern.
+        size (int): The number of modules of a side.
+
+    Yields:
+        numpy.ndarray: The ``(size, size)`` boolean matrices of the modules, from the most accurate transform.
+    """
+    corners = numpy.array([[3.5, 3.5], [size - 3.5, 3.5], [3.5, size - 3.5]])
+    points = numpy.array([top_left[:2], top_right[:2], bottom_left[:2]])
+    # the affine transform is the projective one through a fourth point completing the parallelogram
+    affine = _homography(numpy.vstack([corners, [[size - 3.5, size - 3.5]]]),
+                         numpy.vstack([points, [points[1] + points[2] - points[0]]]))
+    v, u = numpy.mgrid[0:size, 0:size] + 0.5
+    if size > 21:
+        alignment = _find_alignment(binary, affine, size)
+        if alignment is not None:
+            projective = _homography(numpy.vstack([corners, [[size - 6.5, size - 6.5]]]),
+                                     numpy.vstack([points, [alignment]]))
+            yield _sample(binary, *_project(projective, u, v))
+    yield _sample(binary, *_project(affine, u, v))
+
+
+def decode_modules(gray: numpy.ndarray) -> bytes:
+    """
+    Find and read the payload of the QR code of a grayscale image.
+
+    Args:
+        gray (numpy.ndarray): The grayscale image.
+
+    Returns:
+        bytes: The payload, see ``matrix.decode``.
+
+    Raises:
+        ValueError: If no QR code is found, or it cannot be read.
+    """
+    binary = binarize(gray)
+    finders = select_finder_patterns(find_finder_patterns(binary))
+    if finders is None:
+        raise ValueError('No QR code found')
+    error = ValueError('QR code found but could not be read')
+    for size in _dimensions(*finders):
+        for modules in sample_grid(binary, *finders, size):
+            # a mirrored image has its modules transposed
+            for candidate in (modules, modules.T):
+                try:
+                    return matrix.decode(candidate)
+                except ValueError as exc:
+                    error = exc
+    raise error
+
+
+def decode_image(source: ImageSource) -> str:
+    """
+    Read the QR code string of an image.
+
+    Args:
+        source (ImageSource): The path of the image, or its content.
+
+    Returns:
+        str: The QR code string, UTF-8 or else ISO-8859-1 decoded.
+
+    Raises:
+        ValueError: If no QR code is found, or it cannot be read.
+    """
+    payload = decode_modules(read_image(source))
+    try:
+        return payload.decode()
+    except UnicodeDecodeError:
+        return payload.decode('iso-8859-1')
+
+
+def scan_image(path: Union[str, os.PathLike], frozen: bool = False) -> ScanResult:
+    """
+    Decode the QR code of an image into a QRCode object, catching the errors into the result.
+
+    Args:
+        path (Union[str, os.PathLike]): The path of the image.
+        frozen (bool): Build the slotted, immutable variants (FrozenQRCode and friends) instead.
+
+    Returns:
+        ScanResult: The QR code string and object, ``qr_code.is_valid`` telling whether its CRC matches, or the
+        error when the image cannot be read, it has no readable QR code or its string is not well-formed.
+    """
+    path = os.fspath(path)
+    try:
+        content = decode_image(path)
+    except (ImportError, OSError, ValueError) as exc:
+        # e.g. a JPEG image without Pillow installed, which should not stop a batch
+        return ScanResult(path, error=str(exc))
+    try:
+        return ScanResult(path, content, str_to_qr(content, frozen))
+    except DecodeError as exc:
+        return ScanResult(path, content, error=str(exc))
+
+
+def _scan_chunk(paths: List[str], frozen: bool) -> List[ScanResult]:
+    """
+    Scan a chunk of images. Runs in a worker process.
+    """
+    return [scan_image(path, frozen) for path in paths]
+
+
+def decode_images(paths: Iterable[Union[str, os.PathLike]], workers: Optional[int] = None, frozen: bool = False,
+                  chunk_size: int = 16,
+                  on_progress: Optional[Callable[[int, float], None]] = None) -> Iterator[ScanResult]:
+    """
+    Decode the QR codes of many images across a pool of processes.
+
+    The paths are sent to the workers by chunks, with a bounded number of chunks in flight, and the results are
+    yielded back in the input order.
+
+    Args:
+        paths (Iterable[Union[str, os.PathLike]]): The paths of the images.
+        workers (Optional[int]): The number of worker processes, defaults to the number of CPUs. Use 0 to decode in
+            the current process.
+        frozen (bool): Build the slotted, immutable variants (FrozenQRCode and friends) instead.
+        chunk_size (int): The number of images sent to a worker at once.
+        on_progress (Optional[Callable[[int, float], None]]): Called after each chunk with the number of scanned
+            images and the elapsed seconds, e.g. to report the throughput.
+
+    Yields:
+        ScanResult: The result of each image, in order.
+    """
+    started = time.perf_counter()
+    done = 0
+
+    def report(results: List[ScanResult]) -> List[ScanResult]:
+        nonlocal done
+        done += len(results)
+        if on_progress is not None:
+            on_progress(done, time.perf_counter() - started)
+        return results
+
+    chunks = _chunked(map(os.fspath, paths), chunk_size)
+    if workers == 0:
+        for chunk in chunks:
+            yield from report(_scan_chunk(chunk, frozen))
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Future] = deque()
+        # keep every worker busy without listing every path ahead
+        max_pending = 2 * workers
+        for chunk in chunks:
+            pending.append(executor.submit(_scan_chunk, chunk, frozen))
+            if len(pending) >= max_pending:
+                yield from report(pending.popleft().result())
+        while pending:
+            yield from report(pending.popleft().result())
+
+
+def _chunked(items: Iterator[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m pyvnqrpay.scan', description=__doc__.splitlines()[1])
+    parser.add_argument('images', nargs='+', help='PNG images, or any format Pillow reads when it is installed')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes, defaults to the number of CPUs, 0 to run inline')
+    parser.add_argument('--quiet', action='store_true', help='do not report the progress')
+    args = parser.parse_args(argv)
+
+    def report(done: int, elapsed: float) -> None:
+        if not args.quiet:
+            print(f'\r{done:,} images, {done / elapsed:,.1f} images/s', end='', file=sys.stderr)
+
+    started = time.perf_counter()
+    scanned = failed = invalid = 0
+    for result in decode_images(args.images, args.workers, on_progress=report):
+        scanned += 1
+        if result.qr_code is None:
+            failed += 1
+            print(f'{result.path}\t\t{result.error}')
+            continue
+        if not result.qr_code.is_valid:
+            invalid += 1
+        print(f'{result.path}\t{result.content}\t{"" if result.qr_code.is_valid else "invalid CRC"}')
+    elapsed = time.perf_counter() - started
+    if not args.quiet:
+        print(file=sys.stderr)
+    rate = scanned / elapsed if elapsed else 0
+    print(f'Scanned {scanned:,} images in {elapsed:.1f}s, {rate:,.1f} images/s, {failed:,} unreadable, '
+          f'{invalid:,} with an invalid CRC', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
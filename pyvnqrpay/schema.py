@@ -0,0 +1,235 @@
+"""
+Declarative layout of EMVCo fields, compiled into flat lists of encoder steps
+
+A layout is a tuple of FieldSpec, each field either reads its value from an attribute path of the object being
+encoded, e.g. ``consumer.bank_bin``, or nests child fields like the provider and additional data templates.
+Compiling a layout folds every value known up front (constants, configuration and, for templates, the invariant
+fields of a base QR code) into precomputed segments, so encoding only walks the remaining steps.
+"""
+from dataclasses import dataclass, field
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Collection, List, Mapping, Optional, Tuple
+
+# Step kinds: a precomputed segment, a field read at encode time, the start and the end of a nested template
+CONST, FIELD, OPEN, CLOSE = range(4)
+
+# (kind, text, getter, default): text is the segment for CONST and the field ID otherwise
+Step = Tuple[int, str, Optional[Callable[[Any], Any]], str]
+
+# (kind, data, getter, default, length): data is the encoded text of a step, length the characters of a segment
+ByteStep = Tuple[int, bytes, Optional[Callable[[Any], Any]], str, int]
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    An EMVCo field of a layout.
+
+    Attributes:
+        tag (str): The field ID.
+        source (Optional[str]): The attribute path holding the value of a field. For a template, the object it fills
+            when decoding.
+        children (Tuple[FieldSpec, ...]): The nested fields of a template.
+        default (str): The value used when the source is empty.
+        default_from (Optional[str]): The configuration key holding the value used when the source is empty.
+        const (Optional[str]): A value known when compiling, e.g. the GUID of the provider of the layout.
+    """
+    tag: str
+    source: Optional[str] = None
+    children: Tuple['FieldSpec', ...] = ()
+    default: str = ''
+    default_from: Optional[str] = None
+    const: Optional[str] = None
+    children_by_tag: Mapping[str, 'FieldSpec'] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'children_by_tag', {child.tag: child for child in self.children})
+
+
+def encode_field(field_id: str, value: str) -> str:
+    """
+    Encode a field, like ``qr.combine_field_data`` with a field ID known to be valid.
+    """
+    return f'{field_id}{len(value):02}{value}' if value else ''
+
+
+def attribute_getter(path: str) -> Callable[[Any], Any]:
+    """
+    Build a getter of a dotted attribute path, returning None when an intermediate object is None.
+    """
+    getter = attrgetter(path)
+
+    def none_safe_getter(obj: Any) -> Any:
+        try:
+            return getter(obj)
+        except AttributeError:
+            return None
+    return none_safe_getter
+
+
+def _value(value: Any, default: str) -> str:
+    if value is None or value == '':
+        return default
+    return value if isinstance(value, str) else str(value)
+
+
+def compile_layout(layout: Tuple[FieldSpec, ...], config: Mapping[str, str], base: Any = None,
+                   variables: Collection[str] = ()) -> Tuple[Step, ...]:
+    """
+    Compile a layout into a flat tuple of steps for ``run_layout``.
+
+    Args:
+        layout (Tuple[FieldSpec, ...]): The fields to encode, in order.
+        config (Mapping[str, str]): The configuration values of ``FieldSpec.default_from``.
+        base (Any): When given, every field not in ``variables`` is read from it once, while compiling.
+        variables (Collection[str]): With ``base``, the sources left to read at encode time. They are then read as
+            keys of a mapping rather than attributes.
+
+    Returns:
+        Tuple[Step, ...]: The steps, with consecutive precomputed segments merged.
+    """
+    steps: List[Step] = []
+    for spec in layout:
+        _compile_spec(spec, config, base, variables, steps)
+    return _merge_constants(steps)
+
+
+def _compile_spec(spec: FieldSpec, config: Mapping[str, str], base: Any, variables: Collection[str],
+                  steps: List[Step]) -> None:
+    default = config[spec.default_from] if spec.default_from else spec.default
+    if spec.children:
+        start = len(steps)
+        for child in spec.children:
+            _compile_spec(child, config, base, variables, steps)
+        children = steps[start:]
+        del steps[start:]
+        if all(kind == CONST for kind, _, _, _ in children):
+            steps.append((CONST, encode_field(spec.tag, ''.join(text for _, text, _, _ in children)), None, ''))
+        else:
+            steps.append((OPEN, spec.tag, None, ''))
+            steps.extend(children)
+            steps.append((CLOSE, spec.tag, None, ''))
+    elif spec.const is not None:
+        steps.append((CONST, encode_field(spec.tag, spec.const), None, ''))
+    elif spec.source is None:
+        steps.append((CONST, encode_field(spec.tag, default), None, ''))
+    elif base is None:
+        steps.append((FIELD, spec.tag, attrgetter(spec.source), default))
+    elif spec.source in variables:
+        steps.append((FIELD, spec.tag, itemgetter(spec.source), default))
+    else:
+        steps.append((CONST, encode_field(spec.tag, _value(attribute_getter(spec.source)(base), default)), None, ''))
+
+
+def _merge_constants(steps: List[Step]) -> Tuple[Step, ...]:
+    merged: List[Step] = []
+    for step in steps:
+        if step[0] == CONST:
+            if not step[1]:
+                continue
+            if merged and merged[-1][0] == CONST:
+                merged[-1] = (CONST, merged[-1][1] + step[1], None, '')
+                continue
+        merged.append(step)
+    return tuple(merged)
+
+
+def run_layout(steps: Tuple[Step, ...], obj: Any) -> str:
+    """
+    Encode an object with compiled steps.
+
+    Args:
+        steps (Tuple[Step, ...]): The steps from ``compile_layout``.
+        obj (Any): The object to read the fields from, or the mapping of variables of a layout compiled with a base.
+
+    Returns:
+        str: The encoded fields. Empty fields and templates are omitted.
+    """
+    parts: List[str] = []
+    starts: List[int] = []
+    for kind, text, getter, default in steps:
+        if kind == FIELD:
+            try:
+                value = getter(obj)
+            except AttributeError:
+                # an intermediate object of the path is None
+                value = None
+            if value is None or value == '':
+                value = default
+            elif not isinstance(value, str):
+                value = str(value)
+            if value:
+                parts.append(f'{text}{len(value):02}{value}')
+        elif kind == CONST:
+            parts.append(text)
+        elif kind == OPEN:
+            starts.append(len(parts))
+        else:
+            start = starts.pop()
+            inner = ''.join(parts[start:])
+            del parts[start:]
+            if inner:
+                parts.append(f'{text}{len(inner):02}{inner}')
+    return ''.join(parts)
+
+
+def compile_byte_layout(steps: Tuple[Step, ...]) -> Tuple[ByteStep, ...]:
+    """
+    Encode the segments and field IDs of compiled steps for ``run_byte_layout``.
+    """
+    return tuple((kind, text.encode(), getter, default, len(text)) for kind, text, getter, default in steps)
+
+
+def run_byte_layout(steps: Tuple[ByteStep, ...], obj: Any, buffer: bytearray) -> int:
+    """
+    Encode an object with compiled steps, appending the UTF-8 encoded fields to a buffer.
+
+    Field lengths count characters, like ``run_layout``, so the output is ``run_layout(...).encode()``. Templates
+    are written with a placeholder length that is patched in place once their fields are written.
+
+    Args:
+        steps (Tuple[ByteStep, ...]): The steps from ``compile_byte_layout``.
+        obj (Any): The object to read the fields from, or the mapping of variables of a layout compiled with a base.
+        buffer (bytearray): The buffer to append to.
+
+    Returns:
+        int: The number of characters appended.
+    """
+    chars = 0
+    starts: List[Tuple[int, int]] = []
+    for kind, data, getter, default, length in steps:
+        if kind == FIELD:
+            try:
+                value = getter(obj)
+            except AttributeError:
+                value = None
+            if value is None or value == '':
+                value = default
+            elif not isinstance(value, str):
+                value = str(value)
+            if value:
+                header = b'%02d' % len(value)
+                buffer += data
+                buffer += header
+                buffer += value.encode()
+                chars += len(data) + len(header) + len(value)
+        elif kind == CONST:
+            buffer += data
+            chars += length
+        elif kind == OPEN:
+            starts.append((len(buffer), chars))
+            buffer += data
+            buffer += b'00'
+            chars += len(data) + 2
+        else:
+            start, start_chars = starts.pop()
+            inner = chars - start_chars - len(data) - 2
+            if inner:
+                header = b'%02d' % inner
+                position = start + len(data)
+                buffer[position:position + 2] = header
+                chars += len(header) - 2
+            else:
+                del buffer[start:]
+                chars = start_chars
+    return chars
@@ -0,0 +1,345 @@
+"""
+Local HTTP service to encode, decode and render QR codes
+
+Run it with ``python -m pyvnqrpay.server --port 8000 --workers 4``.
+
+Endpoints, all taking and returning JSON unless noted. The POST endpoints also accept a JSON array of requests and
+answer with an array, to batch many requests in a round trip. Each request of a batch is answered by its result, or
+by ``{"error": "..."}`` when it is invalid, so that it does not fail the others:
+
+- ``POST /encode``: ``{"provider": "vietqr", "amount": 10000, "service": "", "consumer": {"bank_bin": "970436",
+  "bank_number": "0011001"}, "additional_data": {"purpose": "..."}}`` or ``{"provider": "vnpay", "amount": 10000,
+  "merchant": {"id": "...", "name": "..."}, "additional_data": {...}}``, answers ``{"content": "..."}``.
+- ``POST /decode``: ``{"content": "..."}``, answers the decoded QR code.
+- ``POST /render?kind=png&scale=10&border=4``: an encode request or ``{"content": "..."}``, answers the image. Not
+  batched.
+- ``GET /metrics``: request counters and latency histograms of the whole server, summed over its worker processes,
+  in Prometheus text format.
+"""
+import argparse
+import dataclasses
+import itertools
+import json
+import mmap
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from pyvnqrpay import qr
+from pyvnqrpay.cache import RenderCache
+from pyvnqrpay.render import RENDER_KINDS
+from pyvnqrpay.validate import Validator, format_errors
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+# the endpoints and statuses of the metrics, as answered by QRRequestHandler
+ENDPOINTS = ('/decode', '/encode', '/metrics', '/render', 'unknown')
+STATUSES = (200, 400, 404, 500)
+
+# the largest module size in pixels and quiet zone in modules of a rendered image
+MAX_SCALE = 50
+MAX_BORDER = 20
+
+VALIDATOR = Validator()
+
+
+class BadRequest(ValueError):
+    """
+    Raised when a request can not be served, answered with a 400 status.
+    """
+
+
+class Metrics:
+    """
+    Request counters and latency histograms, per endpoint and status.
+
+    The histograms are kept in an anonymous shared memory map rather than in the process memory, so that the worker
+    processes forked by ``serve`` record into the same histograms, and ``/metrics`` answers the totals of the whole
+    server whichever worker serves it. Labelling the series by worker instead would still only report one worker per
+    scrape, as the workers share the listening socket. With ``shared``, the lock is shared with the forked processes.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, shared: bool = False):
+        self.buckets = buckets
+        self._offsets = {key: index * (len(buckets) + 2)
+                         for index, key in enumerate(itertools.product(ENDPOINTS, STATUSES))}
+        # per endpoint and status, the bucket counts, then the +Inf count and the sum of latencies
+        self._memory = mmap.mmap(-1, len(self._offsets) * (len(buckets) + 2) * 8)
+        self._values = memoryview(self._memory).cast('d')
+        self._lock = multiprocessing.Lock() if shared else threading.Lock()
+
+    def observe(self, endpoint: str, status: int, elapsed: float) -> None:
+        """
+        Record a served request.
+        """
+        offset = self._offsets[endpoint, status]
+        with self._lock:
+            self._values[offset + bisect_left(self.buckets, elapsed)] += 1
+            self._values[offset + len(self.buckets) + 1] += elapsed
+
+    def render(self) -> str:
+        """
+        Format the metrics in Prometheus text format.
+        """
+        lines = [
+            '# HELP pyvnqrpay_request_duration_seconds Latency of the served requests.',
+            '# TYPE pyvnqrpay_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            values = self._values.tolist()
+        for (endpoint, status), offset in self._offsets.items():
+            histogram = values[offset:offset + len(self.buckets) + 2]
+            if not any(histogram):
+                continue
+            labels = f'endpoint="{endpoint}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip([f'{bound:g}' for bound in self.buckets] + ['+Inf'], histogram):
+                cumulative += int(count)
+                lines.append(f'pyvnqrpay_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'pyvnqrpay_request_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}')
+            lines.append(f'pyvnqrpay_request_duration_seconds_count{{{labels}}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def request_to_qr(request: Dict[str, Any]) -> qr.QRCode:
+    """
+    Build a QRCode object from an encode request, with ``create_vietqr_data`` or ``create_vnpayar_data``.
+    """
+    if not isinstance(request, dict):
+        raise BadRequest('An encode request must be a JSON object')
+    try:
+        provider = str(request.get('provider', 'vietqr')).lower()
+        amount = request.get('amount', '')
+        additional_data = qr.AdditionalData(**request.get('additional_data', {}))
+        if provider == 'vietqr':
+            return qr.create_vietqr_data(amount, request.get('service', ''), qr.Consumer(**request['consumer']),
+                                         additional_data)
+        if provider == 'vnpay':
+            return qr.create_vnpayar_data(amount, qr.Merchant(**request['merchant']), additional_data)
+    except (KeyError, TypeError) as exc:
+        raise BadRequest(f'Invalid encode request: {exc!r}') from exc
+    raise BadRequest(f'Unknown provider {provider!r}, expected vietqr or vnpay')
+
+
+def encode(request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Serve an encode request, rejecting the fields that would not encode into a well-formed QR code string.
+    """
+    qr_code = request_to_qr(request)
+    errors = VALIDATOR.validate(qr_code)
+    if errors:
+        raise BadRequest(f'Invalid fields: {format_errors(errors)}')
+    return {'content': qr.qr_to_str(qr_code)}
+
+
+def decode(request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Serve a decode request.
+    """
+    if not isinstance(request, dict) or not isinstance(request.get('content'), str):
+        raise BadRequest('A decode request must be a JSON object with a content string')
+    try:
+        return dataclasses.asdict(qr.str_to_qr(request['content']))
+    except qr.DecodeError as exc:
+        raise BadRequest(str(exc)) from exc
+
+
+def serve_batch(handler: Callable[[Dict[str, Any]], Dict[str, Any]], requests: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Serve a batch of requests, answering each with its result, or with its error when it is invalid.
+    """
+    results = []
+    for request in requests:
+        try:
+            results.append(handler(request))
+        except BadRequest as exc:
+            results.append({'error': str(exc)})
+    return results
+
+
+class QRRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serve the endpoints on keep-alive connections.
+    """
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, Nagle would delay the body of keep-alive responses
+    disable_nagle_algorithm = True
+    server_version = 'pyvnqrpay'
+    metrics = Metrics()
+    render_cache = RenderCache()
+    json_endpoints: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {'/encode': encode, '/decode': decode}
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        started = time.perf_counter()
+        path = urlsplit(self.path).path
+        if path == '/metrics':
+            self._send(200, self.metrics.render().encode(), 'text/plain; version=0.0.4')
+        else:
+            self._send_json(404, {'error': f'Unknown endpoint {path}'})
+        self.metrics.observe(path if path == '/metrics' else 'unknown', self._status, time.perf_counter() - started)
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        endpoint = url.path if url.path in self.json_endpoints or url.path == '/render' else 'unknown'
+        try:
+            body = self._read_json()
+            if url.path == '/render':
+                self._render(body, parse_qs(url.query))
+            elif endpoint in self.json_endpoints:
+                handler = self.json_endpoints[endpoint]
+                result = serve_batch(handler, body) if isinstance(body, list) else handler(body)
+                self._send_json(200, result)
+            else:
+                self._send_json(404, {'error': f'Unknown endpoint {url.path}'})
+        except BadRequest as exc:
+            self._send_json(400, {'error': str(exc)})
+        except Exception as exc:  # pylint: disable=broad-except
+            # answer rather than drop the connection, and still record the request
+            self.log_error('Error serving %s: %r', self.path, exc)
+            self.close_connection = True
+            self._send_json(500, {'error': 'Internal server error'})
+        self.metrics.observe(endpoint, self._status, time.perf_counter() - started)
+
+    def _render(self, body: Any, query: Dict[str, List[str]]) -> None:
+        kind = query.get('kind', ['png'])[0]
+        if kind not in RENDER_KINDS:
+            raise BadRequest(f'Invalid image kind {kind!r}, expected one of {RENDER_KINDS}')
+        try:
+            scale = int(query.get('scale', ['10'])[0])
+            border = int(query['border'][0]) if 'border' in query else None
+        except ValueError as exc:
+            raise BadRequest(f'Invalid render options: {exc}') from exc
+        if not 1 <= scale <= MAX_SCALE:
+            raise BadRequest(f'Invalid scale {scale}, expected 1 to {MAX_SCALE}')
+        if border is not None and not 0 <= border <= MAX_BORDER:
+            raise BadRequest(f'Invalid border {border}, expected 0 to {MAX_BORDER}')
+        if isinstance(body, dict) and isinstance(body.get('content'), str):
+            content = body['content']
+        else:
+            content = encode(body)['content']
+        try:
+            image = self.render_cache.get(content, kind=kind, scale=scale, border=border)
+        except ValueError as exc:
+            # e.g. segno's DataOverflowError, when the content does not fit in a QR code
+            raise BadRequest(f'Can not render the content: {exc}') from exc
+        self._send(200, image, CONTENT_TYPES[kind])
+
+    def _read_json(self) -> Any:
+        try:
+            length = int(self.headers.get('Content-Length', '0'))
+        except ValueError as exc:
+            # the body can not be skipped, so the connection can not be reused
+            self.close_connection = True
+            raise BadRequest('Invalid Content-Length') from exc
+        if length < 0:
+            self.close_connection = True
+            raise BadRequest('Invalid Content-Length')
+        if length > MAX_BODY_SIZE:
+            self.close_connection = True
+            raise BadRequest('Request body too large')
+        try:
+            return json.loads(self.rfile.read(length) or b'null')
+        except ValueError as exc:
+            raise BadRequest(f'Invalid JSON: {exc}') from exc
+
+    def _send_json(self, status: int, data: Any) -> None:
+        self._send(status, json.dumps(data, ensure_ascii=False).encode(), 'application/json')
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self._status = status  # pylint: disable=attribute-defined-outside-init
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class QRServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server, which may serve a listening socket shared with other processes.
+    """
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], sock: Optional[socket.socket] = None, verbose: bool = False):
+        self.verbose = verbose
+        super().__init__(address, QRRequestHandler, bind_and_activate=sock is None)
+        if sock is not None:
+            self.socket.close()
+            self.socket = sock
+            self.server_address = sock.getsockname()
+            self.server_name, self.server_port = self.server_address[:2]
+
+
+def serve(host: str = '127.0.0.1', port: int = 8000, workers: int = 1, verbose: bool = False) -> None:
+    """
+    Serve until interrupted, with ``workers`` forked processes sharing the listening socket when above 1.
+    """
+    if workers <= 1 or not hasattr(os, 'fork'):
+        with QRServer((host, port), verbose=verbose) as server:
+            print(f'Serving on http://{host}:{server.server_address[1]}', file=sys.stderr)
+            server.serve_forever()
+        return
+
+    sock = socket.create_server((host, port), backlog=1024)
+    # created before forking, so that every worker records into it
+    QRRequestHandler.metrics = Metrics(shared=True)
+    print(f'Serving on http://{host}:{sock.getsockname()[1]} with {workers} workers', file=sys.stderr)
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            with QRServer((host, port), sock=sock, verbose=verbose) as server:
+                server.serve_forever()
+            os._exit(0)  # pylint: disable=protected-access
+        children.append(pid)
+    sock.close()
+
+    def stop(*_: Any) -> None:
+        raise KeyboardInterrupt
+
+    # stop the workers along with the parent
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        for pid in children:
+            os.waitpid(pid, 0)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m pyvnqrpay.server', description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of forked worker processes, defaults to the number of CPUs')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+    try:
+        serve(args.host, args.port, args.workers, args.verbose)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
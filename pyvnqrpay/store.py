@@ -0,0 +1,224 @@
+"""
+Persistent store of precomputed VietQR templates of consumer accounts
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple, Union
+from pyvnqrpay.data_class import AdditionalData, Consumer
+from pyvnqrpay.qr import TEMPLATE_VARIABLES, PayloadEncoder, QRTemplate, create_vietqr_data
+from pyvnqrpay.schema import CONST, attribute_getter, compile_layout
+from pyvnqrpay.utils import Crc16State
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS consumers (
+    bank_bin TEXT NOT NULL,
+    bank_number TEXT NOT NULL,
+    service TEXT NOT NULL,
+    version TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    head TEXT NOT NULL,
+    crc INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (bank_bin, bank_number, service, version, currency)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS consumers_last_used ON consumers (last_used);
+'''
+
+# (bank_bin, bank_number, service, version, currency)
+ConsumerKey = Tuple[str, str, str, str, str]
+
+
+class ConsumerStore:
+    """
+    An SQLite-backed LRU store of the VietQR template of each consumer account, for rendering its codes with
+    different amounts.
+
+    The head of a template, i.e. every field before the amount including the tag 38 consumer block, is encoded
+    once along with its CRC state and stored in ``path``. Worker processes opening the same file share the warmed
+    heads, also across restarts. Lookups go memory, then SQLite, then encode.
+
+    ``last_used`` is updated when a head is loaded from SQLite, not on memory hits, and the least recently used
+    heads are evicted once the store grows past ``max_entries``.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], max_entries: int = 1_000_000, memory_entries: int = 4096,
+                 service: str = '', encoder: Optional[PayloadEncoder] = None):
+        self.path = os.fspath(path)
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.encoder = encoder or PayloadEncoder()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        base = self._base(Consumer(bank_bin='', bank_number=''), service)
+        self.service = base.provider.service
+        # every field after the amount is the same for all consumers
+        steps = compile_layout(self.encoder.layout(base.provider), self.encoder.config, base, TEMPLATE_VARIABLES)
+        self._tail_steps = steps[1:] if steps and steps[0][0] == CONST else steps
+        self._defaults = {source: attribute_getter(source)(base) for source in TEMPLATE_VARIABLES}
+        # the base only has an amount to get the dynamic init method
+        self._defaults['amount'] = ''
+        self._entries: 'OrderedDict[ConsumerKey, QRTemplate]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._inserts = 0
+
+    @staticmethod
+    def _base(consumer: Consumer, service: str):
+        return create_vietqr_data('0', service, consumer, AdditionalData())
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection must not be used across a fork, each worker process opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def key(self, consumer: Consumer) -> ConsumerKey:
+        """
+        Get the key of the head of a consumer, which also depends on the configuration of the encoder.
+        """
+        return consumer.bank_bin, consumer.bank_number, self.service, self.encoder.version, self.encoder.currency
+
+    def template(self, consumer: Consumer) -> QRTemplate:
+        """
+        Get the template of a consumer account, encoding its head on a miss.
+
+        Args:
+            consumer (Consumer): The consumer bank account.
+
+        Returns:
+            QRTemplate: The template, rendering dynamic VietQR codes to the account.
+        """
+        key = self.key(consumer)
+        with self._lock:
+            template = self._entries.get(key)
+            if template is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return template
+
+            connection = self._connect()
+            row = connection.execute(
+                'SELECT head, crc FROM consumers WHERE bank_bin = ? AND bank_number = ? AND service = ? '
+                'AND version = ? AND currency = ?', key,
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                head, crc = self._encode_head(consumer)
+                self._insert(connection, [(*key, head, crc)])
+            else:
+                self.store_hits += 1
+                head, crc = row
+                connection.execute(
+                    'UPDATE consumers SET last_used = ? WHERE bank_bin = ? AND bank_number = ? AND service = ? '
+                    'AND version = ? AND currency = ?', (time.time(), *key),
+                )
+            template = QRTemplate(((CONST, head, None, ''), *self._tail_steps), self._defaults, Crc16State(crc))
+            self._entries[key] = template
+            if len(self._entries) > self.memory_entries:
+                self._entries.popitem(last=False)
+            return template
+
+    def render(self, consumer: Consumer, amount: Union[int, str, None] = None, bill_number: Optional[str] = None,
+               purpose: Optional[str] = None) -> str:
+        """
+        Build the QR code string of a payment to a consumer account. The arguments are the ones of
+        ``QRTemplate.render``.
+        """
+        return self.template(consumer).render(amount, bill_number, purpose)
+
+    def warm(self, consumers: Iterable[Consumer]) -> int:
+        """
+        Encode and store the heads of many consumers missing from the store, in a single transaction.
+
+        Args:
+            consumers (Iterable[Consumer]): The consumer bank accounts.
+
+        Returns:
+            int: The number of heads encoded.
+        """
+        with self._lock:
+            connection = self._connect()
+            stored = set(connection.execute(
+                'SELECT bank_bin, bank_number FROM consumers WHERE service = ? AND version = ? AND currency = ?',
+                (self.service, self.encoder.version, self.encoder.currency),
+            ).fetchall())
+            rows = []
+            for consumer in consumers:
+                if (consumer.bank_bin, consumer.bank_number) not in stored:
+                    stored.add((consumer.bank_bin, consumer.bank_number))
+                    rows.append((*self.key(consumer), *self._encode_head(consumer)))
+            self._insert(connection, rows)
+            self.misses += len(rows)
+            return len(rows)
+
+    def _encode_head(self, consumer: Consumer) -> Tuple[str, int]:
+        template = QRTemplate.from_qrcode(self._base(consumer, self.service), self.encoder)
+        return template.head, template.head_crc.value
+
+    def _insert(self, connection: sqlite3.Connection, rows: Iterable[Tuple]) -> None:
+        rows = [(*row, time.time()) for row in rows]
+        if not rows:
+            return
+        with connection:
+            connection.execute('BEGIN')
+            connection.executemany('INSERT OR REPLACE INTO consumers VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        self._inserts += len(rows)
+        # counting is a scan, so the size is only checked every 1% of the maximum
+        if self._inserts >= max(1, self.max_entries // 100):
+            self._inserts = 0
+            self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        count, = connection.execute('SELECT COUNT(*) FROM consumers').fetchone()
+        if count <= self.max_entries:
+            return
+        with connection:
+            connection.execute('BEGIN')
+            connection.execute(
+                'DELETE FROM consumers WHERE (bank_bin, bank_number, service, version, currency) IN ('
+                'SELECT bank_bin, bank_number, service, version, currency FROM consumers ORDER BY last_used LIMIT ?)',
+                (count - self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            count, = self._connect().execute('SELECT COUNT(*) FROM consumers').fetchone()
+            return count
+
+    def clear(self) -> None:
+        """
+        Empty the memory tier and reset the counters. The stored heads are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.store_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the counters of the store.
+        """
+        with self._lock:
+            return {
+                'memory_entries': len(self._entries),
+                'hits': self.hits,
+                'store_hits': self.store_hits,
+                'misses': self.misses,
+            }
+
+    def close(self) -> None:
+        """
+        Close the SQLite connection of the current process.
+        """
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
@@ -0,0 +1,182 @@
+"""
+Streaming decode of newline-delimited QR code strings
+"""
+import os
+import zlib
+from decimal import Decimal, InvalidOperation
+from typing import IO, Callable, Dict, Iterator, Optional, Tuple, Union
+from pyvnqrpay import providers
+from pyvnqrpay.data_class import FrozenQRCode, QRCode
+from pyvnqrpay.qr import DecodeError, FieldID, fields_to_qr, index_field_data
+from pyvnqrpay.tracing import traced
+
+CHUNK_SIZE = 1 << 16
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# A predicate receives a QR code string and its top-level field offsets, see ``qr.index_field_data``
+Predicate = Callable[[str, Dict[str, Tuple[int, int]]], bool]
+
+
+class LineDecodeError(DecodeError):
+    """
+    Raised, or yielded, when a line of a stream is not a well-formed QR code string.
+    """
+
+    def __init__(self, line_number: int, content: str, error: Exception):
+        super().__init__(f'Line {line_number}: {error}')
+        self.line_number = line_number
+        self.content = content
+        self.error = error
+
+
+def field_value(content: str, fields: Dict[str, Tuple[int, int]], field_id: str) -> str:
+    """
+    Get the raw value of a top-level field, or an empty string when the field is missing.
+    """
+    return content[slice(*fields.get(field_id, (0, 0)))]
+
+
+def by_provider(guid: str) -> Predicate:
+    """
+    Build a predicate accepting the QR code strings of the provider with the given GUID.
+    """
+    def predicate(content: str, fields: Dict[str, Tuple[int, int]]) -> bool:
+        for field_id in (providers.VNPayProvider.FIELD_ID.value, providers.VietQRProvider.FIELD_ID.value):
+            if field_id in fields:
+                provider_fields = index_field_data(content, *fields[field_id])
+                return field_value(content, provider_fields, providers.Field.GUID.value) == guid
+        return False
+    return predicate
+
+
+def amount_between(minimum: Union[int, Decimal, None] = None, maximum: Union[int, Decimal, None] = None) -> Predicate:
+    """
+    Build a predicate accepting the QR code strings whose amount is within the given inclusive range.
+    """
+    def predicate(content: str, fields: Dict[str, Tuple[int, int]]) -> bool:
+        try:
+            amount = Decimal(field_value(content, fields, FieldID.AMOUNT.value))
+        except InvalidOperation:
+            return False
+        if not amount.is_finite():
+            # NaN parses, but can not be compared, and Infinity is no amount either
+            return False
+        return (minimum is None or amount >= minimum) and (maximum is None or amount <= maximum)
+    return predicate
+
+
+def _iter_chunks(fileobj: IO, chunk_size: int) -> Iterator[Union[bytes, str]]:
+    """
+    Read a file by chunks, transparently decompressing gzip content.
+    """
+    # the first chunk holds the whole magic number, whatever the chunk size
+    chunk = fileobj.read(max(chunk_size, len(GZIP_MAGIC)))
+    if not isinstance(chunk, bytes) or not chunk.startswith(GZIP_MAGIC):
+        while chunk:
+            yield chunk
+            chunk = fileobj.read(chunk_size)
+        return
+
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    while chunk:
+        yield decompressor.decompress(chunk)
+        # a gzip file may hold several members
+        while decompressor.eof and decompressor.unused_data:
+            unused_data = decompressor.unused_data
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            yield decompressor.decompress(unused_data)
+        chunk = fileobj.read(chunk_size)
+    yield decompressor.flush()
+
+
+def _iter_lines(fileobj: IO, chunk_size: int) -> Iterator[Union[str, bytes]]:
+    """
+    Split a file into lines, reading it by chunks.
+
+    Binary content is split before it is decoded, so a multi-byte character split between chunks is whole again, and
+    the lines of a chunk are decoded at once as UTF-8. When a chunk does not decode, its lines are yielded as bytes,
+    to be decoded one by one with ``_text``.
+    """
+    rest: Union[str, bytes, None] = None
+    for chunk in _iter_chunks(fileobj, chunk_size):
+        lines = (rest + chunk if rest else chunk).split(b'\n' if isinstance(chunk, bytes) else '\n')
+        rest = lines.pop()
+        if lines and isinstance(chunk, bytes):
+            try:
+                lines = b'\n'.join(lines).decode('utf-8').split('\n')
+            except UnicodeDecodeError:
+                pass
+        yield from lines
+    if rest:
+        yield rest
+
+
+def _text(line: Union[str, bytes]) -> str:
+    """
+    Decode a line as UTF-8, a truncated or invalid byte sequence making it malformed.
+    """
+    if isinstance(line, str):
+        return line
+    try:
+        return line.decode('utf-8')
+    except UnicodeDecodeError as exc:
+        raise DecodeError(f'Invalid UTF-8: {exc}') from exc
+
+
+@traced('decode')
+def _decode_line(line: str, predicate: Optional[Predicate], frozen: bool) -> Union[QRCode, FrozenQRCode, None]:
+    """
+    Decode a line into a QRCode object, or None when the predicate rejects it.
+    """
+    fields = index_field_data(line)
+    if predicate is not None and not predicate(line, fields):
+        return None
+    return fields_to_qr(line, fields, frozen)
+
+
+def decode_lines(source: Union[IO, str, os.PathLike], predicate: Optional[Predicate] = None, errors: str = 'raise',
+                 frozen: bool = False,
+                 chunk_size: int = CHUNK_SIZE) -> Iterator[Union[QRCode, FrozenQRCode, LineDecodeError]]:
+    """
+    Lazily decode a newline-delimited file of QR code strings, in constant memory.
+
+    Args:
+        source (Union[IO, str, os.PathLike]): A binary or text file object, or a path. Gzip content is detected and
+            decompressed on the fly.
+        predicate (Optional[Predicate]): Checked on the raw top-level fields of each line, lines it rejects are
+            skipped before any QRCode object is built. See ``by_provider`` and ``amount_between``.
+        errors (str): What to do with malformed lines, including lines that are not valid UTF-8: 'raise', 'skip'
+            or 'yield' the LineDecodeError.
+        frozen (bool): Build the slotted, immutable variants (FrozenQRCode and friends) instead.
+        chunk_size (int): The number of bytes or characters read at once.
+
+    Yields:
+        Union[QRCode, FrozenQRCode, LineDecodeError]: The decoded QR codes, and the errors when ``errors`` is
+        'yield'. Blank lines are ignored.
+
+    Raises:
+        LineDecodeError: If a line is malformed and ``errors`` is 'raise'.
+    """
+    if errors not in ('raise', 'skip', 'yield'):
+        raise ValueError(f'Invalid errors value {errors!r}, expected raise, skip or yield')
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as fileobj:
+            yield from decode_lines(fileobj, predicate, errors, frozen, chunk_size)
+        return
+
+    for line_number, raw in enumerate(_iter_lines(source, chunk_size), start=1):
+        try:
+            line = _text(raw).strip()
+            if not line:
+                continue
+            qr_code = _decode_line(line, predicate, frozen)
+        except DecodeError as exc:
+            content = raw.strip() if isinstance(raw, str) else raw.decode('utf-8', 'replace').strip()
+            if errors == 'raise':
+                raise LineDecodeError(line_number, content, exc) from exc
+            if errors == 'yield':
+                yield LineDecodeError(line_number, content, exc)
+            continue
+        if qr_code is not None:
+            yield qr_code
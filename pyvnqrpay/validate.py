@@ -0,0 +1,286 @@
+"""
+Validate QRCode objects before encoding them
+
+``combine_field_data`` and the compiled encoder write whatever they are given: a value longer than 99 characters
+gets a wrong length header, and nothing checks charsets or formats, so such QR codes only fail once scanned. The
+rules of each field are declared here by field ID, and compiled with the layout of each provider into a flat tuple
+of checks, like the encoder steps of ``schema.compile_layout``.
+"""
+import re
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Pattern, Tuple
+from pyvnqrpay import providers
+from pyvnqrpay.data_class import Provider, QRCode
+from pyvnqrpay.qr import AdditionalDataID, FieldID, PayloadEncoder, provider_layout, qrcode_layout
+from pyvnqrpay.schema import CLOSE, CONST, FIELD, OPEN, FieldSpec, attribute_getter
+
+# the longest value a two digit length header can describe
+MAX_LENGTH = 99
+
+# EMVCo "ans" values, printable ASCII, since field lengths count characters while scanners count bytes
+CHARSET = re.compile(r'[\x20-\x7e]*')
+
+
+class ValidationCode(str, Enum):  # pylint: disable=missing-class-docstring
+    MISSING = 'missing'
+    TOO_LONG = 'too_long'
+    INVALID_CHARSET = 'invalid_charset'
+    INVALID_FORMAT = 'invalid_format'
+
+
+class FieldError(NamedTuple):
+    """
+    A field failing validation.
+
+    Attributes:
+        field (str): The path of field IDs, e.g. ``38.01.00`` for the bank BIN of a VietQR code.
+        source (str): The attribute path of the value, e.g. ``consumer.bank_bin``.
+        code (ValidationCode): What is wrong with the value.
+        value (str): The value, as it would be encoded, or empty for a missing field or a template.
+    """
+    field: str
+    source: str
+    code: ValidationCode
+    value: str = ''
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    """
+    The constraints of the value of a field.
+
+    Attributes:
+        max_length (int): The maximum number of characters.
+        pattern (Optional[str]): The regular expression the whole value must match, besides the charset.
+        required (bool): Whether the field must have a value, when its template is encoded.
+    """
+    max_length: int = MAX_LENGTH
+    pattern: Optional[str] = None
+    required: bool = False
+
+
+AMOUNT_RULE = FieldRule(13, r'\d+(\.\d+)?')
+
+FIELD_RULES: Dict[str, FieldRule] = {
+    FieldID.VERSION.value: FieldRule(2, r'\d{2}', required=True),
+    FieldID.INIT_METHOD.value: FieldRule(2, r'1[12]'),
+    FieldID.CATEGORY.value: FieldRule(4, r'\d{4}'),
+    FieldID.CURRENCY.value: FieldRule(3, r'\d{3}'),
+    FieldID.AMOUNT.value: AMOUNT_RULE,
+    FieldID.TIP_AND_FEE_TYPE.value: FieldRule(2, r'0[123]'),
+    FieldID.TIP_AND_FEE_AMOUNT.value: AMOUNT_RULE,
+    FieldID.TIP_AND_FEE_PERCENT.value: FieldRule(5, r'\d{1,3}(\.\d{1,2})?'),
+    FieldID.NATION.value: FieldRule(2, r'[A-Z]{2}'),
+    FieldID.MERCHANT_NAME.value: FieldRule(25),
+    FieldID.CITY.value: FieldRule(15),
+    FieldID.ZIP_CODE.value: FieldRule(10),
+}
+
+ADDITIONAL_DATA_RULES: Dict[str, FieldRule] = {
+    **{field_id.value: FieldRule(25) for field_id in AdditionalDataID},
+    AdditionalDataID.ADDITIONAL_CONSUMER_DATA_REQUEST.value: FieldRule(3, r'[AME]{1,3}'),
+}
+
+PROVIDER_RULES: Dict[str, FieldRule] = {
+    providers.Field.GUID.value: FieldRule(32, r'[0-9A-F]{10,32}'),
+    # the merchant ID of VNPay, the consumer template of VietQR has rules of its own
+    providers.Field.DATA.value: FieldRule(required=True),
+}
+
+CONSUMER_RULES: Dict[str, FieldRule] = {
+    providers.VietQRConsumerID.BANK_BIN.value: FieldRule(6, r'\d{6}', required=True),
+    providers.VietQRConsumerID.BANK_NUMBER.value: FieldRule(19, r'[0-9A-Za-z]+', required=True),
+}
+
+# the rules of the fields of each template, by the source of the template
+TEMPLATE_RULES: Dict[Optional[str], Mapping[str, FieldRule]] = {
+    None: FIELD_RULES,
+    'provider': PROVIDER_RULES,
+    'consumer': CONSUMER_RULES,
+    'additional_data': ADDITIONAL_DATA_RULES,
+}
+
+# (kind, field, source, getter, default, max_length, pattern, required): max_length is the encoded length of a
+# CONST step, pattern the charset and format of a FIELD step
+Check = Tuple[int, str, str, Optional[Callable[[Any], Any]], str, int, Optional[Pattern], bool]
+
+
+def _compile_spec(spec: FieldSpec, rules: Mapping[str, FieldRule], config: Mapping[str, str], prefix: str,
+                  checks: List[Check]) -> None:
+    field = f'{prefix}{spec.tag}'
+    source = spec.source or ''
+    if spec.children:
+        checks.append((OPEN, field, source, None, '', 0, None, False))
+        children_rules = TEMPLATE_RULES.get(spec.source, {})
+        for child in spec.children:
+            _compile_spec(child, children_rules, config, f'{field}.', checks)
+        checks.append((CLOSE, field, source, None, '', 0, None, False))
+        return
+    default = config[spec.default_from] if spec.default_from else spec.default
+    if spec.const is not None or spec.source is None:
+        value = spec.const if spec.const is not None else default
+        checks.append((CONST, field, source, None, '', 4 + len(value) if value else 0, None, False))
+        return
+    rule = rules.get(spec.tag, FieldRule())
+    pattern = re.compile(rule.pattern or CHARSET.pattern, re.ASCII)
+    checks.append((FIELD, field, source, attribute_getter(spec.source), default, rule.max_length, pattern,
+                   rule.required))
+
+
+@lru_cache(maxsize=None)
+def compile_checks(guid: str, field_id: str, version: str, currency: str) -> Tuple[Check, ...]:
+    """
+    Compile the checks of the QR codes of a provider, once per provider and configuration.
+    """
+    checks: List[Check] = []
+    config = {'version': version, 'currency': currency}
+    for spec in qrcode_layout(provider_layout(guid, field_id)):
+        _compile_spec(spec, FIELD_RULES, config, '', checks)
+    return tuple(checks)
+
+
+def _value(value: object, default: str) -> str:
+    if value is None or value == '':
+        return default
+    return value if isinstance(value, str) else str(value)
+
+
+def _is_valid(checks: Tuple[Check, ...], qr_code: QRCode) -> bool:
+    # the all-valid path, stopping at the first failing check
+    lengths = [0]
+    for kind, _, _, getter, default, max_length, pattern, required in checks:
+        if kind == FIELD:
+            value = _value(getter(qr_code), default)
+            if value:
+                if len(value) > max_length or pattern.fullmatch(value) is None:
+                    return False
+                lengths[-1] += 4 + len(value)
+            elif required:
+                return False
+        elif kind == CONST:
+            lengths[-1] += max_length
+        elif kind == OPEN:
+            lengths.append(0)
+        else:
+            inner = lengths.pop()
+            if inner > MAX_LENGTH:
+                return False
+            if inner:
+                lengths[-1] += 4 + inner
+    return True
+
+
+def _errors(checks: Tuple[Check, ...], qr_code: QRCode) -> List[FieldError]:
+    errors: List[FieldError] = []
+    lengths = [0]
+    for kind, field, source, getter, default, max_length, pattern, required in checks:
+        if kind == FIELD:
+            value = _value(getter(qr_code), default)
+            if not value:
+                if required:
+                    errors.append(FieldError(field, source, ValidationCode.MISSING))
+                continue
+            if len(value) > max_length:
+                errors.append(FieldError(field, source, ValidationCode.TOO_LONG, value))
+            elif CHARSET.fullmatch(value) is None:
+                errors.append(FieldError(field, source, ValidationCode.INVALID_CHARSET, value))
+            elif pattern.fullmatch(value) is None:
+                errors.append(FieldError(field, source, ValidationCode.INVALID_FORMAT, value))
+            lengths[-1] += 4 + len(value)
+        elif kind == CONST:
+            lengths[-1] += max_length
+        elif kind == OPEN:
+            lengths.append(0)
+        else:
+            inner = lengths.pop()
+            if inner > MAX_LENGTH:
+                errors.append(FieldError(field, source, ValidationCode.TOO_LONG))
+            if inner:
+                lengths[-1] += 4 + inner
+    return errors
+
+
+class Validator:
+    """
+    Validate QRCode objects against the field rules, with the layout and configuration of an encoder.
+
+    Rows are first run through the checks of their provider until one fails, and only failing rows are checked
+    again to report all their errors, so validating valid rows costs about as much as encoding them.
+    """
+
+    def __init__(self, encoder: Optional[PayloadEncoder] = None):
+        self.encoder = encoder or PayloadEncoder()
+
+    def checks(self, provider: Optional[Provider]) -> Tuple[Check, ...]:
+        """
+        Get the compiled checks of the QR codes of a provider.
+        """
+        guid, field_id = (provider.guid, provider.field_id) if provider else ('', '')
+        return compile_checks(guid, field_id, self.encoder.version, self.encoder.currency)
+
+    def is_valid(self, qr_code: QRCode) -> bool:
+        """
+        Check whether a QRCode object encodes into a well-formed QR code string.
+        """
+        return _is_valid(self.checks(qr_code.provider), qr_code)
+
+    def validate(self, qr_code: QRCode) -> List[FieldError]:
+        """
+        Validate a QRCode object.
+
+        Args:
+            qr_code (QRCode): The QRCode object, as it would be passed to ``PayloadEncoder.encode``.
+
+        Returns:
+            List[FieldError]: The failing fields, in the encoding order, empty when the QR code is valid.
+        """
+        checks = self.checks(qr_code.provider)
+        if _is_valid(checks, qr_code):
+            return []
+        return _errors(checks, qr_code)
+
+    def validate_many(self, qr_codes: Iterable[QRCode]) -> Dict[int, List[FieldError]]:
+        """
+        Validate many QRCode objects.
+
+        Args:
+            qr_codes (Iterable[QRCode]): The QRCode objects.
+
+        Returns:
+            Dict[int, List[FieldError]]: The failing fields of each invalid QR code, keyed by its index, empty when
+            they are all valid.
+        """
+        invalid: Dict[int, List[FieldError]] = {}
+        checks_by_provider: Dict[Tuple[str, str], Tuple[Check, ...]] = {}
+        for index, qr_code in enumerate(qr_codes):
+            provider = qr_code.provider
+            key = (provider.guid, provider.field_id) if provider else ('', '')
+            checks = checks_by_provider.get(key)
+            if checks is None:
+                checks = checks_by_provider[key] = self.checks(provider)
+            if not _is_valid(checks, qr_code):
+                invalid[index] = _errors(checks, qr_code)
+        return invalid
+
+
+def format_errors(errors: Iterable[FieldError]) -> str:
+    """
+    Describe failing fields on one line, e.g. ``consumer.bank_bin missing, amount invalid_format``.
+    """
+    return ', '.join(f'{error.source or error.field} {error.code.value}' for error in errors)
+
+
+def validate(qr_code: QRCode) -> List[FieldError]:
+    """
+    Validate a QRCode object with the default configuration, see ``Validator.validate``.
+    """
+    return Validator().validate(qr_code)
+
+
+def validate_many(qr_codes: Iterable[QRCode]) -> Dict[int, List[FieldError]]:
+    """
+    Validate many QRCode objects with the default configuration, see ``Validator.validate_many``.
+    """
+    return Validator().validate_many(qr_codes)
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from pyvnqrpay import aio
+from pyvnqrpay.render import RenderOptions
+
+
+@pytest.fixture
+def service(monkeypatch):
+    rendered = []
+
+    def slow_render(content, **_):
+        time.sleep(0.05)
+        rendered.append(content)
+        return content.encode()
+
+    monkeypatch.setattr(aio, 'render_bytes', slow_render)
+    with ThreadPoolExecutor(8) as executor:
+        service = aio.QRService(executor, max_pending=2)
+        service.rendered = rendered
+        yield service
+
+
+def test_generate_many_shares_renders(service):
+    results = asyncio.run(service.generate_many(['a', 'b', 'a'], RenderOptions()))
+    assert [result.image for result in results] == [b'a', b'b', b'a']
+    assert sorted(service.rendered) == ['a', 'b']
+
+
+def test_shared_by_event_loops_of_several_threads(service):
+    errors = []
+
+    def run():
+        try:
+            assert asyncio.run(service.generate('same', RenderOptions())).image == b'same'
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    # reused across asyncio.run calls under contention
+    assert len(asyncio.run(service.generate_many([str(index) for index in range(8)], RenderOptions()))) == 8
+
+
+def test_caller_after_cancelled_render_gets_a_new_one(service):
+    async def run():
+        first = asyncio.ensure_future(service.generate('content', RenderOptions()))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        # the first caller leaves, cancelling its render before the render is done
+        await asyncio.sleep(0)
+        return await service.generate('content', RenderOptions())
+
+    assert asyncio.run(run()).image == b'content'
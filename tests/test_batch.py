@@ -0,0 +1,68 @@
+import io
+import pytest
+from pyvnqrpay import batch, qr
+
+HEADER = 'provider,bank_bin,bank_number,merchant_id,merchant_name,amount,bill_number\n'
+ROWS = [
+    'vietqr,970436,0011001,,,10000,INV0\n',
+    'vnpay,,,0206151637,MERCHANT 1,20000,INV1\n',
+    'vietqr,,0011001,,,30000,INV2\n',
+    'momo,970436,0011001,,,40000,INV3\n',
+    'vietqr,970436,0011001,,,abc,INV4\n',
+    'vnpay,,,,MERCHANT 1,50000,INV5\n',
+    ',970415,113366668888,,,60000,INV6\n',
+]
+REJECTED = {2, 3, 4, 5}
+
+
+@pytest.fixture(name='source')
+def fixture_source(tmp_path):
+    path = tmp_path / 'invoices.csv'
+    path.write_text(HEADER + ''.join(ROWS), encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_convert_rejects_invalid_rows(source, workers):
+    output, errors = io.StringIO(), io.StringIO()
+    summary = batch.convert(source, output, workers=workers, chunk_size=3, errors=errors)
+    assert summary == batch.ConvertSummary(rows=len(ROWS), rejected=len(REJECTED))
+    lines = output.getvalue().splitlines()
+    assert len(lines) == len(ROWS)
+    for index, line in enumerate(lines):
+        if index in REJECTED:
+            assert line == ''
+        else:
+            qr_code = qr.str_to_qr(line)
+            assert qr_code.is_valid
+            assert qr_code.additional_data.bill_number == f'INV{index}'
+    reasons = dict(line.split('\t') for line in errors.getvalue().splitlines())
+    assert reasons == {
+        '2': 'Invalid fields: consumer.bank_bin missing',
+        '3': "Invalid provider 'momo', expected one of ('vietqr', 'vnpay')",
+        '4': 'Invalid fields: amount invalid_format',
+        '5': 'Invalid fields: merchant.id missing',
+    }
+
+
+def test_convert_resumes_from_start_row(source):
+    whole = io.StringIO()
+    batch.convert(source, whole, workers=0, chunk_size=2)
+    lines = whole.getvalue().splitlines()
+    for start_row in range(len(ROWS) + 1):
+        output, errors = io.StringIO(), io.StringIO()
+        summary = batch.convert(source, output, workers=0, chunk_size=2, start_row=start_row, errors=errors)
+        assert summary.rows == len(ROWS) - start_row
+        assert summary.rejected == len([row for row in REJECTED if row >= start_row])
+        # rejected rows keep their line, so resuming at the line count appends the remaining rows
+        assert lines[:start_row] + output.getvalue().splitlines() == lines
+        assert [int(line.split('\t')[0]) for line in errors.getvalue().splitlines()] == \
+            sorted(row for row in REJECTED if row >= start_row)
+
+
+def test_row_to_qr_columns():
+    row = {'Bank': '970436', 'Account': '0011001', 'Amount': 10000, 'bill_number': None}
+    qr_code = batch.row_to_qr(row, {'bank_bin': 'Bank', 'bank_number': 'Account', 'amount': 'Amount'})
+    assert qr_code.consumer == qr.Consumer(bank_bin='970436', bank_number='0011001')
+    assert qr_code.amount == '10000'
+    assert qr_code.additional_data.bill_number == ''
@@ -0,0 +1,86 @@
+import os
+import pytest
+from pyvnqrpay import cache
+
+
+@pytest.fixture(name='renders')
+def fixture_renders(monkeypatch):
+    renders = []
+
+    def render_bytes(content, kind='png', scale=10, border=None, dark='#000', light='#fff'):
+        renders.append(content)
+        return f'{kind}:{scale}:{border}:{dark}:{light}:{content}'.encode().ljust(100, b'.')
+
+    monkeypatch.setattr(cache, 'render_bytes', render_bytes)
+    return renders
+
+
+def test_memory_hits(renders):
+    render_cache = cache.RenderCache()
+    image = render_cache.get('A', kind='svg', scale=2)
+    assert image.startswith(b'svg:2:None:#000:#fff:A')
+    assert render_cache.get('A', kind='svg', scale=2) is image
+    assert render_cache.get('A', kind='svg', scale=3) != image
+    assert renders == ['A', 'A']
+    assert render_cache.stats() == {
+        'entries': 2, 'bytes': 200, 'max_bytes': 64 * 1024 * 1024, 'hits': 1, 'disk_hits': 0, 'misses': 2,
+    }
+
+
+def test_eviction_is_least_recently_used(renders):
+    render_cache = cache.RenderCache(max_bytes=300)
+    for content in 'ABC':
+        render_cache.get(content)
+    render_cache.get('A')
+    render_cache.get('D')
+    assert len(render_cache) == 3
+    assert render_cache.size == 300
+    # B was the least recently used
+    render_cache.get('B')
+    assert renders == ['A', 'B', 'C', 'D', 'B']
+    render_cache.get('A')
+    render_cache.get('D')
+    assert renders == ['A', 'B', 'C', 'D', 'B']
+
+
+def test_images_larger_than_the_cache_are_not_kept(renders):
+    render_cache = cache.RenderCache(max_bytes=50)
+    render_cache.get('A')
+    render_cache.get('A')
+    assert renders == ['A', 'A']
+    assert (len(render_cache), render_cache.size) == (0, 0)
+
+
+def test_disk_tier(renders, tmp_path):
+    render_cache = cache.RenderCache(max_bytes=100, disk_dir=tmp_path)
+    image = render_cache.get('A')
+    path = render_cache.path(('A', 'png', 10, None, '#000', '#fff'))
+    assert path.startswith(os.fspath(tmp_path)) and path.endswith('.png')
+    with open(path, 'rb') as file:
+        assert file.read() == image
+    # evicted from memory, then read back from disk
+    render_cache.get('B')
+    assert render_cache.get('A') == image
+    assert render_cache.disk_hits == 1
+    # shared with another cache, e.g. of another process or after a restart
+    other = cache.RenderCache(disk_dir=tmp_path)
+    assert other.get('A') == image
+    assert other.stats()['disk_hits'] == 1
+    assert renders == ['A', 'B']
+    assert not [name for _, _, names in os.walk(tmp_path) for name in names if not name.endswith('.png')]
+
+
+def test_clear_keeps_the_disk_tier(renders, tmp_path):
+    render_cache = cache.RenderCache(disk_dir=tmp_path)
+    render_cache.get('A')
+    render_cache.clear()
+    assert render_cache.stats()['entries'] == render_cache.stats()['misses'] == 0
+    render_cache.get('A')
+    assert render_cache.disk_hits == 1
+    assert renders == ['A']
+
+
+def test_render_png():
+    pytest.importorskip('segno')
+    image = cache.RenderCache().get('00020101021238510010A000000727', scale=2)
+    assert image.startswith(b'\x89PNG')
@@ -0,0 +1,113 @@
+import decimal
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from pyvnqrpay import columns, qr  # noqa: E402  pylint: disable=wrong-import-position
+from pyvnqrpay.schema import attribute_getter  # noqa: E402  pylint: disable=wrong-import-position
+
+VIETQR = ('00020101021238510010A00000072701210006970436010700110010208QRIBFTTA5303704540510000'
+          '5802VN62120808tra tien6304BD04')
+VNPAY = '00020126280010A000000775011002061516375303704540450005802VN5910MERCHANT 162110807invoice63048053'
+
+PAYLOADS = [
+    VIETQR,
+    VNPAY,
+    # a wrong CRC
+    VIETQR[:-1] + '5',
+    # no amount, a decimal amount, and non ASCII characters
+    qr.qr_to_str(qr.create_vietqr_data('', '', qr.Consumer(bank_bin='970415', bank_number='113366668888'),
+                                       qr.AdditionalData(purpose='chuyển tiền'))),
+    qr.qr_to_str(qr.create_vnpayar_data('1234.5', qr.Merchant(id='0206151637', name='Cửa hàng'),
+                                        qr.AdditionalData(purpose='x'))),
+    # malformed: a truncated field, a non numeric length
+    VIETQR[:-10],
+    '0002010102xx',
+    '',
+]
+
+
+def _column(decoded, name, row):
+    if name in columns.DICTIONARY_COLUMNS:
+        code = decoded[name][row]
+        return '' if code < 0 else str(decoded[f'{name}.dictionary'][code])
+    return str(decoded[name][row])
+
+
+@pytest.mark.parametrize('chunk_size', [3, columns.CHUNK_SIZE])
+def test_decode_to_columns_matches_str_to_qr(chunk_size):
+    decoded = columns.decode_to_columns(PAYLOADS, amount_scale=1, chunk_size=chunk_size)
+    assert all(len(values) == len(PAYLOADS)
+               for name, values in decoded.items() if not name.endswith('.dictionary'))
+    for row, payload in enumerate(PAYLOADS):
+        try:
+            qr_code = qr.str_to_qr(payload)
+        except qr.DecodeError:
+            assert not decoded['is_valid'][row]
+            assert decoded['amount.mask'][row]
+            assert all(_column(decoded, name, row) == '' for name in columns.STRING_COLUMNS if name != 'amount')
+            continue
+        assert decoded['is_valid'][row] == qr_code.is_valid
+        for name in columns.STRING_COLUMNS:
+            if name == 'amount':
+                continue
+            expected = attribute_getter(name)(qr_code)
+            assert _column(decoded, name, row) == ('' if expected is None else expected), name
+        if qr_code.amount:
+            assert not decoded['amount.mask'][row]
+            assert decoded['amount'][row] == int(decimal.Decimal(qr_code.amount) * 10)
+        else:
+            assert decoded['amount.mask'][row]
+
+
+def test_decode_to_columns_empty():
+    decoded = columns.decode_to_columns([])
+    assert len(decoded['is_valid']) == len(decoded['amount']) == 0
+
+
+@pytest.mark.parametrize('values, scale, amounts, mask', [
+    (['10000', '1234.5', '0.01', '', 'abc', '1.2.3', '.', '12.345'], 2,
+     [1_000_000, 123_450, 1, 0, 0, 0, 0, 0], [False, False, False, True, True, True, True, True]),
+    (['10000', '1234.50', '1234.5'], 0, [10000, 0, 0], [False, True, True]),
+])
+def test_parse_amounts(values, scale, amounts, mask):
+    parsed, invalid = columns.parse_amounts(numpy.array(values), scale)
+    assert parsed.tolist() == amounts
+    assert invalid.tolist() == mask
+
+
+@pytest.fixture(name='template')
+def fixture_template():
+    return qr.QRTemplate.from_qrcode(qr.str_to_qr(VIETQR))
+
+
+@pytest.mark.parametrize('chunk_size', [4, columns.CHUNK_SIZE])
+def test_encode_columns_matches_render(template, chunk_size):
+    amounts = [10000, None, '1234.5', decimal.Decimal('99'), float('nan'), 0, 123456789012]
+    bill_numbers = ['INV0', None, '', 'INV3', 'hóa đơn', 'B' * 25, float('nan')]
+    purposes = [None, 'tra tien', 'x', 'chuyển tiền', '', None, 'purpose']
+    encoded = columns.encode_columns(template, amounts, bill_numbers, purposes, chunk_size=chunk_size)
+    assert len(encoded) == len(amounts)
+    for content, amount, bill_number, purpose in zip(encoded.tolist(), amounts, bill_numbers, purposes):
+        amount = None if isinstance(amount, float) else amount
+        bill_number = None if isinstance(bill_number, float) else bill_number
+        assert content == template.render(amount, bill_number, purpose)
+        assert qr.str_to_qr(content).is_valid
+
+
+def test_encode_columns_of_arrays(template):
+    amounts = numpy.arange(10, dtype=numpy.int64) * 1000 + 1000
+    bill_numbers = numpy.char.add('INV', numpy.arange(10).astype(str))
+    encoded = columns.encode_columns(template, amounts=amounts, bill_numbers=bill_numbers)
+    assert encoded.tolist() == [template.render(int(amount), str(bill_number))
+                                for amount, bill_number in zip(amounts, bill_numbers)]
+    # decoding the columns back gives the same amounts
+    assert columns.decode_to_columns(encoded.tolist())['amount'].tolist() == amounts.tolist()
+
+
+def test_encode_columns_lengths(template):
+    with pytest.raises(ValueError):
+        columns.encode_columns(template)
+    with pytest.raises(ValueError):
+        columns.encode_columns(template, amounts=[1, 2], purposes=['x'])
+    assert len(columns.encode_columns(template, amounts=[])) == 0
@@ -0,0 +1,56 @@
+import random
+import pytest
+from pyvnqrpay import qr, utils
+
+
+def _samples(count: int = 500):
+    rng = random.Random(0)
+    return [(rng.randbytes(rng.randrange(0, 512)), rng.randrange(0, 0x10000)) for _ in range(count)]
+
+
+def test_check_value():
+    assert utils.crc16_ccitt_table(b'123456789') == 0x29B1
+
+
+@pytest.mark.parametrize('name', sorted(utils.CRC16_BACKENDS))
+def test_backend_matches_table(name):
+    backend = utils.CRC16_BACKENDS[name]
+    for data, init in _samples():
+        assert backend(data, init) == utils.crc16_ccitt_table(data, init)
+
+
+@pytest.mark.parametrize('name', sorted(utils.CRC16_BACKENDS))
+def test_backend_resumes_from_checkpoint(name):
+    backend = utils.CRC16_BACKENDS[name]
+    data = random.Random(1).randbytes(4096)
+    assert backend(data[2048:], backend(data[:2048])) == backend(data)
+
+
+def test_crc16_state_resumes():
+    data = random.Random(2).randbytes(300)
+    state = utils.Crc16State().update(data[:100])
+    assert state.copy().update(data[100:]).value == utils.crc16_ccitt(data)
+    assert state.value == utils.crc16_ccitt(data[:100])
+
+
+def test_verify_crc16_batch_matches_verify_crc16():
+    payloads = [qr.qr_to_str(qr.create_vietqr_data(
+        1000 + i, '', qr.Consumer(bank_bin='970436', bank_number=f'{i:010}'), qr.AdditionalData(purpose=f'p {i}'),
+    )) for i in range(200)]
+    payloads += [payload[:-1] + ('0' if payload[-1] != '0' else '1') for payload in payloads[:50]]
+    payloads += [payloads[0].lower(), '', 'abc', 'Cà phê' + payloads[1][-4:]]
+    mask, checksums = utils.verify_crc16_batch(payloads)
+    assert mask.tolist() == [len(payload) >= 4 and utils.verify_crc16(payload) for payload in payloads]
+    assert checksums[0] == int(payloads[0][-4:], 16)
+
+
+def test_crc16_rows():
+    numpy = pytest.importorskip('numpy')
+    samples = _samples(100)
+    width = max(len(data) for data, _ in samples)
+    matrix = numpy.zeros((len(samples), width), dtype=numpy.uint8)
+    for row, (data, _) in enumerate(samples):
+        matrix[row, :len(data)] = list(data)
+    lengths = numpy.array([len(data) for data, _ in samples])
+    assert utils.crc16_rows(matrix, lengths, 0x1234).tolist() == \
+        [utils.crc16_ccitt_table(data, 0x1234) for data, _ in samples]
@@ -0,0 +1,53 @@
+import pytest
+from pyvnqrpay import qr
+
+VIETQR = ('00020101021238510010A00000072701210006970436010700110010208QRIBFTTA5303704540510000'
+          '5802VN62120808tra tien6304BD04')
+VNPAY = '00020126280010A000000775011002061516375303704540450005802VN5910MERCHANT 162110807invoice63048053'
+
+
+def test_decode_vietqr():
+    qr_code = qr.str_to_qr(VIETQR)
+    assert qr_code.is_valid
+    assert qr_code.provider == qr.Provider(guid='A000000727', field_id='38', name='VIETQR', service='QRIBFTTA')
+    assert qr_code.consumer == qr.Consumer(bank_bin='970436', bank_number='0011001')
+    assert qr_code.merchant is None
+    assert (qr_code.version, qr_code.init_method, qr_code.currency, qr_code.amount, qr_code.nation) == \
+        ('01', '12', '704', '10000', 'VN')
+    assert qr_code.additional_data.purpose == 'tra tien'
+    assert qr_code.crc == 'BD04'
+
+
+def test_decode_vnpay():
+    qr_code = qr.str_to_qr(VNPAY)
+    assert qr_code.is_valid
+    assert qr_code.provider.guid == 'A000000775'
+    assert qr_code.merchant == qr.Merchant(id='0206151637', name='MERCHANT 1')
+    assert qr_code.consumer is None
+    assert qr_code.additional_data.purpose == 'invoice'
+
+
+@pytest.mark.parametrize('content', [VIETQR, VNPAY])
+def test_round_trip(content):
+    assert qr.qr_to_str(qr.str_to_qr(content)) == content
+    assert qr.qr_to_str(qr.str_to_qr(content, frozen=True)) == content
+
+
+def test_frozen_matches_mutable():
+    frozen = qr.str_to_qr(VIETQR, frozen=True)
+    assert isinstance(frozen, qr.FrozenQRCode)
+    assert frozen.consumer.bank_bin == qr.str_to_qr(VIETQR).consumer.bank_bin
+
+
+def test_wrong_crc_is_invalid():
+    assert not qr.str_to_qr(VIETQR[:-4] + '0000').is_valid
+
+
+def test_crc_not_last_is_invalid():
+    assert not qr.str_to_qr(VIETQR + '0702AB').is_valid
+
+
+@pytest.mark.parametrize('content', ['0002', '000201011', '00AB01', VIETQR[:-2]])
+def test_malformed(content):
+    with pytest.raises(qr.DecodeError):
+        qr.str_to_qr(content)
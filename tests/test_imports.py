@@ -0,0 +1,7 @@
+import subprocess
+import sys
+
+
+def test_banks_import_is_lazy():
+    code = 'import pyvnqrpay.banks as b; assert b.get_bank_map.cache_info().currsize == 0; assert len(b.BANK_MAP) > 0'
+    subprocess.run([sys.executable, '-c', code], check=True)
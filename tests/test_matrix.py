@@ -0,0 +1,112 @@
+import re
+import zlib
+import pytest
+
+numpy = pytest.importorskip('numpy')
+segno = pytest.importorskip('segno')
+
+from pyvnqrpay import matrix, qr  # noqa: E402  pylint: disable=wrong-import-position
+
+PAYLOADS = [
+    qr.qr_to_str(qr.create_vietqr_data(
+        10_000 + i * 7919, '', qr.Consumer(bank_bin='970436', bank_number=f'{i:010}'),
+        qr.AdditionalData(purpose=f'invoice {i}'),
+    ))
+    for i in range(20)
+] + [
+    qr.qr_to_str(qr.create_vnpayar_data(
+        5_000 + i, qr.Merchant(id=f'{i:010}', name=f'MERCHANT {i}'), qr.AdditionalData(purpose='invoice'),
+    ))
+    for i in range(20)
+] + ['HELLO WORLD', 'Cửa hàng đá', 'Cà phê', 'x' * 2000, 'A' * 4296]
+
+
+def read_png(image: bytes, scale: int, border: int) -> 'numpy.ndarray':
+    assert image[:8] == b'\x89PNG\r\n\x1a\n'
+    position, idat, width = 8, b'', 0
+    while position < len(image):
+        length = int.from_bytes(image[position:position + 4], 'big')
+        kind = image[position + 4:position + 8]
+        data = image[position + 8:position + 8 + length]
+        if kind == b'IHDR':
+            width = int.from_bytes(data[:4], 'big')
+            assert data[8:10] == b'\x01\x03', 'expected a 1-bit palette image'
+        elif kind == b'IDAT':
+            idat += data
+        position += 12 + length
+    stride = (width + 7) // 8 + 1
+    rows = numpy.frombuffer(zlib.decompress(idat), dtype=numpy.uint8).reshape(-1, stride)
+    assert not rows[:, 0].any(), 'expected no filters'
+    pixels = numpy.unpackbits(rows[:, 1:], axis=1)[:, :width].astype(bool)
+    centers = pixels[scale // 2::scale, scale // 2::scale]
+    return centers[border:-border, border:-border]
+
+
+def read_svg(image: bytes, border: int) -> 'numpy.ndarray':
+    size = int(re.search(rb'viewBox="0 0 (\d+) ', image).group(1)) - 2 * border
+    modules = numpy.zeros((size, size), dtype=bool)
+    for x, y, length in re.findall(rb'M(\d+) (\d+)\.5h(\d+)', image):
+        row, start = int(y) - border, int(x) - border
+        modules[row, start:start + int(length)] = True
+    return modules
+
+
+def _expected(symbol: matrix.QRMatrix, payload: str) -> bytes:
+    if symbol.mode == matrix.MODE_ALPHANUMERIC:
+        return payload.encode()
+    return payload.encode('iso-8859-1') if all(ord(char) < 256 for char in payload) else payload.encode()
+
+
+def _data_bits(symbol: matrix.QRMatrix, payload: bytes) -> int:
+    count_bits = matrix.char_count_bits(symbol.mode, symbol.version)
+    if symbol.mode == matrix.MODE_BYTE:
+        return 4 + count_bits + 8 * len(payload)
+    return 4 + count_bits + 11 * (len(payload) // 2) + 6 * (len(payload) % 2)
+
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+def test_round_trip(payload):
+    symbol = matrix.encode(payload)
+    assert matrix.decode(symbol.modules) == _expected(symbol, payload)
+
+
+@pytest.mark.parametrize('payload', PAYLOADS[::5])
+def test_images_hold_the_modules(payload):
+    symbol = matrix.encode(payload)
+    assert (read_png(matrix.to_png(symbol, scale=3, border=2), 3, 2) == symbol.modules).all()
+    assert (read_svg(matrix.to_svg(symbol, border=2), 2) == symbol.modules).all()
+
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+def test_matches_segno(payload):
+    # segno appends a spare pad byte when the data ends on a codeword boundary, always the case in byte mode,
+    # otherwise both symbols are identical module for module
+    symbol = matrix.encode(payload)
+    expected = _expected(symbol, payload)
+    reference = segno.make(payload, micro=False, version=symbol.version, error=symbol.error, mask=symbol.mask,
+                           boost_error=False)
+    assert reference.mode == symbol.mode
+    reference_modules = numpy.array(reference.matrix, dtype=bool)
+    assert matrix.decode(reference_modules) == expected
+    bits = _data_bits(symbol, expected)
+    if bits + 4 < matrix.data_codewords(symbol.version, symbol.error) * 8 and (bits + 4) % 8:
+        assert (reference_modules == symbol.modules).all()
+
+
+def test_penalty_matches_segno():
+    rng = numpy.random.default_rng(0)
+    for _ in range(50):
+        size = matrix.symbol_size(int(rng.integers(1, 11)))
+        symbols = rng.random((8, size, size)) < rng.random()
+        expected = [
+            segno.encoder.evaluate_mask([bytearray(row.astype(numpy.uint8)) for row in symbol], size, size)
+            for symbol in symbols
+        ]
+        assert matrix.penalty_scores(symbols).tolist() == expected
+
+
+def test_corrects_damaged_symbol():
+    symbol = matrix.encode(PAYLOADS[0])
+    damaged = symbol.modules.copy()
+    damaged[-8:-4, -8:-4] ^= True
+    assert matrix.decode(damaged) == _expected(symbol, PAYLOADS[0])
@@ -0,0 +1,46 @@
+import pytest
+
+segno = pytest.importorskip('segno')
+
+from pyvnqrpay import qr, render  # noqa: E402  pylint: disable=wrong-import-position
+
+QR_CODES = [
+    qr.create_vietqr_data(10_000 + i, '', qr.Consumer(bank_bin='970436', bank_number=f'{i:010}'),
+                          qr.AdditionalData(purpose=f'invoice {i}'))
+    for i in range(5)
+]
+
+
+@pytest.mark.parametrize('kind, magic', [('png', b'\x89PNG'), ('svg', b'<?xml')])
+def test_render_bytes(kind, magic):
+    content = qr.qr_to_str(QR_CODES[0])
+    image = render.render_bytes(content, kind=kind, scale=2)
+    assert image.startswith(magic)
+    assert render.render_bytes(content.encode(), kind=kind, scale=2) == image
+    assert render.render_bytes(content, kind=kind, scale=3) != image
+
+
+def test_render_bytes_non_ascii():
+    content = qr.qr_to_str(qr.create_vnpayar_data('10000', qr.Merchant(id='0206151637', name='Cửa hàng'),
+                                                  qr.AdditionalData()))
+    assert render.render_bytes(content.encode(), kind='svg') == render.render_bytes(content, kind='svg')
+
+
+def test_invalid_kind(tmp_path):
+    with pytest.raises(ValueError):
+        render.render_bytes('content', kind='gif')
+    with pytest.raises(ValueError):
+        list(render.render_many(QR_CODES, tmp_path, kind='gif'))
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_render_many(tmp_path, workers):
+    progress = []
+    items = QR_CODES + [qr.qr_to_str(QR_CODES[0])]
+    paths = list(render.render_many(items, tmp_path / 'images', kind='svg', scale=2, workers=workers, chunk_size=2,
+                                    on_progress=lambda done, _: progress.append(done)))
+    assert [path.name for path in paths] == [f'{index:06d}.svg' for index in range(len(items))]
+    for path, item in zip(paths, items):
+        content = item if isinstance(item, str) else qr.qr_to_str(item)
+        assert path.read_bytes() == render.render_bytes(content, kind='svg', scale=2)
+    assert progress == [2, 4, 6]
@@ -0,0 +1,70 @@
+import dataclasses
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+from pyvnqrpay import matrix, qr, scan  # noqa: E402  pylint: disable=wrong-import-position
+
+CONTENT = qr.qr_to_str(qr.create_vietqr_data(
+    10_000, '', qr.Consumer(bank_bin='970436', bank_number='0011001'), qr.AdditionalData(purpose='invoice'),
+))
+
+
+def _with_data(symbol: matrix.QRMatrix, data: bytes) -> matrix.QRMatrix:
+    """
+    Replace the data codewords of a symbol, with valid Reed-Solomon blocks.
+    """
+    template = matrix.symbol_template(symbol.version)
+    codewords = matrix._interleave(data, symbol.version, symbol.error)  # pylint: disable=protected-access
+    bits = numpy.unpackbits(numpy.frombuffer(codewords, dtype=numpy.uint8)).astype(bool)
+    unmasked = symbol.modules ^ template.masks[symbol.mask]
+    unmasked.flat[template.data_index[:len(bits)]] = bits
+    return dataclasses.replace(symbol, modules=unmasked ^ template.masks[symbol.mask])
+
+
+def _crafted(mode: str, count: int, value_bits: str) -> matrix.QRMatrix:
+    symbol = matrix.encode('AB', error='L', boost_error=False, version=1, mask=0)
+    bits = mode + format(count, '09b' if mode == '0010' else '010b') + value_bits
+    bits += '0' * (-len(bits) % 8)
+    data = int(bits, 2).to_bytes(len(bits) // 8, 'big')
+    total = matrix.data_codewords(1, 'L')
+    return _with_data(symbol, data + (b'\xec\x11' * total)[:total - len(data)])
+
+
+HOSTILE_SYMBOLS = [
+    # an alphanumeric pair above 44 * 45 + 44
+    _crafted('0010', 2, format(2047, '011b')),
+    # a single alphanumeric character above 44
+    _crafted('0010', 1, format(63, '06b')),
+    # a group of 3 digits above 999
+    _crafted('0001', 3, format(1023, '010b')),
+    # a byte segment longer than the data
+    _crafted('0100', 200, ''),
+]
+
+
+@pytest.mark.parametrize('symbol', HOSTILE_SYMBOLS)
+def test_decode_rejects_invalid_segments(symbol):
+    with pytest.raises(ValueError):
+        matrix.decode(symbol.modules)
+
+
+def test_decode_image():
+    assert scan.decode_image(matrix.render_bytes(CONTENT, kind='png', scale=4)) == CONTENT
+
+
+def test_decode_images_reports_hostile_images(tmp_path):
+    paths = []
+    for index, symbol in enumerate(HOSTILE_SYMBOLS):
+        paths.append(tmp_path / f'hostile{index}.png')
+        paths[-1].write_bytes(matrix.to_png(symbol, scale=4))
+    paths.append(tmp_path / 'valid.png')
+    paths[-1].write_bytes(matrix.render_bytes(CONTENT, kind='png', scale=4))
+    (tmp_path / 'truncated.png').write_bytes(paths[-1].read_bytes()[:100])
+    paths.append(tmp_path / 'truncated.png')
+
+    results = list(scan.decode_images(paths, workers=0))
+    assert [result.path for result in results] == [str(path) for path in paths]
+    assert all(result.error and result.qr_code is None for result in results[:len(HOSTILE_SYMBOLS)])
+    assert results[-2].content == CONTENT and results[-2].qr_code.is_valid
+    assert results[-1].error
@@ -0,0 +1,131 @@
+import http.client
+import json
+import os
+import threading
+import pytest
+from pyvnqrpay import server
+
+VIETQR = ('00020101021238510010A00000072701210006970436010700110010208QRIBFTTA5303704540510000'
+          '5802VN62120808tra tien6304BD04')
+ENCODE = {'provider': 'vietqr', 'amount': 10000, 'service': 'QRIBFTTA',
+          'consumer': {'bank_bin': '970436', 'bank_number': '0011001'}, 'additional_data': {'purpose': 'tra tien'}}
+
+
+@pytest.fixture(name='request_json', scope='module')
+def fixture_request_json():
+    httpd = server.QRServer(('127.0.0.1', 0))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    connection = http.client.HTTPConnection('127.0.0.1', httpd.server_port, timeout=10)
+
+    def request(method, path, body=None):
+        connection.request(method, path, body if body is None or isinstance(body, bytes) else json.dumps(body))
+        response = connection.getresponse()
+        content = response.read()
+        if response.getheader('Content-Type') == 'application/json':
+            content = json.loads(content)
+        return response.status, content
+
+    yield request
+    connection.close()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_encode(request_json):
+    assert request_json('POST', '/encode', ENCODE) == (200, {'content': VIETQR})
+
+
+def test_decode(request_json):
+    status, result = request_json('POST', '/decode', {'content': VIETQR})
+    assert status == 200
+    assert result['consumer'] == {'bank_bin': '970436', 'bank_number': '0011001'}
+    assert result['amount'] == '10000'
+
+
+@pytest.mark.parametrize('path, body, error', [
+    ('/encode', {**ENCODE, 'provider': 'momo'}, "Unknown provider 'momo', expected vietqr or vnpay"),
+    ('/encode', {**ENCODE, 'consumer': {'bank_bin': '', 'bank_number': '0011001'}},
+     'Invalid fields: consumer.bank_bin missing'),
+    ('/decode', {'content': 42}, 'A decode request must be a JSON object with a content string'),
+    ('/decode', {'content': 'garbage'}, None),
+])
+def test_bad_request(request_json, path, body, error):
+    status, result = request_json('POST', path, body)
+    assert status == 400
+    assert error is None or result == {'error': error}
+
+
+def test_batch_answers_each_request(request_json):
+    status, results = request_json('POST', '/encode', [ENCODE, {**ENCODE, 'amount': 'abc'}, 'not an object', ENCODE])
+    assert status == 200
+    assert results == [
+        {'content': VIETQR},
+        {'error': 'Invalid fields: amount invalid_format'},
+        {'error': 'An encode request must be a JSON object'},
+        {'content': VIETQR},
+    ]
+    assert request_json('POST', '/encode', []) == (200, [])
+    status, results = request_json('POST', '/decode', [{'content': VIETQR}, {'content': 'garbage'}])
+    assert status == 200
+    assert results[0]['consumer']['bank_bin'] == '970436'
+    assert set(results[1]) == {'error'}
+
+
+def test_invalid_json_and_unknown_endpoint(request_json):
+    assert request_json('POST', '/encode', b'{')[0] == 400
+    assert request_json('POST', '/unknown', {})[0] == 404
+    assert request_json('GET', '/unknown')[0] == 404
+
+
+def test_render(request_json):
+    pytest.importorskip('segno')
+    status, image = request_json('POST', '/render?kind=svg&scale=2', {'content': VIETQR})
+    assert status == 200
+    assert image.startswith(b'<?xml') or image.startswith(b'<svg')
+    assert request_json('POST', '/render?scale=1000', {'content': VIETQR})[0] == 400
+    assert request_json('POST', '/render?kind=gif', {'content': VIETQR})[0] == 400
+
+
+def test_metrics(request_json):
+    request_json('POST', '/encode', ENCODE)
+    status, body = request_json('GET', '/metrics')
+    assert status == 200
+    assert 'pyvnqrpay_request_duration_seconds_bucket{endpoint="/encode",status="200",le="+Inf"}' in body.decode()
+
+
+def _count(metrics, endpoint, status):
+    prefix = f'pyvnqrpay_request_duration_seconds_count{{endpoint="{endpoint}",status="{status}"}} '
+    lines = [line for line in metrics.render().splitlines() if line.startswith(prefix)]
+    return int(lines[0][len(prefix):]) if lines else 0
+
+
+def test_metrics_histogram():
+    metrics = server.Metrics(buckets=(0.1, 1.0))
+    for elapsed in (0.05, 0.5, 5.0):
+        metrics.observe('/encode', 200, elapsed)
+    lines = metrics.render().splitlines()
+    assert lines[2:] == [
+        'pyvnqrpay_request_duration_seconds_bucket{endpoint="/encode",status="200",le="0.1"} 1',
+        'pyvnqrpay_request_duration_seconds_bucket{endpoint="/encode",status="200",le="1"} 2',
+        'pyvnqrpay_request_duration_seconds_bucket{endpoint="/encode",status="200",le="+Inf"} 3',
+        'pyvnqrpay_request_duration_seconds_sum{endpoint="/encode",status="200"} 5.550000',
+        'pyvnqrpay_request_duration_seconds_count{endpoint="/encode",status="200"} 3',
+    ]
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_metrics_shared_with_forked_workers():
+    metrics = server.Metrics(shared=True)
+    metrics.observe('/decode', 200, 0.001)
+    children = []
+    for _ in range(3):
+        pid = os.fork()
+        if pid == 0:
+            for _ in range(100):
+                metrics.observe('/decode', 200, 0.001)
+            os._exit(0)  # pylint: disable=protected-access
+        children.append(pid)
+    for pid in children:
+        assert os.waitpid(pid, 0)[1] == 0
+    assert _count(metrics, '/decode', 200) == 301
@@ -0,0 +1,99 @@
+import os
+import pytest
+from pyvnqrpay import qr, store
+
+CONSUMERS = [qr.Consumer(bank_bin='970436', bank_number=f'{i:010}') for i in range(5)] + [
+    qr.Consumer(bank_bin='970415', bank_number='113366668888'),
+]
+
+
+def _expected(consumer, amount, bill_number=None, purpose=None, service=''):
+    qr_code = qr.create_vietqr_data(amount, service, consumer, qr.AdditionalData())
+    # create_vietqr_data only keeps the purpose
+    qr_code.additional_data = qr.AdditionalData(bill_number=bill_number or '', purpose=purpose or '')
+    return qr.qr_to_str(qr_code)
+
+
+@pytest.fixture(name='path')
+def fixture_path(tmp_path):
+    return tmp_path / 'consumers.sqlite'
+
+
+@pytest.mark.parametrize('amount, bill_number, purpose', [
+    (10000, 'INV0001', 'tra tien'),
+    ('5', None, None),
+    (123456789, 'B', 'Cửa hàng'),
+])
+def test_render_matches_qr_to_str(path, amount, bill_number, purpose):
+    consumer_store = store.ConsumerStore(path)
+    for consumer in CONSUMERS:
+        content = consumer_store.render(consumer, amount, bill_number, purpose)
+        assert content == _expected(consumer, amount, bill_number, purpose)
+        assert qr.str_to_qr(content).is_valid
+    consumer_store.close()
+
+
+def test_service(path):
+    consumer_store = store.ConsumerStore(path, service='QRIBFTTC')
+    assert consumer_store.render(CONSUMERS[0], 1000) == _expected(CONSUMERS[0], 1000, service='QRIBFTTC')
+
+
+def test_memory_store_and_encode_tiers(path):
+    consumer_store = store.ConsumerStore(path, memory_entries=2)
+    for consumer in CONSUMERS[:3]:
+        consumer_store.render(consumer, 1000)
+    consumer_store.render(CONSUMERS[2], 2000)
+    # the first consumer was evicted from memory, but not from the store
+    consumer_store.render(CONSUMERS[0], 3000)
+    assert consumer_store.stats() == {'memory_entries': 2, 'hits': 1, 'store_hits': 1, 'misses': 3}
+    consumer_store.close()
+
+    # the heads survive a restart
+    reopened = store.ConsumerStore(path)
+    assert len(reopened) == 3
+    assert reopened.render(CONSUMERS[1], 4000) == _expected(CONSUMERS[1], 4000)
+    assert reopened.stats()['store_hits'] == 1
+    reopened.close()
+
+
+def test_warm(path):
+    consumer_store = store.ConsumerStore(path)
+    consumer_store.render(CONSUMERS[0], 1000)
+    assert consumer_store.warm(CONSUMERS + CONSUMERS) == len(CONSUMERS) - 1
+    assert len(consumer_store) == len(CONSUMERS)
+    consumer_store.clear()
+    for consumer in CONSUMERS:
+        assert consumer_store.render(consumer, 1000) == _expected(consumer, 1000)
+    assert consumer_store.stats()['store_hits'] == len(CONSUMERS)
+    consumer_store.close()
+
+
+def test_eviction_of_least_recently_used(path):
+    consumer_store = store.ConsumerStore(path, max_entries=3, memory_entries=0)
+    for consumer in CONSUMERS[:3]:
+        consumer_store.render(consumer, 1000)
+    # loading from the store marks the first consumer as used
+    consumer_store.render(CONSUMERS[0], 1000)
+    consumer_store.render(CONSUMERS[3], 1000)
+    assert len(consumer_store) == 3
+    consumer_store.clear()
+    for consumer in (CONSUMERS[0], CONSUMERS[2], CONSUMERS[3]):
+        consumer_store.render(consumer, 1000)
+    assert consumer_store.stats()['misses'] == 0
+    consumer_store.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_shared_with_forked_processes(path):
+    consumer_store = store.ConsumerStore(path)
+    consumer_store.render(CONSUMERS[0], 1000)
+    pid = os.fork()
+    if pid == 0:
+        # the child opens its own connection, and stores a head the parent then loads
+        status = 0 if consumer_store.render(CONSUMERS[1], 1000) == _expected(CONSUMERS[1], 1000) else 1
+        consumer_store.close()
+        os._exit(status)  # pylint: disable=protected-access
+    assert os.waitpid(pid, 0)[1] == 0
+    assert consumer_store.render(CONSUMERS[1], 2000) == _expected(CONSUMERS[1], 2000)
+    assert consumer_store.stats()['store_hits'] == 1
+    consumer_store.close()
@@ -0,0 +1,57 @@
+import gzip
+import io
+import pytest
+from pyvnqrpay import qr, stream
+
+VIETQR = ('00020101021238510010A00000072701210006970436010700110010208QRIBFTTA5303704540510000'
+          '5802VN62120808tra tien6304BD04')
+VNPAY = '00020126280010A000000775011002061516375303704540450005802VN5910MERCHANT 162110807invoice63048053'
+# multi-byte characters, split between chunks for small chunk sizes
+UNICODE = qr.qr_to_str(qr.create_vnpayar_data('10000', qr.Merchant(id='0206151637', name='Cửa hàng'),
+                                                   qr.AdditionalData(purpose='thanh toán')))
+
+
+def _contents(results):
+    return [qr.qr_to_str(result) if isinstance(result, qr.QRCode) else result.line_number for result in results]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, stream.CHUNK_SIZE])
+@pytest.mark.parametrize('compress', [False, True])
+def test_decode_lines(chunk_size, compress):
+    data = f'{VIETQR}\r\n\n{UNICODE}\n{VNPAY}'.encode()
+    results = stream.decode_lines(io.BytesIO(gzip.compress(data) if compress else data), chunk_size=chunk_size)
+    assert _contents(results) == [VIETQR, UNICODE, VNPAY]
+
+
+def test_decode_text_lines():
+    assert _contents(stream.decode_lines(io.StringIO(f'{UNICODE}\n{VNPAY}\n'), chunk_size=5)) == [UNICODE, VNPAY]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, stream.CHUNK_SIZE])
+def test_invalid_utf8_line(chunk_size):
+    data = f'{VIETQR}\n'.encode() + b'\xff\xfe' + f'{VNPAY}\n{UNICODE}'.encode()
+    results = list(stream.decode_lines(io.BytesIO(data), errors='yield', chunk_size=chunk_size))
+    assert _contents(results) == [VIETQR, 2, UNICODE]
+    assert results[1].content == f'��{VNPAY}'
+    assert isinstance(results[1].error, qr.DecodeError)
+    assert _contents(stream.decode_lines(io.BytesIO(data), errors='skip', chunk_size=chunk_size)) == [VIETQR, UNICODE]
+    with pytest.raises(stream.LineDecodeError, match='Line 2: Invalid UTF-8'):
+        list(stream.decode_lines(io.BytesIO(data), chunk_size=chunk_size))
+
+
+def test_truncated_utf8_at_end_of_file():
+    data = f'{VIETQR}\n{UNICODE}'.encode()
+    # cut in the middle of the 'à' of 'hàng'
+    data = data[:data.rindex(b'ng') - 1]
+    results = list(stream.decode_lines(io.BytesIO(data), errors='yield', chunk_size=3))
+    assert _contents(results) == [VIETQR, 2]
+    assert 'Invalid UTF-8' in str(results[1])
+
+
+def test_predicates():
+    data = '\n'.join([VIETQR, VNPAY, UNICODE, 'not a QR code'])
+    predicate = stream.by_provider('A000000775')
+    results = stream.decode_lines(io.StringIO(data), predicate=predicate, errors='skip')
+    assert _contents(results) == [VNPAY, UNICODE]
+    results = stream.decode_lines(io.StringIO(data), predicate=stream.amount_between(5000, 9999), errors='skip')
+    assert _contents(results) == [VNPAY]
@@ -0,0 +1,88 @@
+import pytest
+from pyvnqrpay import qr, validate
+from pyvnqrpay.validate import FieldError, ValidationCode
+
+CONSUMER = qr.Consumer(bank_bin='970436', bank_number='0011001')
+MERCHANT = qr.Merchant(id='0206151637', name='MERCHANT 1')
+
+
+def _vietqr(amount='10000', consumer=CONSUMER, **additional_data):
+    return qr.create_vietqr_data(amount, '', consumer, qr.AdditionalData(**additional_data))
+
+
+def _vnpay(amount='10000', merchant=MERCHANT, **additional_data):
+    qr_code = qr.create_vnpayar_data(amount, merchant, qr.AdditionalData())
+    qr_code.additional_data = qr.AdditionalData(**additional_data)
+    return qr_code
+
+
+def _with(qr_code, **fields):
+    for name, value in fields.items():
+        setattr(qr_code, name, value)
+    return qr_code
+
+
+VALID = [
+    _vietqr(),
+    _vietqr('', purpose='tra tien'),
+    _vietqr('1234567890.50', consumer=qr.Consumer(bank_bin='970415', bank_number='ABC1234567890123456')),
+    _vnpay(bill_number='INV0001', purpose='x' * 25),
+    _vnpay(12000, data_request='AME'),
+]
+
+
+@pytest.mark.parametrize('qr_code', VALID)
+def test_valid(qr_code):
+    assert validate.validate(qr_code) == []
+    assert validate.Validator().is_valid(qr_code)
+    assert qr.str_to_qr(qr.qr_to_str(qr_code)).is_valid
+
+
+@pytest.mark.parametrize('qr_code, errors', [
+    (_vietqr(consumer=qr.Consumer(bank_bin='', bank_number='0011001')),
+     [FieldError('38.01.00', 'consumer.bank_bin', ValidationCode.MISSING)]),
+    (_vietqr(consumer=qr.Consumer(bank_bin='97043', bank_number='x' * 20)), [
+        FieldError('38.01.00', 'consumer.bank_bin', ValidationCode.INVALID_FORMAT, '97043'),
+        FieldError('38.01.01', 'consumer.bank_number', ValidationCode.TOO_LONG, 'x' * 20),
+    ]),
+    (_vietqr(purpose='tiền'),
+     [FieldError('62.08', 'additional_data.purpose', ValidationCode.INVALID_CHARSET, 'tiền')]),
+    (_vnpay('1e5', merchant=qr.Merchant(id='', name='M' * 26)), [
+        FieldError('26.01', 'merchant.id', ValidationCode.MISSING),
+        FieldError('54', 'amount', ValidationCode.INVALID_FORMAT, '1e5'),
+        FieldError('59', 'merchant.name', ValidationCode.TOO_LONG, 'M' * 26),
+    ]),
+    (_vnpay(data_request='X'), [
+        FieldError('62.09', 'additional_data.data_request', ValidationCode.INVALID_FORMAT, 'X'),
+    ]),
+    (_with(_vietqr(), currency='70', nation='vn'), [
+        FieldError('53', 'currency', ValidationCode.INVALID_FORMAT, '70'),
+        FieldError('58', 'nation', ValidationCode.INVALID_FORMAT, 'vn'),
+    ]),
+    # each field fits, but not the whole template
+    (_vnpay(store='x' * 25, terminal='x' * 25, bill_number='x' * 25, reference='x' * 25),
+     [FieldError('62', 'additional_data', ValidationCode.TOO_LONG)]),
+])
+def test_invalid(qr_code, errors):
+    assert validate.validate(qr_code) == errors
+    assert not validate.Validator().is_valid(qr_code)
+
+
+def test_validate_many():
+    qr_codes = [_vietqr(), _vnpay(merchant=qr.Merchant(id='', name='M')), _vietqr('abc'), _vnpay()]
+    assert validate.validate_many(qr_codes) == {
+        1: [FieldError('26.01', 'merchant.id', ValidationCode.MISSING)],
+        2: [FieldError('54', 'amount', ValidationCode.INVALID_FORMAT, 'abc')],
+    }
+    assert validate.validate_many(VALID) == {}
+
+
+def test_encoder_configuration():
+    validator = validate.Validator(qr.PayloadEncoder(currency='7040'))
+    assert validator.validate(_vietqr()) == [FieldError('53', 'currency', ValidationCode.TOO_LONG, '7040')]
+
+
+def test_format_errors():
+    errors = validate.validate(_vietqr('abc', consumer=qr.Consumer(bank_bin='', bank_number='0011001')))
+    assert validate.format_errors(errors) == 'consumer.bank_bin missing, amount invalid_format'
+    assert validate.format_errors([]) == ''